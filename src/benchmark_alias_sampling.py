@@ -0,0 +1,58 @@
+import random
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from simulator.distributions import AliasTable
+
+"""
+Benchmarks sampling from alias tables against walking the cumulative probabilities of a list of
+probability/ value tuples, as the mined problems sampled their initial and next task types before.
+Also checks that the frequencies of the sampled values match their probabilities.
+Run from the repository root with:
+    python src/benchmark_alias_sampling.py [draws]
+"""
+
+
+def walk(distribution):
+    def sample():
+        rd = random.random()
+        rs = 0
+        for (p, v) in distribution:
+            rs += p
+            if rd < rs:
+                return v
+    return sample
+
+
+def rate(sample, draws):
+    start = time.perf_counter()
+    for _ in range(draws):
+        sample()
+    return draws / (time.perf_counter() - start)
+
+
+def max_frequency_error(table, distribution, draws):
+    counts = Counter(table.sample_many(draws))
+    return max(abs(counts[v] / draws - p) for (p, v) in distribution)
+
+
+if __name__ == "__main__":
+    draws = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    rng = np.random.default_rng(0)
+    print(f"{'values':>7} {'walk draws/s':>13} {'alias draws/s':>14} {'batched draws/s':>16} {'max freq error':>15}")
+    for nr_values in [2, 5, 10, 50, 200, 1000]:
+        weights = rng.gamma(0.5, size=nr_values)
+        distribution = list(zip(weights / weights.sum(), range(nr_values)))
+        table = AliasTable([v for (p, v) in distribution], [p for (p, v) in distribution], tolerance=1e-6)
+        table.seed(42)
+
+        walk_rate = rate(walk(distribution), draws)
+        alias_rate = rate(table.sample, draws)
+        start = time.perf_counter()
+        table.sample_many(draws)
+        batched_rate = draws / (time.perf_counter() - start)
+        error = max_frequency_error(table, distribution, draws)
+        print(f"{nr_values:>7} {walk_rate:>13.0f} {alias_rate:>14.0f} {batched_rate:>16.0f} {error:>15.4f}")
@@ -0,0 +1,62 @@
+import random
+import sys
+import time
+
+from hungarian_policy import HungarianMultiObjectivePolicy
+from ilp_policy_non_assign_2 import UnrelatedParallelMachinesSchedulingNonAssignPolicy2
+from simulator.problems import MinedProblem, Task
+
+"""
+Benchmarks solving the allocation problems of HungarianMultiObjectivePolicy and
+UnrelatedParallelMachinesSchedulingNonAssignPolicy2 as a whole against solving each connected component of the resource
+pools separately, on random predictions for the resource pools of a problem. Reports the time of an allocation,
+the number of assignments, and their total predicted duration, which is the same for the Hungarian policy, because its
+assignment problem is separable, but can differ for the MILP policy, which minimizes the makespan per component when it
+is decomposed, and the number of the solves of the MILP policy that are optimal. Run from the repository root with:
+    python src/benchmark_component_decomposition.py [problem file]
+"""
+
+
+def instance(resource_pool, nr_tasks, seed=0):
+    rng = random.Random(seed)
+    task_types = [task_type for task_type, pool in resource_pool.items() if pool]
+    resources = sorted(set(sum(resource_pool.values(), [])))
+    tasks = [Task(i, i, rng.choice(task_types)) for i in range(nr_tasks)]
+    trd = {(task, resource): rng.uniform(0.1, 2.0) for task in tasks for resource in resource_pool[task.task_type]}
+    task_costs = {task: sum(trd[(task, resource)] for resource in resource_pool[task.task_type]) / len(resource_pool[task.task_type])
+                  for task in tasks}
+    available_resources = set(rng.sample(resources, len(resources) // 2))
+    working_resources = {resource: (0.0, rng.uniform(0, 2)) for resource in resources if resource not in available_resources}
+    return tasks, available_resources, trd, task_costs, working_resources
+
+
+def allocate(policy, resource_pool, problem):
+    tasks, available_resources, trd, task_costs, working_resources = problem
+    start = time.perf_counter()
+    assignments = policy.allocate(list(tasks), set(available_resources), resource_pool, dict(trd), {}, {}, dict(task_costs),
+                                  working_resources, 0.0)
+    duration = time.perf_counter() - start
+    solves = f"{policy.optimal}/{policy.optimal + policy.feasible + policy.no_solution}" if hasattr(policy, 'optimal') else '-'
+    return duration, len(assignments), sum(trd[assignment] for assignment in assignments), solves
+
+
+if __name__ == "__main__":
+    sys.path.append('src/simulator')
+    problem_file = sys.argv[1] if len(sys.argv) > 1 else 'src/simulator/data/po_problem.pickle'
+    resource_pool = MinedProblem.from_file(problem_file).resource_pools
+    policies = [('Hungarian', lambda decompose: HungarianMultiObjectivePolicy(1, 0, 0, 1.5, decompose=decompose)),
+                ('MILP', lambda decompose: UnrelatedParallelMachinesSchedulingNonAssignPolicy2(1, 0, 0, 1.5, 'EIF', decompose=decompose))]
+    task_type_components, resource_components = policies[0][1](True).resource_pool_components(resource_pool)
+    print("components:", len(set(resource_components.values())), "resources per component:",
+          sorted([list(resource_components.values()).count(c) for c in set(resource_components.values())], reverse=True))
+
+    print(f"{'policy':>10} {'tasks':>6} {'whole s':>8} {'components s':>13} {'whole assigned':>15} {'components assigned':>20} "
+          f"{'whole hours':>12} {'components hours':>17} {'whole optimal':>14} {'components optimal':>19}")
+    for name, create_policy in policies:
+        for nr_tasks in [10, 50, 100, 500]:
+            problem = instance(resource_pool, nr_tasks)
+            whole_time, whole_assigned, whole_hours, whole_solves = allocate(create_policy(False), resource_pool, problem)
+            components_time, components_assigned, components_hours, components_solves = \
+                allocate(create_policy(True), resource_pool, problem)
+            print(f"{name:>10} {nr_tasks:>6} {whole_time:>8.3f} {components_time:>13.3f} {whole_assigned:>15} {components_assigned:>20} "
+                  f"{whole_hours:>12.2f} {components_hours:>17.2f} {whole_solves:>14} {components_solves:>19}")
@@ -0,0 +1,89 @@
+import random
+import sys
+import time
+
+from ortools.sat.python import cp_model
+
+from ilp_policy_non_assign_2 import UnrelatedMachinesSchedulingNonAssign2, UnrelatedMachinesSchedulingNonAssignSession2
+from simulator.problems import Task
+
+"""
+Benchmarks solving the models of UnrelatedParallelMachinesSchedulingNonAssignPolicy2 for a sequence of consecutive
+allocation problems, in which a tenth of the tasks of the backlog is replaced between problems: building a model per
+problem without hints, against updating one persistent model that hints the previous solution,
+as the policy does with persistent=True. Reports the mean build time, the mean solve time, the number of optimal
+solves, the mean objective, and the hint acceptance per backlog size. Run from the repository root with:
+    python src/benchmark_cp_sat_session.py [resources] [pool size] [problems] [time limit] [workers]
+"""
+
+
+def problems(nr_tasks, nr_resources, pool_size, nr_problems, seed=0):
+    rng = random.Random(seed)
+    resources = ['R' + str(i) for i in range(nr_resources)]
+    tasks = [Task(i, i, 'T') for i in range(nr_tasks)]
+    pools = {task: rng.sample(resources, pool_size) for task in tasks}
+    durations = {(task, resource): int(rng.uniform(0.1, 2.0) * 3600) for task in tasks for resource in pools[task]}
+    next_id = nr_tasks
+    for _ in range(nr_problems):
+        task_data = {(task, resource): durations[task, resource] for task in tasks for resource in pools[task]}
+        non_assign_cost = {task: int(1.5 * sum(durations[task, resource] for resource in pools[task]) / pool_size) for task in tasks}
+        machines_start = {resource: rng.choice([0, 0, 1800, 3600]) for resource in resources}
+        yield task_data, non_assign_cost, machines_start
+        for task in rng.sample(tasks, max(1, nr_tasks // 10)):
+            tasks.remove(task)
+            new_task = Task(next_id, next_id, 'T')
+            next_id += 1
+            tasks.append(new_task)
+            pools[new_task] = rng.sample(resources, pool_size)
+            for resource in pools[new_task]:
+                durations[new_task, resource] = int(rng.uniform(0.1, 2.0) * 3600)
+
+
+def solve_built(task_data, non_assign_cost, machines_start, time_limit, num_workers):
+    start = time.perf_counter()
+    task_encoding, resource_encoding = dict(), dict()
+    encoded_data = []
+    for (task, resource), duration in task_data.items():
+        task_encoding.setdefault(task, len(task_encoding))
+        resource_encoding.setdefault(resource, len(resource_encoding))
+        encoded_data.append((task_encoding[task], resource_encoding[resource], duration))
+    model = UnrelatedMachinesSchedulingNonAssign2(encoded_data, {task_encoding[task]: cost for task, cost in non_assign_cost.items()},
+                                                  {resource_encoding[resource]: start for resource, start in machines_start.items()}, 1.5)
+    build_time = time.perf_counter() - start
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    if num_workers is not None:
+        solver.parameters.num_workers = num_workers
+    status = solver.Solve(model.model)
+    return build_time, solver.WallTime(), status, solver.ObjectiveValue()
+
+
+if __name__ == "__main__":
+    sys.path.append('src/simulator')
+    nr_resources = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    pool_size = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    nr_problems = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    time_limit = float(sys.argv[4]) if len(sys.argv) > 4 else 2.0
+    num_workers = int(sys.argv[5]) if len(sys.argv) > 5 else None
+
+    print(f"{'tasks':>6} {'built build ms':>15} {'session build ms':>17} {'built solve s':>14} {'session solve s':>16} "
+          f"{'built optimal':>14} {'session optimal':>16} {'built objective':>16} {'session objective':>18} {'hint acceptance':>16}")
+    for nr_tasks in [10, 20, 50, 100]:
+        session = UnrelatedMachinesSchedulingNonAssignSession2(time_limit, num_workers)
+        built, session_objectives = [], []
+        for task_data, non_assign_cost, machines_start in problems(nr_tasks, nr_resources, pool_size, nr_problems):
+            machines_start = {resource: machines_start[resource] for _, resource in task_data}
+            built.append(solve_built(task_data, non_assign_cost, machines_start, time_limit, num_workers))
+            solver, status, _, _ = session.allocate(task_data, non_assign_cost, machines_start)
+            session_objectives.append(solver.ObjectiveValue())
+        stats = session.stats()
+        built_build = sum(b[0] for b in built) / len(built)
+        built_solve = sum(b[1] for b in built) / len(built)
+        built_optimal = sum(1 for b in built if b[2] == cp_model.OPTIMAL)
+        built_objective = sum(b[3] for b in built) / len(built)
+        session_build = stats['build seconds'] / len(session.calls)
+        session_solve = stats['solve seconds'] / len(session.calls)
+        session_objective = sum(session_objectives) / len(session_objectives)
+        print(f"{nr_tasks:>6} {built_build * 1000:>15.1f} {session_build * 1000:>17.1f} {built_solve:>14.3f} {session_solve:>16.3f} "
+              f"{built_optimal:>14} {stats['solves'].get('OPTIMAL', 0):>16} {built_objective:>16.0f} {session_objective:>18.0f} "
+              f"{stats['hint acceptance']:>16.2f}")
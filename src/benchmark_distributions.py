@@ -0,0 +1,62 @@
+import sys
+import time
+
+import scipy.stats
+
+from simulator.distributions import GammaDistribution, NormalDistribution, BetaDistribution, ErlangDistribution, \
+    TruncatedNormalDistribution
+
+"""
+Benchmarks the buffered distributions against drawing a single variate from scipy.stats per sample,
+as the distributions did before. Also checks that equally seeded distributions draw the same stream.
+Run from the repository root with:
+    python src/benchmark_distributions.py [draws]
+"""
+
+
+def gamma():
+    distribution = GammaDistribution()
+    distribution._alpha, distribution._loc, distribution._scale = 0.3, 0, 48
+    return distribution, lambda: scipy.stats.gamma.rvs(0.3, loc=0, scale=48)
+
+
+def normal():
+    return NormalDistribution(1, 0.5), lambda: scipy.stats.norm.rvs(1, 0.5)
+
+
+def beta():
+    distribution = BetaDistribution()
+    distribution._a, distribution._b, distribution._loc, distribution._scale = 2, 5, 0, 1
+    return distribution, lambda: scipy.stats.beta.rvs(2, 5, 0, 1)
+
+
+def erlang():
+    return ErlangDistribution(3, 2), lambda: scipy.stats.erlang.rvs(3, scale=2)
+
+
+def truncated_normal():
+    return TruncatedNormalDistribution(0.5, 0.05), lambda: scipy.stats.truncnorm(-0.5 / 0.05, float('inf'), scale=0.05, loc=0.5).rvs()
+
+
+def rate(sample, draws):
+    start = time.perf_counter()
+    for _ in range(draws):
+        sample()
+    return draws / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    draws = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{'distribution':>17} {'scipy draws/s':>14} {'buffered draws/s':>17} {'speedup':>8} {'reproducible':>13}")
+    for name, factory in [('gamma', gamma), ('normal', normal), ('beta', beta), ('erlang', erlang),
+                          ('truncated normal', truncated_normal)]:
+        distribution, scipy_sample = factory()
+        distribution.seed(42)
+        buffered_rate = rate(distribution.sample, draws)
+        scipy_rate = rate(scipy_sample, max(draws // 10, 1))
+
+        first, second = factory()[0], factory()[0]
+        first.seed(7)
+        second.seed(7)
+        reproducible = [first.sample() for _ in range(3000)] == [second.sample() for _ in range(3000)]
+        print(f"{name:>17} {scipy_rate:>14.0f} {buffered_rate:>17.0f} {buffered_rate / scipy_rate:>8.0f} {str(reproducible):>13}")
@@ -0,0 +1,90 @@
+import collections
+import gc
+import sys
+import time
+import tracemalloc
+
+from simulator.simulator import Event, EventType
+from simulator.problems import Task
+
+"""
+Benchmarks the memory use of the simulator's events and tasks with tracemalloc.
+Compares the slotted Event and Task, where one event instance is shared by the planner and the reporter,
+against the previous dict-backed classes, where the simulator created a copy of an event for each listener.
+Run from the repository root with:
+    python src/benchmark_event_memory.py [tasks]
+"""
+
+
+class DictTask:
+    """The previous, dict-backed, task."""
+    def __init__(self, task_id, case_id, task_type):
+        self.id = task_id
+        self.case_id = case_id
+        self.task_type = task_type
+        self.data = dict()
+
+
+class DictEvent:
+    """The previous, dict-backed, event."""
+    def __init__(self, event_type, moment, task, resource=None, nr_tasks=0, nr_resources=0):
+        self.event_type = event_type
+        self.lifecycle_state = event_type
+        self.moment = moment
+        self.timestamp = moment
+        self.case_id = task.case_id if task else None
+        self.task = task
+        self.resource = resource
+        self.nr_tasks = nr_tasks
+        self.nr_resources = nr_resources
+
+
+def live_size(factory, n):
+    # the number of bytes that n live objects take
+    tracemalloc.start()
+    objects = [factory(i) for i in range(n)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return size / n
+
+
+def lifecycle(task_class, event_class, copies_per_listener, nr_tasks, pending=2000):
+    # Runs the events that the simulator creates for each task: activate, start, and complete.
+    # A window of tasks and their events is kept alive, like the simulator keeps its pending work.
+    def notify(event_type, moment, task, resource):
+        if copies_per_listener:
+            return [event_class(event_type, moment, task, resource) for _ in range(2)]
+        return [event_class(event_type, moment, task, resource)]
+
+    gc.collect()
+    collections_before = sum(stat['collections'] for stat in gc.get_stats())
+    tracemalloc.start()
+    start = time.perf_counter()
+    window = collections.deque(maxlen=pending)
+    for i in range(nr_tasks):
+        task = task_class(i, i // 4, "T")
+        events = notify(EventType.TASK_ACTIVATE, i, task, None)
+        events += notify(EventType.START_TASK, i, task, "R")
+        events += notify(EventType.COMPLETE_TASK, i + 1, task, "R")
+        window.append((task, events))
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    collections_after = sum(stat['collections'] for stat in gc.get_stats())
+    return peak, collections_after - collections_before, duration
+
+
+if __name__ == "__main__":
+    nr_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    print(f"bytes per task:  dict-backed {live_size(lambda i: DictTask(i, i, 'T'), 10000):.0f}, "
+          f"slotted {live_size(lambda i: Task(i, i, 'T'), 10000):.0f}")
+    print(f"bytes per event: dict-backed {live_size(lambda i: DictEvent(EventType.START_TASK, i, None), 10000):.0f}, "
+          f"slotted {live_size(lambda i: Event(EventType.START_TASK, i, None), 10000):.0f}")
+
+    old_peak, old_collections, old_duration = lifecycle(DictTask, DictEvent, True, nr_tasks)
+    new_peak, new_collections, new_duration = lifecycle(Task, Event, False, nr_tasks)
+    print(f"{'':>24} {'peak KiB':>10} {'gc runs':>8} {'seconds':>8}")
+    print(f"{'dict-backed, copied':>24} {old_peak / 1024:>10.0f} {old_collections:>8} {old_duration:>8.2f}")
+    print(f"{'slotted, shared':>24} {new_peak / 1024:>10.0f} {new_collections:>8} {new_duration:>8.2f}")
@@ -0,0 +1,58 @@
+import random
+import sys
+import time
+
+from simulator.simulator import Event, EventQueue, EventType
+
+"""
+Benchmarks the event queue of the simulator against the sorted list that the simulator used before.
+Uses the classic 'hold' model: the queue is filled with a number of pending events, after which
+the first event is repeatedly popped and a new event is pushed at a random moment after it.
+Run from the repository root with:
+    python src/benchmark_event_queue.py [operations]
+"""
+
+
+class SortedListQueue:
+    """The previous event queue: append, sort the whole list, and pop from the front."""
+    def __init__(self):
+        self.events = []
+
+    def push(self, event):
+        self.events.append((event.moment, event))
+        self.events.sort()
+
+    def pop(self):
+        return self.events.pop(0)[1]
+
+
+def hold(queue, pending_events, operations, seed=42):
+    rng = random.Random(seed)
+    for _ in range(pending_events):
+        t = rng.expovariate(1)
+        queue.push(Event(EventType.COMPLETE_TASK, t, None))
+    start = time.perf_counter()
+    for _ in range(operations):
+        event = queue.pop()
+        t = event.moment + rng.expovariate(1)
+        queue.push(Event(EventType.COMPLETE_TASK, t, None))
+    return operations / (time.perf_counter() - start)
+
+
+def same_moment_order():
+    # events that happen at the same moment must leave the queue in the order in which they entered it
+    queue = EventQueue()
+    events = [Event(EventType.PLAN_TASKS, 1.0, None, nr_tasks=i) for i in range(100)]
+    for event in events:
+        queue.push(event)
+    return [queue.pop() for _ in range(len(events))] == events
+
+
+if __name__ == "__main__":
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print("same-moment events keep insertion order:", same_moment_order())
+    print(f"{'pending':>8} {'list events/s':>15} {'heap events/s':>15} {'speedup':>8}")
+    for pending_events in [10, 100, 1000, 5000, 20000]:
+        list_rate = hold(SortedListQueue(), pending_events, operations)
+        heap_rate = hold(EventQueue(), pending_events, operations)
+        print(f"{pending_events:>8} {list_rate:>15.0f} {heap_rate:>15.0f} {heap_rate / list_rate:>8.1f}")
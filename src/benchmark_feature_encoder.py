@@ -0,0 +1,61 @@
+import pickle
+import random
+import sys
+import time
+
+import numpy as np
+import pandas
+
+from simulator.problems import MinedProblem, Task
+
+"""
+Benchmarks the feature encoder of a trained ExecutionTimeModel against encoding through DataFrames and the fitted
+sklearn transformers of the model, as the model did before. Checks that both encode the same float32 matrix,
+bit for bit, and reports the time to encode a batch per batch size. Run from the repository root with:
+    python src/benchmark_feature_encoder.py [prediction model file] [problem file]
+"""
+
+
+def random_rows(model, problem, n, seed=0):
+    rng = random.Random(seed)
+    task_types = [tt for tt in problem.task_types if problem.resource_pools[tt]]
+    activity_names = list(problem.resource_pools.keys())
+    rows = []
+    for i in range(n):
+        task = Task(i, i, rng.choice(task_types))
+        task.data = {data_type: distribution.sample() for data_type, distribution in problem.data_types.items()}
+        occurrences = {tt: rng.randint(0, 3) for tt in activity_names}
+        rows.append((task, rng.choice(problem.resource_pools[task.task_type]), occurrences))
+    return rows
+
+
+def sklearn_encode(model, rows):
+    data = pandas.DataFrame([{**o, 'Activity': task.task_type, 'Resource': resource, **task.data} for (task, resource, o) in rows])
+    return np.concatenate(model._transform_data(data), axis=1).astype(np.float32)
+
+
+def duration(encode, rows, repeats=20):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        encode(rows)
+    return (time.perf_counter() - start) / repeats
+
+
+if __name__ == "__main__":
+    sys.path.append('src/simulator')
+    model_file = sys.argv[1] if len(sys.argv) > 1 else 'prediction_model_HELPDESK_TESTIN2.pkl'
+    problem_file = sys.argv[2] if len(sys.argv) > 2 else 'bpo-project/bpo/HELPDESK_Problem_TESTIN2.pickle'
+    with open(model_file, 'rb') as file:
+        model = pickle.load(file)
+    problem = MinedProblem.from_file(problem_file)
+    encoder = model.feature_encoder()
+
+    rows = random_rows(model, problem, 2000)
+    print("encoder matches sklearn bit for bit:", np.array_equal(sklearn_encode(model, rows), encoder.encode(rows)))
+
+    print(f"{'batch':>6} {'sklearn ms':>11} {'encoder ms':>11} {'speedup':>8}")
+    for batch_size in [1, 10, 50, 100, 500, 1000]:
+        batch = rows[:batch_size]
+        sklearn_duration = duration(lambda r: sklearn_encode(model, r), batch)
+        encoder_duration = duration(encoder.encode, batch)
+        print(f"{batch_size:>6} {sklearn_duration * 1000:>11.3f} {encoder_duration * 1000:>11.3f} {sklearn_duration / encoder_duration:>8.0f}")
@@ -0,0 +1,95 @@
+import random
+import sys
+import time
+
+import numpy as np
+import scipy.optimize
+
+from hungarian_policy import HungarianMultiObjectivePolicy
+from simulator.problems import Task
+
+"""
+Benchmarks the assignment of HungarianMultiObjectivePolicy per backlog size: building the dense cost matrix in a Python
+loop over the (task, resource) pairs, as the policy did before, against encoding only the pairs of the resource pools
+and building the costs with NumPy, and solving the dense matrix or the sparse matrix. Checks that all three reach the
+same objective, the total cost of the assignments and the postponements, and reports the time of an allocation.
+Run from the repository root with:
+    python src/benchmark_hungarian_assignment.py [resources] [task types] [pool size]
+"""
+
+
+def instance(nr_tasks, nr_resources, nr_task_types, pool_size, seed=0):
+    rng = random.Random(seed)
+    resources = ['R' + str(i) for i in range(nr_resources)]
+    resource_pool = {'T' + str(i): rng.sample(resources, pool_size) for i in range(nr_task_types)}
+    tasks = [Task(i, i, rng.choice(list(resource_pool))) for i in range(nr_tasks)]
+    trd = {(task, resource): rng.uniform(0.1, 2.0) for task in tasks for resource in resource_pool[task.task_type]}
+    task_costs = {task: float(np.mean([trd[(task, resource)] for resource in resource_pool[task.task_type]])) for task in tasks}
+    available_resources = set(rng.sample(resources, nr_resources // 2))
+    working_resources = {resource: (0.0, rng.uniform(0, 2)) for resource in resources if resource not in available_resources}
+    return set(tasks), available_resources, resource_pool, trd, task_costs, working_resources
+
+
+def loop_allocate(policy, unassigned_tasks, available_resources, resource_pool, trd,
+                  occupations, fairness, task_costs, working_resources, current_time):
+    relevant_resources = set(available_resources) | set(working_resources)
+    trd = policy.prune_trd(trd, unassigned_tasks, relevant_resources)
+    task_data, task_encoding, resource_encoding = policy.get_task_data_from_trd(trd)
+    task_costs = policy.factor_task_costs(task_costs)
+    swaped_tasks_dict = {v: k for k, v in task_encoding.items()}
+    swaped_resources_dict = {v: k for k, v in resource_encoding.items()}
+    task_np = np.full((len(swaped_tasks_dict), len(swaped_resources_dict) + len(swaped_tasks_dict)), np.inf, dtype=np.double)
+    for x, y, v in task_data:
+        resource = swaped_resources_dict[y]
+        task = swaped_tasks_dict[x]
+        if resource not in resource_pool[task.task_type]:
+            continue
+        if resource in working_resources:
+            start_time = max(0, working_resources[resource][0] - current_time + working_resources[resource][1]) * 3600
+        else:
+            start_time = 0
+        cost_1 = policy.alpha * (v + start_time)
+        cost_2 = policy.beta * occupations[resource] if resource in occupations else 0
+        cost_3 = policy.gamma * fairness[resource] if resource in fairness else 0
+        task_np[x, y] = cost_1 + cost_2 + cost_3
+    for y in range(len(swaped_resources_dict), len(swaped_resources_dict) + len(swaped_tasks_dict)):
+        x = y - len(swaped_resources_dict)
+        task_np[x, y] = policy.delta * task_costs[swaped_tasks_dict[x]]
+    task_ind, resource_ind = scipy.optimize.linear_sum_assignment(task_np)
+    selected = [(swaped_tasks_dict[t], swaped_resources_dict[r]) for t, r in zip(task_ind, resource_ind) if r in swaped_resources_dict]
+    return policy.prune_invalid_assignments(selected, available_resources, resource_pool, unassigned_tasks)
+
+
+def objective(assignments, unassigned_tasks, trd, task_costs, working_resources, delta):
+    cost = 0.0
+    for task, resource in assignments:
+        start_time = max(0, working_resources[resource][1]) * 3600 if resource in working_resources else 0
+        cost += int(trd[(task, resource)] * 3600) + start_time
+    assigned = {task for task, resource in assignments}
+    return cost + sum(delta * int(task_costs[task] * 3600) for task in unassigned_tasks if task not in assigned)
+
+
+def allocate(allocator, policy, problem):
+    tasks, available_resources, resource_pool, trd, task_costs, working_resources = problem
+    start = time.perf_counter()
+    assignments = allocator(policy, tasks, available_resources, resource_pool, trd, {}, {}, dict(task_costs),
+                            working_resources, 0.0)
+    return time.perf_counter() - start, objective(assignments, tasks, trd, task_costs, working_resources, policy.delta)
+
+
+if __name__ == "__main__":
+    sys.path.append('src/simulator')
+    nr_resources = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    nr_task_types = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    pool_size = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    policy = HungarianMultiObjectivePolicy(1, 0, 0, 1.5)
+    dense, sparse = HungarianMultiObjectivePolicy(1, 0, 0, 1.5, sparse=False), HungarianMultiObjectivePolicy(1, 0, 0, 1.5, sparse=True)
+
+    print(f"{'tasks':>6} {'loop+dense s':>13} {'dense s':>8} {'sparse s':>9} {'same objective':>15}")
+    for nr_tasks in [10, 50, 100, 500, 1000, 2000, 5000]:
+        problem = instance(nr_tasks, nr_resources, nr_task_types, pool_size)
+        loop_time, loop_objective = allocate(loop_allocate, policy, problem)
+        dense_time, dense_objective = allocate(HungarianMultiObjectivePolicy.allocate, dense, problem)
+        sparse_time, sparse_objective = allocate(HungarianMultiObjectivePolicy.allocate, sparse, problem)
+        same = np.isclose(loop_objective, dense_objective) and np.isclose(loop_objective, sparse_objective)
+        print(f"{nr_tasks:>6} {loop_time:>13.4f} {dense_time:>8.4f} {sparse_time:>9.4f} {str(same):>15}")
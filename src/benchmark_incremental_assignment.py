@@ -0,0 +1,161 @@
+import random
+import sys
+import time
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from benchmark_hungarian_assignment import instance, objective
+from hungarian_policy import HungarianMultiObjectivePolicy
+from incremental_assignment import IncrementalAssignment
+from simulator.problems import Task
+
+"""
+Benchmarks the assignment of HungarianMultiObjectivePolicy for a sequence of consecutive allocation problems, in which
+a few tasks leave and arrive, and a few resources become available or busy, between problems: solving every problem
+from scratch on the dense or the sparse matrix, against repairing the assignment of the previous problem with an
+IncrementalAssignment, as the policy does with incremental=True. Reports the mean time of an allocation per backlog
+size, which includes encoding the predictions of all pairs, the mean time of solving the encoded problem only, and the mean
+number of augmenting paths per incremental solve. Fails if the total cost of the sparse or the incremental solution of a
+problem differs from that of the dense solution, or if the cost of an IncrementalAssignment differs from that of
+scipy.optimize.linear_sum_assignment for random sequences of edits, which are checked first. Run from the repository root with:
+    python src/benchmark_incremental_assignment.py [resources] [task types] [pool size] [problems] [changes]
+"""
+
+
+def problems(nr_tasks, nr_resources, nr_task_types, pool_size, nr_problems, nr_changes, seed=0):
+    rng = random.Random(seed)
+    tasks, available_resources, resource_pool, trd, task_costs, working_resources = instance(
+        nr_tasks, nr_resources, nr_task_types, pool_size, seed)
+    next_id = nr_tasks
+    for _ in range(nr_problems):
+        yield set(tasks), set(available_resources), resource_pool, trd, task_costs, dict(working_resources)
+        for task in rng.sample(sorted(tasks, key=lambda task: task.id), min(nr_changes, len(tasks))):
+            tasks.remove(task)
+        for _ in range(nr_changes):
+            task = Task(next_id, next_id, rng.choice(list(resource_pool)))
+            next_id += 1
+            tasks.add(task)
+            for resource in resource_pool[task.task_type]:
+                trd[(task, resource)] = rng.uniform(0.1, 2.0)
+            task_costs[task] = float(np.mean([trd[(task, resource)] for resource in resource_pool[task.task_type]]))
+        resource = rng.choice(sorted(available_resources | set(working_resources)))
+        if resource in available_resources:
+            available_resources.remove(resource)
+            working_resources[resource] = (0.0, rng.uniform(0, 2))
+        else:
+            del working_resources[resource]
+            available_resources.add(resource)
+
+
+def check_random_edits(nr_sequences=300, nr_problems=20, seed=0):
+    """
+    Asserts that the cost of the assignment of an IncrementalAssignment equals that of linear_sum_assignment for random
+    sequences of problems, in which rows and columns are added and removed, and the costs of edges and the offsets
+    of columns change, between problems. Every row has an edge to a column of its own, like the dummy column of a task.
+    Half of the sequences have small integer costs, which have many ties.
+    """
+    rng = random.Random(seed)
+    for sequence in range(nr_sequences):
+        cost = (lambda: rng.randint(0, 4)) if sequence % 2 else (lambda: rng.uniform(0, 4))
+        assignment = IncrementalAssignment()
+        offsets = {column: cost() for column in range(rng.randint(1, 8))}
+        edges = dict()
+        next_row, next_column = 0, len(offsets)
+        for _ in range(nr_problems):
+            for _ in range(rng.randint(1, 3)):
+                edit = rng.randrange(6)
+                if edit == 0 or not edges:
+                    edges[next_row] = {column: cost() for column in rng.sample(sorted(offsets), rng.randint(0, len(offsets)))}
+                    next_row += 1
+                elif edit == 1:
+                    del edges[rng.choice(sorted(edges))]
+                elif edit == 2:
+                    row = rng.choice(sorted(edges))
+                    edges[row] = {column: cost() for column in rng.sample(sorted(offsets), rng.randint(0, len(offsets)))}
+                elif edit == 3 and offsets:
+                    offsets[rng.choice(sorted(offsets))] = cost()
+                elif edit == 4:
+                    offsets[next_column] = cost()
+                    next_column += 1
+                elif offsets:
+                    column = rng.choice(sorted(offsets))
+                    del offsets[column]
+                    edges = {row: {c: d for c, d in row_edges.items() if c != column} for row, row_edges in edges.items()}
+
+            problem_edges = {row: {**row_edges, ('own', row): 10} for row, row_edges in edges.items()}
+            problem_offsets = {**offsets, **{('own', row): 0 for row in edges}}
+            solution = assignment.solve({row: dict(row_edges) for row, row_edges in problem_edges.items()}, problem_offsets)
+            assert sorted(solution) == sorted(problem_edges) and len(set(solution.values())) == len(solution)
+            incremental_cost = sum(problem_edges[row][column] + problem_offsets[column] for row, column in solution.items())
+
+            rows, columns = sorted(problem_edges), list(problem_offsets)
+            matrix = np.full((len(rows), len(columns)), np.inf)
+            for i, row in enumerate(rows):
+                for j, column in enumerate(columns):
+                    if column in problem_edges[row]:
+                        matrix[i, j] = problem_edges[row][column] + problem_offsets[column]
+            row_ind, column_ind = linear_sum_assignment(matrix)
+            assert np.isclose(incremental_cost, matrix[row_ind, column_ind].sum()), \
+                f"sequence {sequence}: incremental cost {incremental_cost} != {matrix[row_ind, column_ind].sum()}"
+    return nr_sequences * nr_problems
+
+
+def solve_times(policy, assignment, problem):
+    # the time of solving the encoded problem only, and the total cost of each solution
+    tasks, available_resources, resource_pool, trd, task_costs, working_resources = problem
+    relevant_resources = available_resources | set(working_resources)
+    rows, columns, durations, encoded_tasks, resources = policy.encode_trd(trd, tasks, relevant_resources, resource_pool)
+    costs = policy.get_costs(columns, durations, resources, {}, {}, working_resources, 0.0)
+    resource_costs = policy.get_resource_costs(resources, {}, {}, working_resources, 0.0)
+    factored_costs = policy.factor_task_costs(dict(task_costs))
+    dummy_costs = np.array([policy.delta * factored_costs[task] for task in encoded_tasks], dtype=np.double)
+    cost_matrix = {(row, column): cost for row, column, cost in zip(rows.tolist(), columns.tolist(), costs.tolist())}
+    results = []
+    for solve in [lambda: policy.solve_dense(rows, columns, costs, dummy_costs, len(encoded_tasks), len(resources)),
+                  lambda: policy.solve_sparse(rows, columns, costs, dummy_costs, len(encoded_tasks), len(resources)),
+                  lambda: policy.solve_incremental(assignment, rows, columns, policy.alpha*durations, dummy_costs,
+                                                   resource_costs, encoded_tasks, resources)]:
+        start = time.perf_counter()
+        task_ind, resource_ind = solve()
+        results.append((time.perf_counter() - start,
+                        sum(cost_matrix[task, resource] if resource < len(resources) else dummy_costs[task]
+                            for task, resource in zip(task_ind.tolist(), resource_ind.tolist()))))
+    return results
+
+
+if __name__ == "__main__":
+    sys.path.append('src/simulator')
+    print(check_random_edits(), 'problems of random edits have the cost of linear_sum_assignment')
+    nr_resources = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    nr_task_types = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    pool_size = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    nr_problems = int(sys.argv[4]) if len(sys.argv) > 4 else 20
+    nr_changes = int(sys.argv[5]) if len(sys.argv) > 5 else 2
+
+    print(f"{'tasks':>6} {'dense ms':>9} {'sparse ms':>10} {'incremental ms':>15} {'dense solve ms':>15} {'sparse solve ms':>16} "
+          f"{'incremental solve ms':>21} {'augmentations':>14}")
+    for nr_tasks in [10, 50, 100, 500, 1000, 2000]:
+        policies = [HungarianMultiObjectivePolicy(1, 0, 0, 1.5, sparse=False), HungarianMultiObjectivePolicy(1, 0, 0, 1.5, sparse=True),
+                    HungarianMultiObjectivePolicy(1, 0, 0, 1.5, incremental=True)]
+        assignment = IncrementalAssignment()
+        times, solves = [[] for _ in policies], []
+        first_augmentations = 0
+        for i, problem in enumerate(problems(nr_tasks, nr_resources, nr_task_types, pool_size, nr_problems, nr_changes)):
+            tasks, available_resources, resource_pool, trd, task_costs, working_resources = problem
+            for policy, policy_times in zip(policies, times):
+                start = time.perf_counter()
+                policy.allocate(tasks, available_resources, resource_pool, trd, {}, {}, dict(task_costs), working_resources, 0.0)
+                policy_times.append(time.perf_counter() - start)
+            solves.append(solve_times(policies[0], assignment, problem))
+            if i == 0:
+                first_augmentations = assignment.augmentations
+        # the first problem is solved from scratch by every policy
+        dense, sparse, incremental = [np.mean(policy_times[1:]) * 1000 for policy_times in times]
+        dense_solve, sparse_solve, incremental_solve = [np.mean([solve[j][0] for solve in solves[1:]]) * 1000 for j in range(3)]
+        augmentations = (assignment.augmentations - first_augmentations) / (nr_problems - 1)
+        for solve in solves:
+            assert np.isclose(solve[0][1], solve[1][1]), f"sparse cost {solve[1][1]} != dense cost {solve[0][1]}"
+            assert np.isclose(solve[0][1], solve[2][1]), f"incremental cost {solve[2][1]} != dense cost {solve[0][1]}"
+        print(f"{nr_tasks:>6} {dense:>9.2f} {sparse:>10.2f} {incremental:>15.2f} {dense_solve:>15.2f} {sparse_solve:>16.2f} "
+              f"{incremental_solve:>21.2f} {augmentations:>14.1f}")
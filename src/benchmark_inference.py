@@ -0,0 +1,43 @@
+import pickle
+import sys
+import time
+
+import numpy as np
+
+"""
+Benchmarks the inference backends of a trained ExecutionTimeModel: calling the Keras model against the forward pass
+over its weights frozen into NumPy arrays. Checks that both backends predict the same durations and reports the
+latency of a prediction per batch size. Run from the repository root with:
+    python src/benchmark_inference.py [prediction model file]
+"""
+
+
+def latency(model, x, repeats):
+    model._forward(x)  # warm up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model._forward(x)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+if __name__ == "__main__":
+    sys.path.append('src')
+    model_file = sys.argv[1] if len(sys.argv) > 1 else 'prediction_model_HELPDESK_TESTIN2.pkl'
+    with open(model_file, 'rb') as file:
+        model = pickle.load(file)
+    input_dim = model.numpy_network()[0][0].shape[0]
+    rng = np.random.default_rng(0)
+
+    print(f"{'batch':>6} {'max |keras - numpy|':>20} {'keras ms':>9} {'numpy ms':>9} {'speedup':>8}")
+    for batch_size in [1, 10, 50, 100, 250, 500, 1000]:
+        x = rng.random((batch_size, input_dim))
+        model.use_backend('keras')
+        keras_y = np.asarray(model._forward(x))
+        keras_latency = latency(model, x, 50)
+        model.use_backend('numpy')
+        numpy_y = model._forward(x)
+        numpy_latency = latency(model, x, 50)
+        difference = np.max(np.abs(keras_y - numpy_y))
+        print(f"{batch_size:>6} {difference:>20.2e} {keras_latency * 1000:>9.3f} {numpy_latency * 1000:>9.3f} {keras_latency / numpy_latency:>8.0f}")
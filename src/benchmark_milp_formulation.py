@@ -0,0 +1,99 @@
+import os
+import pickle
+import sys
+import time
+
+from ortools.sat.python import cp_model
+
+from ilp_policy_non_assign_2 import UnrelatedMachinesSchedulingNonAssign2, UnrelatedParallelMachinesSchedulingNonAssignPolicy2
+from planner import Planner
+from russel_policies import RandomPolicy
+from simulator.simulator import Simulator, Reporter
+from test import load_artifacts
+
+"""
+Benchmarks the product formulation of UnrelatedMachinesSchedulingNonAssign2, in which the processing time of an
+assignment and the cost of not assigning a task are products of a boolean variable and a constant variable, against
+its linear formulation, in which they are coefficients of the boolean variables. Replays the planning instances that
+UnrelatedParallelMachinesSchedulingNonAssignPolicy2 solves in a simulation of a problem through both, with the time
+limit of the policy, and reports the number of optimal solves, the build and solve time, and the objective per
+instance size, in (task, resource) pairs. The instances are recorded to the instances file the first time, and replayed
+from it after that. Run from the repository root with:
+    python src/benchmark_milp_formulation.py [instances file] [problem] [days] [workers]
+"""
+
+
+class RecordingPolicy(UnrelatedParallelMachinesSchedulingNonAssignPolicy2):
+    """
+    Records the encoded task data, non assign costs, and machine starts of every model that the policy solves.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.instances = []
+
+    def solve(self, trd, task_costs, machines_start, current_time=None):
+        task_data, task_encoding, resource_encoding = self.get_task_data_from_trd(trd)
+        self.instances.append((task_data,
+                               {task_encoding[task]: cost for task, cost in task_costs.items() if task in task_encoding},
+                               {resource_enc: machines_start[resource] for resource, resource_enc in resource_encoding.items()}))
+        return super().solve(trd, task_costs, machines_start, current_time)
+
+
+def record(problem_name, days):
+    prediction_model, problem = load_artifacts(problem_name)
+    policy = RecordingPolicy(1, 0, 0, 1.5, 'fastest')
+    planner = Planner(prediction_model, RandomPolicy(), 0, policy, list(problem.resource_pools.keys()),
+                      predict_multiple=True, hour_timeout=3600)
+    Simulator(problem, Reporter(), planner).simulate(24 * days)
+    return policy.instances
+
+
+def solve(instance, linear, time_limit, num_workers):
+    task_data, non_assign_cost, machines_start = instance
+    start = time.perf_counter()
+    model = UnrelatedMachinesSchedulingNonAssign2(task_data, non_assign_cost, machines_start, 1.5, linear=linear)
+    build_time = time.perf_counter() - start
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    if num_workers is not None:
+        solver.parameters.num_workers = num_workers
+    status = solver.Solve(model.model)
+    objective = round(solver.ObjectiveValue()) if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else None
+    return status, build_time, solver.WallTime(), objective
+
+
+if __name__ == "__main__":
+    sys.path.append('src/simulator')
+    instances_file = sys.argv[1] if len(sys.argv) > 1 else 'milp_instances_Helpdesk.pkl'
+    problem_name = sys.argv[2] if len(sys.argv) > 2 else 'Helpdesk'
+    days = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    num_workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    time_limit = UnrelatedParallelMachinesSchedulingNonAssignPolicy2(1, 0, 0, 1.5, 'fastest').time_limit
+
+    if os.path.exists(instances_file):
+        with open(instances_file, 'rb') as file:
+            instances = pickle.load(file)
+    else:
+        instances = record(problem_name, days)
+        with open(instances_file, 'wb') as file:
+            pickle.dump(instances, file)
+    print("instances:", len(instances))
+
+    sizes = [(1, 10), (11, 50), (51, 200), (201, 1000), (1001, None)]
+    print(f"{'pairs':>10} {'instances':>10} {'product optimal':>16} {'linear optimal':>15} {'product build s':>16} {'linear build s':>15} "
+          f"{'product solve s':>16} {'linear solve s':>15} {'linear better':>14} {'same':>5} {'linear worse':>13}")
+    for lower, upper in sizes:
+        selected = [instance for instance in instances if lower <= len(instance[0]) and (upper is None or len(instance[0]) <= upper)]
+        if not selected:
+            continue
+        product = [solve(instance, False, time_limit, num_workers) for instance in selected]
+        linear = [solve(instance, True, time_limit, num_workers) for instance in selected]
+        comparisons = [(p[3], l[3]) for p, l in zip(product, linear)]
+        better = sum(1 for p, l in comparisons if l is not None and (p is None or l < p))
+        same = sum(1 for p, l in comparisons if l == p)
+        worse = len(comparisons) - better - same
+        label = f"{lower}-{upper}" if upper else f">{lower - 1}"
+        print(f"{label:>10} {len(selected):>10} {sum(1 for r in product if r[0] == cp_model.OPTIMAL):>16} "
+              f"{sum(1 for r in linear if r[0] == cp_model.OPTIMAL):>15} {sum(r[1] for r in product):>16.3f} "
+              f"{sum(r[1] for r in linear):>15.3f} {sum(r[2] for r in product):>16.3f} {sum(r[2] for r in linear):>15.3f} "
+              f"{better:>14} {same:>5} {worse:>13}")
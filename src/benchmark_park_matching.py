@@ -0,0 +1,76 @@
+import random
+import sys
+import time
+
+from ortools.graph.python import min_cost_flow
+
+from park_policy import ParkPolicy
+
+"""
+Benchmarks the min cost flow matching of ParkPolicy per backlog size: building the network arc by arc from lists that
+are concatenated per arc, and reading the flow of every arc back one at a time, as the policy did before, against
+building it from NumPy arrays with the bulk calls of OR-Tools and reading the flows back in one call, as do_matching
+does. Checks that both reach the same cost, and reports the time of a matching. Run from the repository root with:
+    python src/benchmark_park_matching.py [resources] [pool size]
+"""
+
+
+def task_data(nr_tasks, nr_resources, pool_size, seed=0):
+    rng = random.Random(seed)
+    return [(task_ix, resource_ix, int(rng.uniform(0.1, 2.0) * 3600))
+            for task_ix in range(nr_tasks) for resource_ix in rng.sample(range(nr_resources), pool_size)]
+
+
+def loop_matching(relevant_task_data, num_tasks, num_resources):
+    start_nodes = [0 for i in range(num_resources)]
+    end_nodes = [i+1 for i in range(num_resources)]
+    capacities = [1 for i in range(num_resources)]
+    costs = [0 for i in range(num_resources)]
+    for task_ix, resource_ix, d in relevant_task_data:
+        start_nodes += [resource_ix+1]
+        end_nodes += [num_resources+1+task_ix]
+        capacities += [1]
+        costs += [d]
+    start_nodes += [num_resources+1+task_ix for task_ix in range(num_tasks)]
+    end_nodes += [num_tasks+num_resources+1 for task_ix in range(num_tasks)]
+    capacities += [1 for i in range(num_tasks)]
+    costs += [0 for i in range(num_tasks)]
+    supplies = [min(num_tasks, num_resources)] + [0 for i in range(num_tasks + num_resources)] + [-min(num_tasks, num_resources)]
+
+    smcf = min_cost_flow.SimpleMinCostFlow()
+    for i in range(len(start_nodes)):
+        smcf.add_arc_with_capacity_and_unit_cost(start_nodes[i], end_nodes[i], capacities[i], costs[i])
+    for i in range(len(supplies)):
+        smcf.set_node_supply(i, supplies[i])
+    smcf.solve_max_flow_with_min_cost()
+    selected = []
+    for arc in range(smcf.num_arcs()):
+        if smcf.tail(arc) != 0 and smcf.head(arc) != num_tasks+num_resources+1:
+            if smcf.flow(arc) > 0:
+                selected.append((smcf.head(arc) - num_resources - 1, smcf.tail(arc) - 1))
+    return smcf.optimal_cost(), selected
+
+
+def array_matching(policy, relevant_task_data, num_tasks, num_resources):
+    smcf, status = policy.do_matching(relevant_task_data, num_tasks, num_resources)
+    flows = smcf.flows(list(range(num_resources, num_resources + len(relevant_task_data))))
+    selected = [(task_ix, resource_ix) for (task_ix, resource_ix, d), flow in zip(relevant_task_data, flows.tolist()) if flow > 0]
+    return smcf.optimal_cost(), selected
+
+
+if __name__ == "__main__":
+    sys.path.append('src/simulator')
+    nr_resources = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    pool_size = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    policy = ParkPolicy(dict(), None, dict())
+
+    print(f"{'tasks':>6} {'arcs':>8} {'loop ms':>9} {'arrays ms':>10} {'same cost':>10}")
+    for nr_tasks in [10, 50, 100, 500, 1000, 2000, 5000]:
+        data = task_data(nr_tasks, nr_resources, pool_size)
+        start = time.perf_counter()
+        loop_cost, _ = loop_matching(data, nr_tasks, nr_resources)
+        loop_time = time.perf_counter() - start
+        start = time.perf_counter()
+        array_cost, _ = array_matching(policy, data, nr_tasks, nr_resources)
+        array_time = time.perf_counter() - start
+        print(f"{nr_tasks:>6} {len(data):>8} {loop_time * 1000:>9.2f} {array_time * 1000:>10.2f} {str(loop_cost == array_cost):>10}")
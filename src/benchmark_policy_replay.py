@@ -0,0 +1,63 @@
+import sys
+import time
+
+import numpy as np
+
+from park_policy import ParkPolicy
+from planning_corpus import PlanningCorpus
+from task_execution_time import TaskExecutionPrediction
+from test import create_policy, load_artifacts
+
+"""
+Benchmarks allocation policies on a corpus of planning instances that a planner captured during a simulation, see
+PlanningCorpus, by replaying every allocation call of the corpus through the allocate function of each policy, without
+simulating. Reports the latency percentiles of the calls, the number of assignments, and the objective of the
+assignments of each policy: the predicted hours of the assignments plus delta times the mean predicted hours of every
+task that is not assigned, summed over the calls, which is the objective of HungarianMultiObjectivePolicy without
+occupation and fairness. The policies are named as in test.py. Park predicts the next tasks of the cases, so it needs the
+problem of the corpus, of which the prediction model and the next task distribution are loaded. Run from the repository
+root with:
+    python src/benchmark_policy_replay.py <corpus file> [policies] [delta] [selection strategy] [problem]
+"""
+
+
+def replay_policy(name, corpus_file, delta, selection_strategy, problem_name):
+    if name == "Park":
+        prediction_model, problem = load_artifacts(problem_name)
+        predictor = TaskExecutionPrediction(prediction_model, predict_multiple_enabled=True)
+        policy = ParkPolicy(problem.next_task_distribution, predictor, dict())
+    else:
+        policy = create_policy(name, delta, selection_strategy)
+
+    latencies, nr_assignments, objective = [], 0, 0.0
+    for call in PlanningCorpus.read(corpus_file):
+        task_type_occurrences = call.pop('task_type_occurrences')
+        if name == "Park":
+            policy.task_type_occurrences = task_type_occurrences
+        trd, task_costs = dict(call['trd']), dict(call['task_costs'])
+        start = time.perf_counter()
+        assignments = policy.allocate(**call)
+        latencies.append(time.perf_counter() - start)
+
+        nr_assignments += len(assignments)
+        assigned = {task for task, resource in assignments}
+        objective += sum(trd.get(assignment, np.nan) for assignment in assignments)
+        objective += delta * sum(task_costs.get(task, np.nan) for task in call['unassigned_tasks'] if task not in assigned)
+    return latencies, nr_assignments, objective
+
+
+if __name__ == "__main__":
+    sys.path.append('src/simulator')
+    corpus_file = sys.argv[1]
+    policies = sys.argv[2].split(',') if len(sys.argv) > 2 else ['Hungarian', 'MILP']
+    delta = float(sys.argv[3]) if len(sys.argv) > 3 else 1.5
+    selection_strategy = sys.argv[4] if len(sys.argv) > 4 else 'fastest'
+    problem_name = sys.argv[5] if len(sys.argv) > 5 else None
+
+    print(f"{'policy':>14} {'calls':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'total s':>8} "
+          f"{'assignments':>12} {'objective h':>12}")
+    for name in policies:
+        latencies, nr_assignments, objective = replay_policy(name, corpus_file, delta, selection_strategy, problem_name)
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000
+        print(f"{name:>14} {len(latencies):>6} {p50:>8.2f} {p90:>8.2f} {p99:>8.2f} {max(latencies) * 1000:>8.2f} "
+              f"{sum(latencies):>8.2f} {nr_assignments:>12} {objective:>12.1f}")
@@ -0,0 +1,73 @@
+import random
+import sys
+import time
+
+import numpy as np
+import pandas
+import scipy.stats
+
+from simulator.problems import MinedProblem
+
+"""
+Benchmarks the compiled processing time sampler of a mined problem against sampling through sklearn.
+Checks that both predict the same means and that their samples come from the same distribution.
+Run from the repository root with:
+    python src/benchmark_processing_time_sampler.py [problem file]
+"""
+
+
+def random_features(problem, n, seed=0):
+    rng = random.Random(seed)
+    task_types = [tt for tt in problem.task_types if problem.resource_pools[tt]]
+    result = []
+    for _ in range(n):
+        task_type = rng.choice(task_types)
+        features = {tt: rng.randint(0, 3) for tt in problem.task_types}
+        features['Activity'] = task_type
+        features['Resource'] = rng.choice(problem.resource_pools[task_type])
+        for data_type, distribution in problem.data_types.items():
+            features[data_type] = distribution.sample()
+        result.append(features)
+    return result
+
+
+def sklearn_encode(distribution, features):
+    data = pandas.DataFrame(features, index=[1])
+    parts = []
+    if distribution._standardization_columns:
+        parts.append(distribution._standardizer.transform(data[distribution._standardization_columns]))
+    parts.append(distribution._normalizer.transform(data[distribution._rest_columns]))
+    parts.append(distribution._encoder.transform(data[distribution._onehot_columns]))
+    return np.concatenate(parts, axis=1)
+
+
+def throughput(sample, features, n):
+    start = time.perf_counter()
+    for i in range(n):
+        sample(features[i % len(features)])
+    return n / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    sys.path.append('src/simulator')
+    problem_file = sys.argv[1] if len(sys.argv) > 1 else 'bpo-project/bpo/HELPDESK_Problem_TESTIN2.pickle'
+    problem = MinedProblem.from_file(problem_file)
+    distribution = problem.processing_times
+    sampler = distribution.compile()
+    features = random_features(problem, 200)
+
+    max_difference = 0
+    for f in features:
+        values = tuple(f[column] for column in sampler._columns)
+        reference = distribution._regressor.predict(sklearn_encode(distribution, f))[0]
+        max_difference = max(max_difference, abs(reference - sampler.predict(values)))
+    print("max difference between sklearn and compiled mean prediction:", max_difference)
+
+    np.random.seed(0)
+    reference_samples = [distribution.sample_with_sklearn(features[0]) for _ in range(2000)]
+    compiled_samples = [distribution.sample(features[0]) for _ in range(2000)]
+    print("two-sample KS test of sklearn against compiled samples:", scipy.stats.ks_2samp(reference_samples, compiled_samples))
+
+    sklearn_rate = throughput(distribution.sample_with_sklearn, features, 1000)
+    compiled_rate = throughput(distribution.sample, features, 100000)
+    print(f"samples/s: sklearn {sklearn_rate:.0f}, compiled {compiled_rate:.0f}, speedup {compiled_rate / sklearn_rate:.0f}x")
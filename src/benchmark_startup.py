@@ -0,0 +1,38 @@
+import subprocess
+import sys
+
+"""
+Benchmarks the startup time of a simulation run of test.py per policy: the time to import test.py and load the
+artifacts that the policy needs. Compares loading lazily, where Keras is only imported when a model is trained or
+evaluated and the prediction model is only loaded for policies that use predictions, against loading eagerly,
+as before, where Keras was imported with task_execution_time and the prediction model was always loaded.
+Each measurement runs in a fresh interpreter. Run from the repository root with:
+    python src/benchmark_startup.py [problem]
+"""
+
+STARTUP = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, 'src')
+if {eager}:
+    import keras.models, keras.layers, keras.callbacks, sklearn.model_selection
+import test
+objective = '{objective}'
+test.load_artifacts('{problem}', {eager} or test.uses_predictions(objective))
+print(time.perf_counter() - start, 'tensorflow' in sys.modules)
+"""
+
+
+def startup(objective, problem, eager):
+    output = subprocess.run([sys.executable, '-c', STARTUP.format(objective=objective, problem=problem, eager=eager)],
+                            capture_output=True, text=True, check=True).stdout.split()
+    return float(output[-2]), output[-1] == 'True'
+
+
+if __name__ == "__main__":
+    problem = sys.argv[1] if len(sys.argv) > 1 else 'Helpdesk'
+    print(f"{'policy':>14} {'eager s':>8} {'lazy s':>8} {'saved s':>8} {'lazy imports tensorflow':>24}")
+    for objective in ['Random', 'RoundRobin', 'ShortestQueue', 'LLQP', 'Hungarian', 'MILP', 'KBatch', 'Park']:
+        eager, _ = startup(objective, problem, True)
+        lazy, tensorflow = startup(objective, problem, False)
+        print(f"{objective:>14} {eager:>8.2f} {lazy:>8.2f} {eager - lazy:>8.2f} {str(tensorflow):>24}")
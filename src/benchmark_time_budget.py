@@ -0,0 +1,53 @@
+import sys
+import time
+
+import numpy as np
+
+from cp_sat_session import AdaptiveTimeBudget
+from ilp_policy_non_assign_2 import UnrelatedParallelMachinesSchedulingNonAssignPolicy2
+from planning_corpus import PlanningCorpus
+
+"""
+Benchmarks the time limit of the CP-SAT solves of UnrelatedParallelMachinesSchedulingNonAssignPolicy2: the fixed time
+limit of the policy against an AdaptiveTimeBudget, without and with a budget per simulated hour, by replaying a corpus of
+planning instances, see PlanningCorpus, through the policy. Reports the wall time of the replay, the solves per status,
+in which BUDGET_SPENT is a call that fell back to the backup policy because the budget of its hour was spent, the number
+of calls that fell back, the largest wall time of the calls of a simulated hour, and the objective of the assignments,
+as in benchmark_policy_replay.py. Run from the repository root with:
+    python src/benchmark_time_budget.py <corpus file> [hour budgets] [delta] [selection strategy]
+"""
+
+
+def replay(budget, corpus_file, delta, selection_strategy):
+    policy = UnrelatedParallelMachinesSchedulingNonAssignPolicy2(1, 0, 0, delta, selection_strategy, budget=budget)
+    hour_seconds, objective = dict(), 0.0
+    for call in PlanningCorpus.read(corpus_file):
+        call.pop('task_type_occurrences')
+        trd, task_costs = dict(call['trd']), dict(call['task_costs'])
+        start = time.perf_counter()
+        assignments = policy.allocate(**call)
+        hour = int(call['current_time'])
+        hour_seconds[hour] = hour_seconds.get(hour, 0.0) + time.perf_counter() - start
+
+        assigned = {task for task, resource in assignments}
+        objective += sum(trd.get(assignment, np.nan) for assignment in assignments)
+        objective += delta * sum(task_costs.get(task, np.nan) for task in call['unassigned_tasks'] if task not in assigned)
+    return policy, hour_seconds, objective
+
+
+if __name__ == "__main__":
+    sys.path.append('src/simulator')
+    corpus_file = sys.argv[1]
+    hour_budgets = [float(budget) for budget in sys.argv[2].split(',')] if len(sys.argv) > 2 else [2.0, 0.5]
+    delta = float(sys.argv[3]) if len(sys.argv) > 3 else 1.5
+    selection_strategy = sys.argv[4] if len(sys.argv) > 4 else 'fastest'
+
+    print(f"{'time limit':>16} {'total s':>8} {'max hour s':>11} {'optimal':>8} {'feasible':>9} {'unknown':>8} "
+          f"{'budget spent':>13} {'fell back':>10} {'objective h':>12}")
+    for label, budget in [('fixed', None), ('adaptive', AdaptiveTimeBudget())] + \
+                         [(f'adaptive {hour_budget:g}s/h', AdaptiveTimeBudget(hour_budget=hour_budget)) for hour_budget in hour_budgets]:
+        policy, hour_seconds, objective = replay(budget, corpus_file, delta, selection_strategy)
+        solves = policy.session.stats()['solves']
+        print(f"{label:>16} {sum(hour_seconds.values()):>8.2f} {max(hour_seconds.values()):>11.2f} "
+              f"{solves.get('OPTIMAL', 0):>8} {solves.get('FEASIBLE', 0):>9} {solves.get('UNKNOWN', 0):>8} "
+              f"{solves.get('BUDGET_SPENT', 0):>13} {policy.no_solution:>10} {objective:>12.1f}")
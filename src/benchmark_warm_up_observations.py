@@ -0,0 +1,75 @@
+import random
+import sys
+import time
+import tracemalloc
+
+import pandas
+
+from simulator.problems import MinedProblem, Task
+from task_execution_time import ExecutionTimeModel, ObservationBuffer
+
+"""
+Benchmarks building the training set of a prediction model from the observations of a warm-up: recording each
+observation in a dict of (task, resource) to duration and generating a DataFrame from one dict of features per
+observation, as the planner did before, against appending each observation to an ObservationBuffer and building the
+DataFrame from its columns. Checks that both build the same DataFrame and reports the time and the peak memory of
+recording and building per number of observations. Run from the repository root with:
+    python src/benchmark_warm_up_observations.py [problem file]
+"""
+
+
+def observations(problem, n, seed=0):
+    rng = random.Random(seed)
+    task_types = [tt for tt in problem.task_types if problem.resource_pools[tt]]
+    activity_names = list(problem.resource_pools.keys())
+    task_type_occurrences = dict()
+    result = []
+    for i in range(n):
+        case_id = i // 5
+        if case_id not in task_type_occurrences:
+            task_type_occurrences[case_id] = {tt: rng.randint(0, 3) for tt in activity_names}
+            data = {data_type: distribution.sample() for data_type, distribution in problem.data_types.items()}
+        task = Task(i, case_id, rng.choice(task_types))
+        task.data = data
+        result.append((task, rng.choice(problem.resource_pools[task.task_type]), rng.random()))
+    return result, task_type_occurrences
+
+
+def with_dicts(model, recorded, task_type_occurrences):
+    task_resource_duration = dict()
+    for task, resource, duration in recorded:
+        task_resource_duration[(task, resource)] = duration
+    return model._generate_train_df(task_resource_duration, task_type_occurrences)
+
+
+def with_buffer(activity_names, recorded, task_type_occurrences):
+    buffer = ObservationBuffer(activity_names)
+    for task, resource, duration in recorded:
+        buffer.append(task_type_occurrences[task.case_id], task, resource, duration)
+    return buffer.frame()
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = build()
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return df, duration, peak
+
+
+if __name__ == "__main__":
+    sys.path.append('src/simulator')
+    problem_file = sys.argv[1] if len(sys.argv) > 1 else 'src/simulator/data/BPI Challenge 2017 - instance.pickle'
+    problem = MinedProblem.from_file(problem_file)
+    model = ExecutionTimeModel.from_problem(problem)
+    activity_names = list(problem.resource_pools.keys())
+
+    print(f"{'observations':>13} {'dicts s':>8} {'buffer s':>9} {'dicts MB':>9} {'buffer MB':>10} {'equal':>6}")
+    for n in [10000, 100000, 300000]:
+        recorded, task_type_occurrences = observations(problem, n)
+        dicts_df, dicts_duration, dicts_peak = measure(lambda: with_dicts(model, recorded, task_type_occurrences))
+        buffer_df, buffer_duration, buffer_peak = measure(lambda: with_buffer(activity_names, recorded, task_type_occurrences))
+        equal = dicts_df[buffer_df.columns].astype(buffer_df.dtypes).equals(buffer_df)
+        print(f"{n:>13} {dicts_duration:>8.2f} {buffer_duration:>9.2f} {dicts_peak / 2**20:>9.1f} {buffer_peak / 2**20:>10.1f} {str(equal):>6}")
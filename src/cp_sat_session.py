@@ -0,0 +1,191 @@
+import logging
+import threading
+import time
+import numpy as np
+from ortools.sat.python import cp_model
+
+
+class AdaptiveTimeBudget:
+    """
+    Sets the time limit of each CP-SAT solve of a policy, instead of a fixed time limit. A solve gets the time that recent
+    solves of a similar size, with between half and twice as many (task, resource) pairs, needed to reach a solution within
+    target_gap of the best bound, multiplied by safety, between minimum and maximum. The time that a solve needed is
+    read from the objective and the bound at each solution, which a solution callback records. A solve that ended at its
+    time limit without reaching target_gap needed at least twice its time limit. Without similar solves, a solve gets
+    maximum. The solves of a simulated hour together get at most hour_budget seconds, so that a run keeps up with
+    the hour_timeout of the planner. The budget may be shared by the sessions of the components of a problem that are
+    solved in parallel. When the budget of the hour is spent, the model is not solved, and the policy falls
+    back to its backup policy. A solve that ends at its time limit with a solution, the best incumbent, is used.
+
+    :param maximum: the largest time limit in seconds, which is also the time limit without similar solves.
+    :param minimum: the smallest time limit in seconds.
+    :param hour_budget: the seconds that the solves of a simulated hour may take together, or None for no limit.
+    :param target_gap: the relative gap between the objective and the best bound at which a solution is good enough.
+    :param safety: the factor with which the time that similar solves needed is multiplied.
+    :param history: the number of recent solves of which the needed time is kept.
+    """
+    def __init__(self, maximum=2.0, minimum=0.05, hour_budget=None, target_gap=0.01, safety=1.5, history=50):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.hour_budget = hour_budget
+        self.target_gap = target_gap
+        self.safety = safety
+        self.history = history
+        self.needed = []  # (size, seconds) of the recent solves
+        self.hour, self.hour_spent = None, 0.0
+        self.lock = threading.Lock()
+
+    def time_limit(self, size, current_time):
+        """
+        Returns the time limit of a solve of a problem of size (task, resource) pairs at the simulated current_time,
+        or None if the budget of the hour is spent.
+        """
+        with self.lock:
+            similar = [seconds for solve_size, seconds in self.needed if size / 2 <= solve_size <= size * 2]
+            if similar:
+                limit = min(max(self.safety * np.percentile(similar, 90), self.minimum), self.maximum)
+            else:
+                limit = self.maximum
+            if self.hour_budget is not None:
+                if self.hour != int(current_time):
+                    self.hour, self.hour_spent = int(current_time), 0.0
+                remaining = self.hour_budget - self.hour_spent
+                if remaining < self.minimum:
+                    return None
+                limit = min(limit, remaining)
+            return limit
+
+    def record(self, size, time_limit, status, curve, seconds):
+        """
+        Records a solve of a problem of size pairs with time_limit, its status, its curve, the list of (seconds, gap) at
+        each solution, and the seconds that it took.
+        """
+        reached = [t for t, gap in curve if gap <= self.target_gap]
+        if reached:
+            needed = reached[0]
+        elif status == cp_model.OPTIMAL or status == cp_model.INFEASIBLE:
+            needed = seconds
+        else:
+            needed = 2 * time_limit
+        with self.lock:
+            self.needed = (self.needed + [(size, needed)])[-self.history:]
+            self.hour_spent += seconds
+
+
+class GapCurve(cp_model.CpSolverSolutionCallback):
+    """
+    Records the wall time and the relative gap between the objective and the best bound at each solution of a solve.
+    """
+    def __init__(self):
+        super().__init__()
+        self.curve = []
+
+    def on_solution_callback(self):
+        objective = self.ObjectiveValue()
+        gap = abs(objective - self.BestObjectiveBound()) / max(1.0, abs(objective))
+        self.curve.append((self.WallTime(), gap))
+
+
+class CpSatSession:
+    """
+    Solves the CP-SAT models of consecutive allocation problems, which differ by a few tasks. Keeps the values of
+    the decision variables of the solutions, keyed by what they decide instead of by their index in a model, e.g. by
+    the (task, resource) pair of an assignment variable, and hints them to the next solve of a variable with the same
+    key. Records the build time, the solve time, and the hint acceptance of every solve, which is the share of the hinted
+    variables that have their hinted value in the solution.
+
+    :param time_limit: the time limit of a solve in seconds.
+    :param num_workers: the number of parallel search workers of CP-SAT, or None for the default of CP-SAT,
+        which is one worker per core.
+    :param hint: whether to hint the values of the previous solutions.
+    :param logging: whether to log the search progress to log.txt.
+    :param budget: an :class:`AdaptiveTimeBudget` that sets the time limit of each solve instead of time_limit, if any.
+    """
+    # the maximum number of variable values that are kept, beyond which the values of earlier solves are dropped
+    MAX_SOLUTION_SIZE = 100000
+
+    def __init__(self, time_limit, num_workers=None, hint=True, logging=False, budget=None):
+        self.time_limit = time_limit
+        self.num_workers = num_workers
+        self.hint = hint
+        self.logging = logging
+        self.budget = budget
+        self.solution = dict()
+        self.calls = []
+
+    def add_hints(self, model, variables):
+        """
+        Replaces the hints of the model by the values of the previous solutions of the variables, a dict of key to
+        variable, that have one.
+
+        :return: a dict of key to hinted value.
+        """
+        model.ClearHints()
+        hints = dict()
+        if self.hint:
+            for key, variable in variables.items():
+                if key in self.solution:
+                    model.AddHint(variable, self.solution[key])
+                    hints[key] = self.solution[key]
+        return hints
+
+    def solve(self, model, variables, build_time, hints=None, size=None, current_time=None):
+        """
+        Solves the model and keeps the values of the variables, a dict of key to variable, in the solution.
+        With a budget, the model is not solved when the budget of the hour is spent, and the status is UNKNOWN.
+
+        :param build_time: the time in seconds in which the model was built, which is recorded.
+        :param hints: the hints of :meth:`add_hints`, if any.
+        :param size: the number of (task, resource) pairs of the problem, which the budget needs.
+        :param current_time: the simulated time, which the budget needs.
+        :return: the solver and the status.
+        """
+        hints = hints or dict()
+        solver = cp_model.CpSolver()
+        time_limit = self.time_limit
+        if self.budget is not None:
+            time_limit = self.budget.time_limit(size, current_time)
+            if time_limit is None:
+                self.calls.append({'status': 'BUDGET_SPENT', 'variables': len(variables), 'hints': 0, 'hints kept': 0,
+                                   'build seconds': build_time, 'solve seconds': 0.0, 'time limit': 0.0})
+                return solver, cp_model.UNKNOWN
+        if self.logging:
+            logging.basicConfig(level=logging.INFO, filename="log.txt", filemode="w")
+            solver.parameters.log_search_progress = True
+            solver.log_callback = logging.info
+        solver.parameters.max_time_in_seconds = time_limit
+        if self.num_workers is not None:
+            solver.parameters.num_workers = self.num_workers
+        if self.budget is not None:
+            start_time = time.time()
+            gap_curve = GapCurve()
+            status = solver.Solve(model, gap_curve)
+            self.budget.record(size, time_limit, status, gap_curve.curve, time.time() - start_time + build_time)
+        else:
+            status = solver.Solve(model)
+
+        hints_kept = 0
+        if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
+            values = {key: solver.Value(variable) for key, variable in variables.items()}
+            hints_kept = sum(1 for key, value in hints.items() if values[key] == value)
+            if len(self.solution) + len(values) > self.MAX_SOLUTION_SIZE:
+                self.solution = dict()
+            self.solution.update(values)
+        self.calls.append({'status': solver.StatusName(status), 'variables': len(variables), 'hints': len(hints),
+                           'hints kept': hints_kept, 'build seconds': build_time, 'solve seconds': solver.WallTime(),
+                           'time limit': time_limit})
+        return solver, status
+
+    def stats(self):
+        """
+        Returns the number of solves per status, the total build and solve time, and the hint acceptance over all solves.
+        """
+        statuses = dict()
+        for call in self.calls:
+            statuses[call['status']] = statuses.get(call['status'], 0) + 1
+        hints = sum(call['hints'] for call in self.calls)
+        return {'solves': statuses,
+                'build seconds': sum(call['build seconds'] for call in self.calls),
+                'solve seconds': sum(call['solve seconds'] for call in self.calls),
+                'hints': hints,
+                'hint acceptance': sum(call['hints kept'] for call in self.calls) / hints if hints else None}
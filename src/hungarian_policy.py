@@ -1,9 +1,28 @@
 import numpy as np
 import scipy
+import scipy.optimize
+import scipy.sparse
+import scipy.sparse.csgraph
 
+from incremental_assignment import IncrementalAssignment
 from policy import Policy
 
 class HungarianPolicy(Policy):
+    """
+    Assigns tasks to resources by solving a linear assignment problem of tasks x resources with
+    scipy.optimize.linear_sum_assignment, in which a pair without a predicted duration costs zero.
+
+    :param incremental: whether to repair the assignment of the previous call with an IncrementalAssignment instead of
+        solving each call from scratch. Every task then gets a dummy resource at UNASSIGNED_COST, so that as many tasks
+        as possible are assigned, as linear_sum_assignment does when there are more tasks than resources.
+    """
+    # the cost in seconds of not assigning a task, which is larger than the total duration of any assignment
+    UNASSIGNED_COST = 10**12
+
+    def __init__(self, incremental=False):
+        self.incremental = incremental
+        self.assignment = IncrementalAssignment()
+
     def allocate(self, unassigned_tasks, available_resources, resource_pool, trd,
                  occupations, fairness, task_costs, working_resources, current_time):
         #trd = self.prune_trd(trd, resource_pool)
@@ -11,6 +30,19 @@ class HungarianPolicy(Policy):
         swaped_tasks_dict = {v : k for k, v in task_encoding.items()}
         swaped_resources_dict = {v : k for k, v in resource_encoding.items()}
 
+        if self.incremental:
+            # the dummy resource of a task is keyed by the task, and pairs without a duration cost zero, as in task_np
+            edges = {task: dict.fromkeys(resource_encoding, 0) for task in task_encoding}
+            for x, y, v in task_data:
+                edges[swaped_tasks_dict[x]][swaped_resources_dict[y]] = v
+            offsets = dict.fromkeys(resource_encoding, 0)
+            for task in task_encoding:
+                edges[task][task] = self.UNASSIGNED_COST
+                offsets[task] = 0
+            selected = [(task, resource) for task, resource in self.assignment.solve(edges, offsets).items()
+                        if resource in resource_encoding]
+            return self.prune_invalid_assignments(selected, available_resources, resource_pool, unassigned_tasks)
+
         task_np = np.zeros((len(swaped_tasks_dict), len(swaped_resources_dict)))
         for x, y, v in task_data:
             task_np[x,y] = v
@@ -23,58 +55,73 @@ class HungarianPolicy(Policy):
         return self.prune_invalid_assignments(selected, available_resources, resource_pool, unassigned_tasks)
 
 class HungarianMultiObjectivePolicy(Policy):
-    def __init__(self, alpha, beta, gamma, delta):
+    """
+    Assigns tasks to resources by solving a linear assignment problem of tasks x (resources + dummy resources),
+    in which assigning a task to its dummy resource postpones the task at delta times the mean predicted duration of
+    the task. The costs are built with NumPy from arrays of the (task, resource) pairs of the predictions.
+    The problem is solved on a dense matrix with scipy.optimize.linear_sum_assignment, or on a sparse matrix with
+    scipy.sparse.csgraph.min_weight_full_bipartite_matching, which only stores the pairs that can be assigned and
+    one dummy resource per task, so it grows with the number of pairs instead of quadratically with the number of tasks.
+
+    :param sparse: True for the sparse solver, False for the dense solver, or None to choose the sparse solver when the
+        dense matrix would have more than SPARSE_THRESHOLD cells.
+    :param decompose: whether to solve each connected component of the resource pools separately, see
+        Policy.allocate_components. The assignment problem is separable, so this reaches the same total cost.
+    :param workers: the number of threads that solve the components.
+    :param incremental: whether to repair the assignment of the previous call with an IncrementalAssignment, per set of
+        components of the resource pools when decompose is True, instead of solving each call from scratch, in which
+        case sparse is not used.
+    """
+    SPARSE_THRESHOLD = 250000
+
+    def __init__(self, alpha, beta, gamma, delta, sparse=None, decompose=False, workers=1, incremental=False):
         self.alpha = alpha     # time
         self.beta  = beta      # occupation
         self.gamma = gamma     # fairness
         self.delta = delta     # non-allocation cost factor
+        self.sparse = sparse
+        self.decompose = decompose
+        self.workers = workers
+        self.incremental = incremental
+        self.assignments = dict()
 
         self.num_postponed = 0
         self.num_allocated = 0
 
     def allocate(self, unassigned_tasks, available_resources, resource_pool, trd,
                  occupations, fairness, task_costs, working_resources, current_time):
+        if self.decompose:
+            return self.allocate_components(self.allocate_component, unassigned_tasks, available_resources, resource_pool,
+                                            trd, occupations, fairness, task_costs, working_resources, current_time,
+                                            self.workers)
+        return self.allocate_component(unassigned_tasks, available_resources, resource_pool, trd,
+                                       occupations, fairness, task_costs, working_resources, current_time)
+
+    def allocate_component(self, unassigned_tasks, available_resources, resource_pool, trd,
+                 occupations, fairness, task_costs, working_resources, current_time):
         relevant_resources = set(available_resources) | set(working_resources)
-        trd = self.prune_trd(trd, unassigned_tasks, relevant_resources)
-        task_data, task_encoding, resource_encoding = self.get_task_data_from_trd(trd)
+        rows, columns, durations, tasks, resources = self.encode_trd(trd, unassigned_tasks, relevant_resources, resource_pool)
+        nr_tasks, nr_resources = len(tasks), len(resources)
 
         task_costs = self.factor_task_costs(task_costs)
-        swaped_tasks_dict = {v : k for k, v in task_encoding.items()}
-        swaped_resources_dict = {v : k for k, v in resource_encoding.items()}
+        costs = self.get_costs(columns, durations, resources, occupations, fairness, working_resources, current_time)
+        dummy_costs = np.array([self.delta * task_costs[task] for task in tasks], dtype=np.double)
 
-        # tasks x (resources + dummy resources)
-        task_np = np.full((len(swaped_tasks_dict), len(swaped_resources_dict)+len(swaped_tasks_dict)),
-                          np.inf,
-                          dtype=np.double)
+        sparse = self.sparse if self.sparse is not None else nr_tasks * (nr_resources + nr_tasks) > self.SPARSE_THRESHOLD
+        if self.incremental:
+            assignment = self.get_assignment(unassigned_tasks, resource_pool)
+            offsets = self.get_resource_costs(resources, occupations, fairness, working_resources, current_time)
+            task_ind, resource_ind = self.solve_incremental(assignment, rows, columns, self.alpha*durations, dummy_costs,
+                                                            offsets, tasks, resources)
+        elif sparse:
+            task_ind, resource_ind = self.solve_sparse(rows, columns, costs, dummy_costs, nr_tasks, nr_resources)
+        else:
+            task_ind, resource_ind = self.solve_dense(rows, columns, costs, dummy_costs, nr_tasks, nr_resources)
 
-        # replace matrix with normal resource costs
-        for x, y, v in task_data:
-            # check if assignment is valid
-            resource = swaped_resources_dict[y]
-            task = swaped_tasks_dict[x]
-            if resource not in resource_pool[task.task_type]:
-                continue
-            if resource in working_resources:
-                start_time = max(0, working_resources[resource][0] - current_time + working_resources[resource][1]) * 3600
-            else:
-                start_time = 0
-            cost_1 = self.alpha*(v + start_time)
-            cost_2 = self.beta*occupations[resource] if resource in occupations else 0
-            cost_3 = self.gamma*fairness[resource] if resource in fairness else 0
-            cost = cost_1+cost_2+cost_3
-            task_np[x,y] = cost
-
-        for y in range(len(swaped_resources_dict), len(swaped_resources_dict)+len(swaped_tasks_dict)):
-            x = y - len(swaped_resources_dict)
-            task_id = swaped_tasks_dict[x]
-            task_np[x, y] = self.delta * task_costs[task_id]
-        
-        #print(task_np)
-        task_ind, resource_ind = scipy.optimize.linear_sum_assignment(task_np)
         selected = []
         for task_i, resource_i in zip(task_ind, resource_ind):
-            if resource_i in swaped_resources_dict:
-                selected.append((swaped_tasks_dict[task_i], swaped_resources_dict[resource_i]))
+            if resource_i < nr_resources:
+                selected.append((tasks[task_i], resources[resource_i]))
             else:
                 # selected dummy resource
                 self.num_postponed += 1
@@ -82,3 +129,108 @@ class HungarianMultiObjectivePolicy(Policy):
         self.num_allocated += len(selected)
         return self.prune_invalid_assignments(selected, available_resources, resource_pool, unassigned_tasks)
         #return selected
+
+    @staticmethod
+    def encode_trd(trd, tasks, resources, resource_pool, factor=3600):
+        """
+        Returns the row, the column, and the duration in seconds of each valid assignment of one of the tasks to one of
+        the resources that trd has a duration for, as arrays, and the task of each row and the resource of each column.
+        Encodes the same pairs as get_task_data_from_trd after pruning trd with prune_trd, and keeping the pairs of which
+        the resource is in the resource pool of the task, but only visits those pairs. The pairs are in the order of the
+        tasks and of the resource pools, which is the order in which the planner predicts trd, instead of the order of
+        the set of resources, which depends on the hash seed of the process, so that ties are broken the same way in
+        every process.
+
+        :param resources: the relevant resources, a set.
+        """
+        pools = dict()
+        for task_type, pool in resource_pool.items():
+            pools[task_type] = [resource for resource in pool if resource in resources]
+        task_index, resource_index = dict(), dict()
+        rows, columns, durations = [], [], []
+        for task in tasks:
+            for resource in pools[task.task_type]:
+                duration = trd.get((task, resource))
+                if duration is None:
+                    continue
+                if task not in task_index:
+                    task_index[task] = len(task_index)
+                if resource not in resource_index:
+                    resource_index[resource] = len(resource_index)
+                rows.append(task_index[task])
+                columns.append(resource_index[resource])
+                durations.append(duration)
+        durations = (np.array(durations, dtype=np.double) * factor).astype(np.int64)
+        return (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp), durations,
+                list(task_index), list(resource_index))
+
+    def get_costs(self, columns, durations, resources, occupations, fairness, working_resources, current_time):
+        """
+        Returns the cost of each assignment, given the column of its resource and its duration in seconds.
+        """
+        resource_costs = self.get_resource_costs(resources, occupations, fairness, working_resources, current_time)
+        return self.alpha*durations + resource_costs[columns]
+
+    def get_resource_costs(self, resources, occupations, fairness, working_resources, current_time):
+        """
+        Returns the part of the costs of get_costs that depends on the resource only, for each resource.
+        """
+        start_times = np.array([max(0, working_resources[resource][0] - current_time + working_resources[resource][1]) * 3600
+                                if resource in working_resources else 0 for resource in resources], dtype=np.double)
+        occupation_costs = np.array([self.beta*occupations[resource] if resource in occupations else 0
+                                     for resource in resources], dtype=np.double)
+        fairness_costs = np.array([self.gamma*fairness[resource] if resource in fairness else 0
+                                   for resource in resources], dtype=np.double)
+        return self.alpha*start_times + occupation_costs + fairness_costs
+
+    def get_assignment(self, unassigned_tasks, resource_pool):
+        """
+        Returns the incremental assignment of the components of the resource pools of the tasks, so that every component
+        keeps its own assignment when the problem is decomposed.
+        """
+        components = None
+        if self.decompose:
+            task_type_components, _ = self.resource_pool_components(resource_pool)
+            components = frozenset(task_type_components[task.task_type] for task in unassigned_tasks)
+        if components not in self.assignments:
+            self.assignments[components] = IncrementalAssignment()
+        return self.assignments[components]
+
+    @staticmethod
+    def solve_incremental(assignment, rows, columns, costs, dummy_costs, resource_costs, tasks, resources):
+        # the costs are split in the costs of the edges and the offsets of the resources, and the dummy resource of
+        # a task is keyed by the task. The rows of encode_trd are sorted, so the edges of a task are a slice of the arrays
+        bounds = np.searchsorted(rows, np.arange(len(tasks) + 1)).tolist()
+        column_resources, costs = [resources[column] for column in columns.tolist()], costs.tolist()
+        edges = {task: dict(zip(column_resources[bounds[row]:bounds[row + 1]], costs[bounds[row]:bounds[row + 1]]))
+                 for row, task in enumerate(tasks)}
+        offsets = dict(zip(resources, resource_costs.tolist()))
+        for task, dummy_cost in zip(tasks, dummy_costs.tolist()):
+            edges[task][task] = dummy_cost
+            offsets[task] = 0.0
+        resource_index = {resource: i for i, resource in enumerate(resources)}
+        solution = assignment.solve(edges, offsets)
+        task_ind = np.arange(len(tasks))
+        resource_ind = np.array([resource_index.get(solution.get(task), len(resources)) for task in tasks], dtype=np.intp)
+        return task_ind, resource_ind
+
+    @staticmethod
+    def solve_dense(rows, columns, costs, dummy_costs, nr_tasks, nr_resources):
+        # tasks x (resources + dummy resources)
+        task_np = np.full((nr_tasks, nr_resources + nr_tasks), np.inf, dtype=np.double)
+        task_np[rows, columns] = costs
+        task_np[np.arange(nr_tasks), nr_resources + np.arange(nr_tasks)] = dummy_costs
+        return scipy.optimize.linear_sum_assignment(task_np)
+
+    @staticmethod
+    def solve_sparse(rows, columns, costs, dummy_costs, nr_tasks, nr_resources):
+        # every task is matched to one resource or to its own dummy resource, so adding the same constant to all costs
+        # does not change the optimal assignment, and makes them positive, because a zero is not an edge in a sparse matrix
+        data = np.concatenate([costs, dummy_costs])
+        if len(data) == 0:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+        data = data - data.min() + 1
+        matrix = scipy.sparse.csr_matrix((data, (np.concatenate([rows, np.arange(nr_tasks)]),
+                                                 np.concatenate([columns, nr_resources + np.arange(nr_tasks)]))),
+                                         shape=(nr_tasks, nr_resources + nr_tasks))
+        return scipy.sparse.csgraph.min_weight_full_bipartite_matching(matrix)
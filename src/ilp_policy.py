@@ -5,6 +5,7 @@ from ortools.sat.python import cp_model
 import logging
 
 from policy import Policy, GreedyParallelMachinesSchedulingPolicy
+from cp_sat_session import CpSatSession
 
 class UnrelatedMachinesScheduling:
     def __init__(self, task_data, max_value=None):
@@ -138,25 +139,32 @@ class UnrelatedMachinesScheduling:
 
 
 class UnrelatedParallelMachinesSchedulingPolicy(Policy):
+    def __init__(self, num_workers=None, budget=None):
+        # the assignments of the previous solutions are hinted to the next model, and an AdaptiveTimeBudget,
+        # if any, sets the time limit of each solve instead of one second
+        self.session = CpSatSession(1.0, num_workers, logging=True, budget=budget)
+        self.num_postponed = 0
+        self.num_allocated = 0
+
     def allocate(self, unassigned_tasks, available_resources, resource_pool, trd,
                  occupations, fairness, task_costs, working_resources, current_time):
-        trd = self.prune_trd(trd, resource_pool)
+        relevant_resources = set(available_resources) | set(working_resources.keys())
+        trd = self.prune_trd(trd, unassigned_tasks, relevant_resources)
         if not trd:
             return []
+        start_time = time.time()
         task_data, task_encoding, resource_encoding = self.get_task_data_from_trd(trd)
+        swaped_tasks_dict = {v : k for k, v in task_encoding.items()}
+        swaped_resources_dict = {v : k for k, v in resource_encoding.items()}
 
         # Creates the solver and solve.
         model = UnrelatedMachinesScheduling(task_data)
-        start_time = time.time()
-        logging.basicConfig(level=logging.INFO, filename="log.txt", filemode="w")
-        solver = cp_model.CpSolver()
-        solver.parameters.log_search_progress = True
-        solver.log_callback = logging.info
-
-        # Sets a time limit of 10 seconds.
-        solver.parameters.max_time_in_seconds = 1.0
+        variables = {(swaped_tasks_dict[task], swaped_resources_dict[resource]): interval.assigned
+                     for (task, resource), interval in model.intervals.items()}
+        hints = self.session.add_hints(model.model, variables)
+        build_time = time.time() - start_time
 
-        status = solver.Solve(model.model)
+        solver, status = self.session.solve(model.model, variables, build_time, hints, len(trd), current_time)
         end_time = time.time()
 
         if end_time - start_time > 60:
@@ -170,10 +178,10 @@ class UnrelatedParallelMachinesSchedulingPolicy(Policy):
             else:
                 print('No solution', int(end_time - start_time), len(unassigned_tasks), int(len(trd)/len(unassigned_tasks)),
                       model.horizon)
-                return GreedyParallelMachinesSchedulingPolicy().allocate(unassigned_tasks, available_resources, resource_pool, trd)
-
-        swaped_tasks_dict = {v : k for k, v in task_encoding.items()}
-        swaped_resources_dict = {v : k for k, v in resource_encoding.items()}
+                assignments = GreedyParallelMachinesSchedulingPolicy().allocate(unassigned_tasks, available_resources, resource_pool, trd,
+                                                                                occupations, fairness, task_costs, working_resources, current_time)
+                self.num_allocated += len(assignments)
+                return assignments
 
         selected = []
         schedule = collections.defaultdict(list)
@@ -187,4 +195,13 @@ class UnrelatedParallelMachinesSchedulingPolicy(Policy):
             decoded_task = swaped_tasks_dict[first_task]
             selected.append((decoded_task, decoded_resource))
         
-        return self.prune_invalid_assignments(selected, available_resources, resource_pool, unassigned_tasks)
\ No newline at end of file
+        assignments = self.prune_invalid_assignments(selected, available_resources, resource_pool, unassigned_tasks)
+        self.num_allocated += len(assignments)
+        self.num_postponed += len(selected) - len(assignments)
+        return assignments
+
+    def stats(self):
+        """
+        Returns the statistics of the CP-SAT solves, see CpSatSession.stats.
+        """
+        return self.session.stats()
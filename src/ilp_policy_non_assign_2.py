@@ -7,15 +7,22 @@ import random
 
 from policy import Policy, GreedyParallelMachinesSchedulingPolicy
 from hungarian_policy import HungarianMultiObjectivePolicy
+from cp_sat_session import CpSatSession
 
 
 class UnrelatedMachinesSchedulingNonAssign2:
+    """
+    :param linear: whether to model the processing time of an assignment and the cost of not assigning a task as
+        a coefficient of its boolean variable, which makes the model linear, instead of as the product of the boolean
+        variable and a constant variable.
+    """
     def __init__(self, task_data, non_assign_cost, 
-                 machines_start, delta, max_value=None):
+                 machines_start, delta, max_value=None, linear=False):
         self.task_data = task_data
         self.non_assign_cost = non_assign_cost
         self.machines_start = machines_start
         self.delta = delta
+        self.linear = linear
         self.__define_model(max_value)
         self.__define_constraints()
         self.__define_objective()
@@ -77,9 +84,13 @@ class UnrelatedMachinesSchedulingNonAssign2:
             suffix = f"_{task}_{machine}"
             assigned_var = self.model.NewBoolVar('assigned' + suffix)
             self.task_assigned_machines[task].append(assigned_var)
-            duration_var = self.model.NewIntVar(processing_time, processing_time, 'duration' + suffix)
-            goal_variable = self.model.NewIntVar(0, processing_time, 'goal' + suffix)
-            self.model.AddMultiplicationEquality(goal_variable, assigned_var, duration_var)
+            if self.linear:
+                duration_var = processing_time
+                goal_variable = processing_time * assigned_var
+            else:
+                duration_var = self.model.NewIntVar(processing_time, processing_time, 'duration' + suffix)
+                goal_variable = self.model.NewIntVar(0, processing_time, 'goal' + suffix)
+                self.model.AddMultiplicationEquality(goal_variable, assigned_var, duration_var)
             self.goal_variables[task, machine] = goal_variable
 
             #print(interval_var, processing_time)
@@ -105,8 +116,11 @@ class UnrelatedMachinesSchedulingNonAssign2:
         for task, task_data in self.task_assigned_machines.items():
             non_assign_variable = self.model.NewBoolVar('non_assigned_' + str(task))
             self.task_non_assign[task] = non_assign_variable
-            non_assign_cost_variable = self.model.NewIntVar(0, self.non_assign_cost[task], 'non_assigned_cost_' + str(task))
-            self.model.AddMultiplicationEquality(non_assign_cost_variable, [non_assign_variable, self.non_assign_cost[task]])
+            if self.linear:
+                non_assign_cost_variable = self.non_assign_cost[task] * non_assign_variable
+            else:
+                non_assign_cost_variable = self.model.NewIntVar(0, self.non_assign_cost[task], 'non_assigned_cost_' + str(task))
+                self.model.AddMultiplicationEquality(non_assign_cost_variable, [non_assign_variable, self.non_assign_cost[task]])
             self.non_assign_cost_variables.append(non_assign_cost_variable)
             #print(non_assign_cost_variable, self.non_assign_cost[task])
 
@@ -151,128 +165,356 @@ class UnrelatedMachinesSchedulingNonAssign2:
         return (solver, status)
 
 
+class UnrelatedMachinesSchedulingNonAssignSession2(CpSatSession):
+    """
+    The model of UnrelatedMachinesSchedulingNonAssign2 as one persistent CP-SAT model, which is updated between
+    the solves of consecutive allocation problems instead of rebuilt. Every task, machine, and (task, machine) pair
+    has a block of variables and constraints, keyed by the task and the resource instead of by their encoding, which is
+    added when it occurs for the first time. The blocks that do not occur in a problem are switched off by fixing their
+    variables to zero, and the durations, non assign costs, machine starts, and horizon are set by changing the domains
+    of their variables. The assignments of the previous solutions are hinted. The model is rebuilt when it has more
+    than twice as many task blocks as the problem, plus REBUILD_MARGIN. With linear=True, the processing times are
+    set as the coefficients of the assignment variables in the constraints of the machine durations, and the non assign
+    costs as the coefficients of the non assign variables in the objective, as in the linear UnrelatedMachinesSchedulingNonAssign2.
+
+    The makespan is bounded from below by the machine durations instead of being their maximum, which is equivalent,
+    because the objective increases with the makespan.
+    """
+    REBUILD_MARGIN = 100
+
+    def __init__(self, time_limit, num_workers=None, logging=False, linear=False, budget=None):
+        super().__init__(time_limit, num_workers, logging=logging, budget=budget)
+        self.linear = linear
+        # position is the position of the goal, or of the assignment variable if linear, in the constraint of the machine
+        self.pair = collections.namedtuple("pair", "assigned duration goal position")
+        self.task = collections.namedtuple("task", "active non_assign cost non_assign_cost constraint")
+        self.machine = collections.namedtuple("machine", "start duration constraint")
+        self.reset()
+
+    def reset(self):
+        self.model = cp_model.CpModel()
+        self.pairs, self.tasks, self.machines = dict(), dict(), dict()
+        self.active_pairs, self.active_tasks, self.active_machines = set(), set(), set()
+        self.makespan = self.model.NewIntVar(0, 0, 'makespan')
+        self.max_start = self.model.NewIntVar(0, 0, 'max_start')
+        self.model.Add(self.makespan >= self.max_start)
+
+    def __set_domain(self, variable, lower, upper):
+        variable.Proto().domain[:] = [lower, upper]
+
+    def __append(self, constraint, variable):
+        constraint = self.model.Proto().constraints[constraint]
+        constraint.linear.vars.append(variable.Index())
+        constraint.linear.coeffs.append(1)
+        return len(constraint.linear.vars) - 1
+
+    def __add_task(self, task):
+        suffix = f"_{len(self.tasks)}"
+        active = self.model.NewBoolVar('active' + suffix)
+        non_assign = self.model.NewBoolVar('non_assigned' + suffix)
+        if self.linear:
+            cost, non_assign_cost = None, None
+        else:
+            cost = self.model.NewIntVar(0, 0, 'cost' + suffix)
+            non_assign_cost = self.model.NewIntVar(0, 0, 'non_assigned_cost' + suffix)
+            self.model.AddMultiplicationEquality(non_assign_cost, [non_assign, cost])
+        # the assignment variables of the pairs of the task are appended:
+        # a task is assigned to exactly one machine or to -non assign- when it is active
+        constraint = self.model.AddLinearConstraint(non_assign - active, 0, 0)
+        self.tasks[task] = self.task(active, non_assign, cost, non_assign_cost, constraint.Index())
+
+    def __add_machine(self, machine):
+        suffix = f"_{len(self.machines)}"
+        start = self.model.NewIntVar(0, 0, 'machine_start' + suffix)
+        duration = self.model.NewIntVar(0, 0, 'machine_duration' + suffix)
+        # the goal variables of the pairs of the machine are appended
+        constraint = self.model.AddLinearConstraint(start - duration, 0, 0)
+        self.model.Add(self.makespan >= duration)
+        self.machines[machine] = self.machine(start, duration, constraint.Index())
+
+    def __add_pair(self, task, machine):
+        suffix = f"_{len(self.pairs)}"
+        assigned = self.model.NewBoolVar('assigned' + suffix)
+        self.__append(self.tasks[task].constraint, assigned)
+        if self.linear:
+            duration, goal = None, None
+            position = self.__append(self.machines[machine].constraint, assigned)
+        else:
+            duration = self.model.NewIntVar(0, 0, 'duration' + suffix)
+            goal = self.model.NewIntVar(0, 0, 'goal' + suffix)
+            self.model.AddMultiplicationEquality(goal, assigned, duration)
+            position = self.__append(self.machines[machine].constraint, goal)
+        self.pairs[task, machine] = self.pair(assigned, duration, goal, position)
+
+    def update(self, task_data, non_assign_cost, machines_start):
+        """
+        Updates the model to the problem of task_data, a dict of (task, resource) to processing time, in which
+        non_assign_cost is the cost of not assigning each task and machines_start the start time of each resource.
+        """
+        tasks = {task for task, machine in task_data}
+        if len(self.tasks) > 2 * len(tasks) + self.REBUILD_MARGIN:
+            self.reset()
+        for task, machine in task_data:
+            if task not in self.tasks:
+                self.__add_task(task)
+            if machine not in self.machines:
+                self.__add_machine(machine)
+            if (task, machine) not in self.pairs:
+                self.__add_pair(task, machine)
+        machines = {machine for task, machine in task_data}
+        horizon = self.greedy_max(task_data, {machine: machines_start[machine] for machine in machines})
+
+        constraints = self.model.Proto().constraints
+        for task, machine in self.active_pairs - task_data.keys():
+            pair = self.pairs[task, machine]
+            for variable in [pair.assigned, pair.duration, pair.goal]:
+                if variable is not None:
+                    self.__set_domain(variable, 0, 0)
+        for (task, machine), processing_time in task_data.items():
+            pair = self.pairs[task, machine]
+            self.__set_domain(pair.assigned, 0, 1)
+            if self.linear:
+                constraints[self.machines[machine].constraint].linear.coeffs[pair.position] = processing_time
+            else:
+                self.__set_domain(pair.duration, processing_time, processing_time)
+                self.__set_domain(pair.goal, 0, processing_time)
+        for task in self.active_tasks - tasks:
+            block = self.tasks[task]
+            for variable in [block.active, block.non_assign, block.cost, block.non_assign_cost]:
+                if variable is not None:
+                    self.__set_domain(variable, 0, 0)
+        for task in tasks:
+            block = self.tasks[task]
+            self.__set_domain(block.active, 1, 1)
+            self.__set_domain(block.non_assign, 0, 1)
+            if not self.linear:
+                self.__set_domain(block.cost, non_assign_cost[task], non_assign_cost[task])
+                self.__set_domain(block.non_assign_cost, 0, non_assign_cost[task])
+        for machine in self.active_machines - machines:
+            block = self.machines[machine]
+            self.__set_domain(block.start, 0, 0)
+            self.__set_domain(block.duration, 0, 0)
+        for machine in machines:
+            block = self.machines[machine]
+            self.__set_domain(block.start, machines_start[machine], machines_start[machine])
+            self.__set_domain(block.duration, 0, horizon)
+        max_start = max(machines_start[machine] for machine in machines)
+        self.__set_domain(self.max_start, max_start, max_start)
+        self.__set_domain(self.makespan, 0, horizon)
+        self.active_pairs, self.active_tasks, self.active_machines = set(task_data), tasks, machines
+
+        if self.linear:
+            non_assign_sum = cp_model.LinearExpr.WeightedSum([self.tasks[task].non_assign for task in tasks],
+                                                             [non_assign_cost[task] for task in tasks])
+        else:
+            non_assign_sum = cp_model.LinearExpr.Sum([self.tasks[task].non_assign_cost for task in tasks])
+        deviation = cp_model.LinearExpr.Sum([self.makespan - self.machines[machine].duration for machine in machines])
+        self.model.Minimize((self.makespan + non_assign_sum) * len(machines) + deviation)
+
+    @staticmethod
+    def greedy_max(task_data, machines_start):
+        resource_times = machines_start.copy()
+        task_resource_durations = collections.defaultdict(list)
+        for (task, resource), duration in task_data.items():
+            task_resource_durations[task].append((resource, duration))
+        for task, resource_durations in task_resource_durations.items():
+            min_max_time = math.inf
+            selected_resource = None
+            for resource, duration in resource_durations:
+                if resource_times[resource] + duration < min_max_time:
+                    selected_resource = resource
+                    min_max_time = resource_times[resource] + duration
+            resource_times[selected_resource] = min_max_time
+        return max(resource_times.values())
+
+    def allocate(self, task_data, non_assign_cost, machines_start, current_time=None):
+        """
+        Updates the model to the problem and solves it, hinting the previous solutions.
+        The simulated current_time is needed with a budget, see CpSatSession.solve.
+
+        :return: the solver, the status, the assigned tasks of each machine as a list of (task, processing time),
+            in the order of task_data, and the number of tasks that are not assigned.
+        """
+        start_time = time.time()
+        self.update(task_data, non_assign_cost, machines_start)
+        variables = {(task, machine): self.pairs[task, machine].assigned for task, machine in task_data}
+        variables.update({task: self.tasks[task].non_assign for task in self.active_tasks})
+        hints = self.add_hints(self.model, variables)
+        solver, status = self.solve(self.model, variables, time.time() - start_time, hints, len(task_data), current_time)
+        if status != cp_model.OPTIMAL and status != cp_model.FEASIBLE:
+            return solver, status, None, None
+
+        machine_tasks = collections.defaultdict(list)
+        for (task, machine), processing_time in task_data.items():
+            if solver.Value(self.pairs[task, machine].assigned):
+                machine_tasks[machine].append((task, processing_time))
+        postponed = sum(1 for task in self.active_tasks if solver.Value(self.tasks[task].non_assign))
+        return solver, status, machine_tasks, postponed
+
+
 class UnrelatedParallelMachinesSchedulingNonAssignPolicy2(Policy):
-    def __init__(self, alpha, beta, gamma, delta, selection_strategy):
+    def __init__(self, alpha, beta, gamma, delta, selection_strategy, decompose=False, workers=1,
+                 persistent=False, num_workers=None, linear=False, budget=None):
         self.alpha = alpha     # time
         self.beta  = beta      # occupation
         self.gamma = gamma     # fairness
         self.delta = delta     # non-allocation cost factor
         self.selection_strategy = selection_strategy
+        # whether to solve each connected component of the resource pools separately, see Policy.allocate_components,
+        # in which case the makespan is minimized per component instead of over all resources
+        self.decompose = decompose
+        self.workers = workers
+        # whether to keep one persistent, warm-started model per set of components of the resource pools,
+        # see UnrelatedMachinesSchedulingNonAssignSession2, instead of building a model per call
+        self.persistent = persistent
+        # the number of parallel search workers of CP-SAT, None for one per core
+        self.num_workers = num_workers
+        # whether to use the linear formulation of the model, see UnrelatedMachinesSchedulingNonAssign2
+        self.linear = linear
+        self.time_limit = 2.0
+        # an AdaptiveTimeBudget that sets the time limit of each solve instead of time_limit, shared by all sessions
+        self.budget = budget
 
         self.num_postponed = 0
         self.num_allocated = 0
         self.logging = False
         self.optimal, self.feasible, self.no_solution = (0, 0, 0)
+        # the models that are built per call hint the previous solutions too, which are keyed by the (task, resource)
+        # pair of an assignment and by the task of a non assignment, so that they carry over between the models
+        self.session = CpSatSession(self.time_limit, num_workers, budget=budget)
+        self.sessions = dict()
 
         self.back_up_policy = HungarianMultiObjectivePolicy(alpha, beta, gamma, delta)
 
     def allocate(self, unassigned_tasks, available_resources, resource_pool, trd,
                  occupations, fairness, task_costs, working_resources, current_time):
-        relevant_resources = set(available_resources) | set(working_resources.keys())
-        trd = self.prune_trd(trd, unassigned_tasks, relevant_resources)
-        if not trd:
-            return []
+        if self.decompose:
+            return self.allocate_components(self.allocate_component, unassigned_tasks, available_resources, resource_pool,
+                                            trd, occupations, fairness, task_costs, working_resources, current_time,
+                                            self.workers)
+        return self.allocate_component(unassigned_tasks, available_resources, resource_pool, trd,
+                                       occupations, fairness, task_costs, working_resources, current_time)
+
+    def get_session(self, unassigned_tasks, resource_pool):
+        """
+        Returns the persistent session of the components of the resource pools of the tasks, so that every component
+        keeps its own model when the problem is decomposed, and the components can be solved in parallel.
+        """
+        task_type_components, _ = self.resource_pool_components(resource_pool)
+        components = frozenset(task_type_components[task.task_type] for task in unassigned_tasks)
+        if components not in self.sessions:
+            self.sessions[components] = UnrelatedMachinesSchedulingNonAssignSession2(self.time_limit, self.num_workers,
+                                                                                    self.logging, self.linear, self.budget)
+        return self.sessions[components]
+
+    def solve(self, trd, task_costs, machines_start, current_time=None):
+        """
+        Builds a model of the problem and solves it.
+        The simulated current_time is needed with a budget, see CpSatSession.solve.
+
+        :return: the solver, the status, the assigned tasks of each resource as a list of (task, processing time),
+            and the number of tasks that are not assigned.
+        """
+        start_time = time.time()
         task_data, task_encoding, resource_encoding = self.get_task_data_from_trd(trd)
         swaped_tasks_dict = {v : k for k, v in task_encoding.items()}
         swaped_resources_dict = {v : k for k, v in resource_encoding.items()}
 
-        task_costs = self.factor_task_costs(task_costs.copy(), factor=3600*self.delta)
         encoded_task_costs = dict()
         for task, cost in task_costs.items():
             if task in task_encoding:
                 encoded_task_costs[task_encoding[task]] = cost
+        encoded_machines_start = {resource_enc: machines_start[resource] for resource, resource_enc in resource_encoding.items()}
 
-        # get encoded machines start
+        # Creates the solver and solve.
+        model = UnrelatedMachinesSchedulingNonAssign2(task_data, encoded_task_costs,
+                                                     encoded_machines_start, self.delta, linear=self.linear)
+        variables = {(swaped_tasks_dict[assignment.task], swaped_resources_dict[machine]): assignment.assigned_var
+                     for machine, machine_assignments in model.assignments.items() for assignment in machine_assignments}
+        variables.update({swaped_tasks_dict[task]: variable for task, variable in model.task_non_assign.items()})
+        hints = self.session.add_hints(model.model, variables)
+        self.session.logging = self.logging
+        #model.model.ExportToFile('model.pd.txt')
+        solver, status = self.session.solve(model.model, variables, time.time() - start_time, hints, size=len(trd),
+                                            current_time=current_time)
+        if status != cp_model.OPTIMAL and status != cp_model.FEASIBLE:
+            return solver, status, None, None
+
+        postponed = 0
+        for task, postponed_var in model.task_non_assign.items():
+            if solver.Value(postponed_var):
+                postponed += 1
+
+        machine_tasks = collections.defaultdict(list)
+        for machine, machine_assignments in model.assignments.items():
+            for machine_assignment in machine_assignments:
+                if solver.Value(machine_assignment.assigned_var):
+                    machine_tasks[swaped_resources_dict[machine]].append(
+                        (swaped_tasks_dict[machine_assignment.task], solver.Value(machine_assignment.duration)))
+        return solver, status, machine_tasks, postponed
+
+    def allocate_component(self, unassigned_tasks, available_resources, resource_pool, trd,
+                 occupations, fairness, task_costs, working_resources, current_time):
+        relevant_resources = set(available_resources) | set(working_resources.keys())
+        trd = self.prune_trd(trd, unassigned_tasks, relevant_resources)
+        if not trd:
+            return []
+
+        task_costs = self.factor_task_costs(task_costs.copy(), factor=3600*self.delta)
+
+        # get machines start
         machines_start = {}
-        for resource, resource_enc in resource_encoding.items():
+        for task, resource in trd:
             if resource in working_resources:
                 start_time = max(0, working_resources[resource][0] - current_time + working_resources[resource][1])
-                machines_start[resource_enc] = int(start_time * 3600)
+                machines_start[resource] = int(start_time * 3600)
             else:
-                machines_start[resource_enc] = 0
+                machines_start[resource] = 0
         #print(machines_start)
 
-        # Creates the solver and solve.
-        model = UnrelatedMachinesSchedulingNonAssign2(task_data, encoded_task_costs,
-                                                     machines_start, self.delta)
-        start_time = time.time()
-
-        solver = cp_model.CpSolver()
-        if self.logging:
-            logging.basicConfig(level=logging.INFO, filename="log.txt", filemode="w")
-            solver.parameters.log_search_progress = True
-            solver.log_callback = logging.info
-
-        # Sets a time limit of 10 seconds.
-        solver.parameters.max_time_in_seconds = 2.0
-
-        #model.model.ExportToFile('model.pd.txt')
-        status = solver.Solve(model.model)
-        end_time = time.time()
-        duration = end_time - start_time
+        if self.persistent:
+            task_data = {(task, resource): int(duration*3600) for (task, resource), duration in trd.items()}
+            session = self.get_session(unassigned_tasks, resource_pool)
+            solver, status, machine_tasks, postponed = session.allocate(task_data, task_costs, machines_start, current_time)
+        else:
+            solver, status, machine_tasks, postponed = self.solve(trd, task_costs, machines_start, current_time)
 
         if status != cp_model.OPTIMAL:
             if status == cp_model.FEASIBLE:
                 self.feasible += 1
-                #print('2 Feasible', round(duration, 2), len(relevant_resources), len(unassigned_tasks), len(trd),
-                #    solver.ObjectiveValue(), model.horizon)
             else:
                 self.no_solution += 1
-                #print('2 No solution', round(duration, 2), len(relevant_resources), len(unassigned_tasks), len(trd),
-                #      model.horizon)
                 return self.back_up_policy.allocate(unassigned_tasks, available_resources, resource_pool, trd,
                         occupations, fairness, task_costs, working_resources, current_time)
         else:
             self.optimal += 1
-            #print('2 Optimal', round(duration, 2), len(relevant_resources), len(unassigned_tasks), len(trd),
-            #          solver.ObjectiveValue(), model.horizon)
-        #print(solver.Value(model.duration_var)*len(relevant_resources),
-        #      solver.Value(model.non_assign_sum)*len(relevant_resources),
-        #      solver.Value(model.deviation_var),
-        #      solver.ObjectiveValue())
-
-        #postponed_vars = []
-        for task, postponed_var in model.task_non_assign.items():
-            if solver.Value(postponed_var):
-                #postponed_vars.append(postponed_var)
-                #print('Postponed:', postponed_var)
-                self.num_postponed += 1
-            else:
-                pass
-                #print('Not postponed:', postponed_var)
-        #print('Postponed vars:', postponed_vars)
+        self.num_postponed += postponed
 
-        machine_tasks = collections.defaultdict(list)
-        for machine, machine_assignments in model.assignments.items():
-            for machine_assignment in machine_assignments:
-                if solver.Value(machine_assignment.assigned_var):
-                    machine_tasks[machine].append(machine_assignment)
-        #print('Assignments', machine_tasks)
         selected = []
-        
         # select first task (for every resource)
-        for machine, tasks in machine_tasks.items():
-            decoded_resource = swaped_resources_dict[machine]
-            #for task in tasks:
-            #    selected_task = task.task
-            #    decoded_task = swaped_tasks_dict[selected_task]
-            #    selected.append((decoded_task, decoded_resource))
-            #continue
+        for resource, tasks in machine_tasks.items():
             if self.selection_strategy == 'first':
-                selected_task = tasks[0].task
+                selected_task = tasks[0][0]
             elif self.selection_strategy == 'fastest':
-                selected_task = sorted(tasks, key=lambda task: solver.Value(task.duration))[0].task
+                selected_task = sorted(tasks, key=lambda task: task[1])[0][0]
             elif self.selection_strategy == 'slowest':
-                selected_task = sorted(tasks, key=lambda task: solver.Value(task.duration))[-1].task
+                selected_task = sorted(tasks, key=lambda task: task[1])[-1][0]
             elif self.selection_strategy == 'EIF':
-                selected_task = sorted(tasks, key=lambda task: swaped_tasks_dict[task.task].case_id)[0].task
+                selected_task = sorted(tasks, key=lambda task: task[0].case_id)[0][0]
             elif self.selection_strategy == 'random':
-                selected_task = random.choice(tasks).task
-            decoded_task = swaped_tasks_dict[selected_task]
-            selected.append((decoded_task, decoded_resource))
+                selected_task = random.choice(tasks)[0]
+            selected.append((selected_task, resource))
             self.num_allocated += 1
 
         #res = selected
         res = self.prune_invalid_assignments(selected, available_resources, resource_pool, unassigned_tasks)
         return res
         #return selected
+
+    def stats(self):
+        """
+        Returns the statistics of the CP-SAT solves, see CpSatSession.stats, of the models built per call, and of
+        the persistent sessions.
+        """
+        return {'built': self.session.stats(),
+                'persistent': {tuple(sorted(components)): session.stats() for components, session in self.sessions.items()}}
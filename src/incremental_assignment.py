@@ -0,0 +1,238 @@
+import heapq
+import itertools
+import math
+
+
+class IncrementalAssignment:
+    """
+    A minimum cost assignment of rows to columns, in which every row is assigned to its own column, which is repaired
+    between consecutive problems instead of solved from scratch, as in the dynamic Hungarian algorithm of Mills-Tettey,
+    Stentz, and Dias. The rows and columns are keyed by what they are, e.g. by task and by resource, and the assignment and
+    the dual potentials of the rows and columns are kept between problems. The cost of assigning a row to a column is
+    the cost of their edge plus the offset of the column, so that a change that changes the costs of all edges of a
+    column by the same amount, e.g. of the start time of a resource, only changes its offset.
+
+    The potentials keep the reduced cost of every edge non-negative and of every assigned edge zero, and all columns that
+    are not assigned share the largest potential, which makes the assignment optimal. This is the assignment of a square
+    problem with a dummy row at cost zero for every column that is not assigned. A solve releases the assignments that
+    are no longer consistent with the potentials after the rows and columns that were added, removed, or changed. A
+    released column of which the potential is smaller than the shared potential is given up along a shortest path from
+    a dummy row, which either moves a chain of rows into it or raises its potential, and every row that is not assigned is
+    assigned along a shortest augmenting path, both with Dijkstra's algorithm on the reduced costs. So the work of a solve
+    grows with the size of the change instead of with the size of the problem.
+
+    :param tolerance: the negative reduced cost that is still considered zero, which absorbs rounding errors.
+    """
+    def __init__(self, tolerance=1e-6):
+        self.tolerance = tolerance
+        self.edges = dict()              # row to a dict of column to cost
+        self.offsets = dict()            # column to offset
+        self.column_rows = dict()        # column to the set of rows with an edge to it
+        self.row_potentials = dict()
+        # the potentials of the assigned and released columns minus their offsets
+        self.column_potentials = dict()
+        # the potential of the columns that are not assigned
+        self.free_potential = 0
+        self.row_column = dict()
+        self.column_row = dict()
+        self.released = dict()           # the released columns, in order of release
+        self.augmentations = 0
+
+    def __potential(self, column):
+        if column in self.column_row or column in self.released:
+            return self.column_potentials[column]
+        return self.free_potential - self.offsets[column]
+
+    def __row_potential(self, row):
+        return min((cost - self.__potential(column) for column, cost in self.edges[row].items()), default=0)
+
+    def __release(self, row):
+        column = self.row_column.pop(row)
+        del self.column_row[column]
+        self.released[column] = None
+
+    def __update_row(self, row, edges):
+        old_edges = self.edges.get(row, dict())
+        for column in old_edges:
+            if column not in edges and column in self.column_rows:
+                self.column_rows[column].discard(row)
+        for column in edges:
+            self.column_rows[column].add(row)
+        self.edges[row] = edges
+
+        column = self.row_column.get(row)
+        if column is not None:
+            tight = column in edges and edges[column] == old_edges.get(column)
+            potential = self.row_potentials[row]
+            if tight and all(cost - self.__potential(c) - potential >= -self.tolerance for c, cost in edges.items()):
+                return
+            self.__release(row)
+        self.row_potentials[row] = self.__row_potential(row)
+
+    def __check_column(self, column):
+        # a column that is not assigned, of which a reduced cost would be negative at the shared potential, is released
+        # at the largest potential at which its reduced costs are non-negative
+        if column in self.column_row or column in self.released:
+            return
+        potential = min((self.edges[row][column] - self.row_potentials[row] for row in self.column_rows[column]),
+                        default=math.inf)
+        if potential < self.free_potential - self.offsets[column] - self.tolerance:
+            self.column_potentials[column] = potential
+            self.released[column] = None
+
+    def __give_up(self, column):
+        """
+        Gives up a released column, of which the potential is smaller than the shared potential, along a shortest path
+        from a dummy row, found with Dijkstra's algorithm backwards from the column, through the rows with an edge to
+        a column and the column that is assigned to a row. The path starts at a column that is assigned, or at the column
+        itself, at the difference between the shared potential and its potential. The rows on the path move to the next
+        column of the path, so that the first column of the path is no longer assigned, and the potentials of the rows and
+        columns that are closer to the column than the length of the path are updated, so that the first column gets
+        the shared potential, and the reduced costs stay non-negative.
+        """
+        counter = itertools.count()
+        column_distances, row_distances, successors = {column: 0}, dict(), dict()
+        finished_columns, finished_rows = dict(), dict()
+        heap = [(0, next(counter), False, column)]
+        length, first = math.inf, None
+        while heap and heap[0][0] < length:
+            distance, _, is_row, node = heapq.heappop(heap)
+            if is_row:
+                if node in finished_rows:
+                    continue
+                finished_rows[node] = distance
+                assigned = self.row_column.get(node)
+                if assigned is not None and distance < column_distances.get(assigned, math.inf):
+                    column_distances[assigned] = distance
+                    heapq.heappush(heap, (distance, next(counter), False, assigned))
+                continue
+            if node in finished_columns or distance > column_distances[node]:
+                continue
+            finished_columns[node] = distance
+            potential = self.column_potentials[node]
+            if distance + self.free_potential - potential - self.offsets[node] < length:
+                length, first = distance + self.free_potential - potential - self.offsets[node], node
+            for row in self.column_rows[node]:
+                if row in finished_rows or self.row_column.get(row) == node:
+                    continue
+                row_distance = distance + max(0, self.edges[row][node] - self.row_potentials[row] - potential)
+                if row_distance < row_distances.get(row, math.inf):
+                    row_distances[row] = row_distance
+                    successors[row] = node
+                    heapq.heappush(heap, (row_distance, next(counter), True, row))
+
+        for finished_column, distance in finished_columns.items():
+            self.column_potentials[finished_column] += max(0, length - distance)
+        for finished_row, distance in finished_rows.items():
+            self.row_potentials[finished_row] -= max(0, length - distance)
+        del self.released[column]
+        if first != column:
+            row = self.column_row.pop(first)
+            while row is not None:
+                next_column = successors[row]
+                next_row = self.column_row.get(next_column)
+                self.row_column[row], self.column_row[next_column] = next_column, row
+                row = next_row
+        self.augmentations += 1
+
+    def __assign(self, root):
+        """
+        Assigns a row that is not assigned along a shortest augmenting path to a column that is not assigned, found with
+        Dijkstra's algorithm from the row, through the columns with an edge to a row and the row that is assigned to
+        a column, and updates the potentials of the rows and columns that are closer to the row than the length of the path,
+        so that the reduced costs of the path become zero.
+        """
+        counter = itertools.count()
+        distances, predecessors, finished, tree_rows = dict(), dict(), dict(), [(root, 0)]
+        heap = []
+        row, distance = root, 0
+        while True:
+            potential = self.row_potentials[row]
+            for column, cost in self.edges[row].items():
+                if column in finished:
+                    continue
+                column_distance = distance + max(0, cost - potential - self.__potential(column))
+                if column_distance < distances.get(column, math.inf):
+                    distances[column] = column_distance
+                    predecessors[column] = row
+                    heapq.heappush(heap, (column_distance, next(counter), column))
+            while heap:
+                distance, _, column = heapq.heappop(heap)
+                if column not in finished and distance <= distances[column]:
+                    break
+            else:
+                return
+            finished[column] = distance
+            if column not in self.column_row:
+                break
+            row = self.column_row[column]
+            tree_rows.append((row, distance))
+
+        self.column_potentials[column] = self.free_potential - self.offsets[column]
+        for finished_column, column_distance in finished.items():
+            self.column_potentials[finished_column] -= distance - column_distance
+        for tree_row, row_distance in tree_rows:
+            self.row_potentials[tree_row] += distance - row_distance
+        while True:
+            row = predecessors[column]
+            previous = self.row_column.get(row)
+            self.row_column[row], self.column_row[column] = column, row
+            if row == root:
+                break
+            column = previous
+        self.augmentations += 1
+
+    def solve(self, edges, offsets):
+        """
+        Returns the optimal assignment of a problem as a dict of row to column. A row without an augmenting path, which
+        cannot happen if every row has an edge to a column of its own, is not assigned.
+
+        :param edges: a dict of row to a dict of column to the cost of their edge. Every column must have an offset.
+        :param offsets: a dict of column to its offset.
+        """
+        for row in [row for row in self.edges if row not in edges]:
+            if row in self.row_column:
+                self.__release(row)
+            for column in self.edges[row]:
+                if column in self.column_rows:
+                    self.column_rows[column].discard(row)
+            del self.edges[row], self.row_potentials[row]
+        for column in [column for column in self.offsets if column not in offsets]:
+            if column in self.column_row:
+                del self.row_column[self.column_row.pop(column)]
+            self.released.pop(column, None)
+            self.column_potentials.pop(column, None)
+            del self.offsets[column], self.column_rows[column]
+
+        checked = []
+        for column, offset in offsets.items():
+            if column not in self.offsets:
+                self.column_rows[column] = set()
+                checked.append(column)
+            elif self.offsets[column] != offset:
+                if column in self.column_row or column in self.released:
+                    # the reduced costs do not change, but a potential above the shared potential is lowered to it
+                    if self.column_potentials[column] + offset > self.free_potential + self.tolerance:
+                        if column in self.column_row:
+                            del self.row_column[self.column_row.pop(column)]
+                        self.released.pop(column, None)
+                else:
+                    checked.append(column)
+            self.offsets[column] = offset
+
+        for row, row_edges in edges.items():
+            if self.edges.get(row) != row_edges:
+                self.__update_row(row, row_edges)
+        for column in checked:
+            self.__check_column(column)
+
+        while self.released:
+            column = next(iter(self.released))
+            if self.column_potentials[column] + self.offsets[column] >= self.free_potential - self.tolerance:
+                del self.released[column]
+            else:
+                self.__give_up(column)
+        for row in edges:
+            if row not in self.row_column:
+                self.__assign(row)
+        return {row: self.row_column[row] for row in edges if row in self.row_column}
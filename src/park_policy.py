@@ -6,24 +6,38 @@ import copy
 from policy import Policy
 
 class ParkPolicy(Policy):
-    def __init__(self, next_task_distribution, predictor, task_type_occurrences):
+    def __init__(self, next_task_distribution, predictor, task_type_occurrences, decompose=False, workers=1):
         self.next_task_distribution = next_task_distribution
         self.predictor = predictor
         self.task_type_occurrences = task_type_occurrences
+        # whether to solve each connected component of the resource pools separately, see Policy.allocate_components
+        self.decompose = decompose
+        self.workers = workers
 
         self.num_postponed = 0
         self.num_allocated = 0
 
+    def get_next_task_type(self, task_type):
+        return sorted(self.next_task_distribution[task_type], key=lambda e : e[0], reverse=True)[0][1]
+
+    def linked_task_types(self, resource_pool):
+        # the next task of a task competes with the tasks of the resources of its own task type
+        links = []
+        for task_type in resource_pool:
+            if task_type not in self.next_task_distribution:
+                continue
+            next_task_type = self.get_next_task_type(task_type)
+            if next_task_type != None:
+                links.append((task_type, next_task_type))
+        return links
+
     def get_next_tasks(self, unassigned_tasks, task_costs):
         next_tasks = []
         next_task_penalties = dict()
         previous_tasks = dict()
         next_task_type_occurrences = copy.deepcopy(self.task_type_occurrences)
-        get_next_task_type = lambda task : sorted(self.next_task_distribution[task.task_type],
-                                                  key=lambda e : e[0],
-                                                  reverse=True)[0][1]
         for unassigned_task in unassigned_tasks:
-            next_task_type = get_next_task_type(unassigned_task)
+            next_task_type = self.get_next_task_type(unassigned_task.task_type)
             if next_task_type != None:
                 next_task = copy.copy(unassigned_task)
                 next_task_type_occurrences[unassigned_task.case_id][unassigned_task.task_type] += 1
@@ -38,35 +52,25 @@ class ParkPolicy(Policy):
         self.predictor.predict(next_tasks, resource_pool)
 
     def do_matching(self, relevant_task_data, num_tasks, num_resources, reduction = 0):
-        start_nodes = [0 for i in range(num_resources)]
-        end_nodes = [i+1 for i in range(num_resources)]
-        capacities = [1 for i in range(num_resources)]
-        costs = [0 for i in range(num_resources)]
-        for task_ix, resource_ix, d in relevant_task_data:
-            start_nodes += [resource_ix+1]
-            end_nodes += [num_resources+1+task_ix]
-            capacities += [1]
-            costs += [d]
-
-        start_nodes += [num_resources+1+task_ix for task_ix in range(num_tasks)]
-        end_nodes += [num_tasks+num_resources+1 for task_ix in range(num_tasks)]
-        capacities += [1 for i in range(num_tasks)]
-        costs += [0 for i in range(num_tasks)]
-
-        supplies = [min(num_tasks, num_resources) - reduction] +\
-                    [0 for i in range(num_tasks + num_resources)] +\
-                    [-min(num_tasks, num_resources) + reduction]
+        # node 0 is the source, nodes 1 to num_resources the resources, the next num_tasks nodes the tasks, and the last
+        # node the sink, and the arcs of the resources come first, then the arcs of relevant_task_data in order
+        task_data = np.asarray(relevant_task_data, dtype=np.int64).reshape(-1, 3)
+        sink = num_tasks + num_resources + 1
+        start_nodes = np.concatenate([np.zeros(num_resources, dtype=np.int32), (task_data[:, 1] + 1).astype(np.int32),
+                                      np.arange(num_resources + 1, sink, dtype=np.int32)])
+        end_nodes = np.concatenate([np.arange(1, num_resources + 1, dtype=np.int32),
+                                    (task_data[:, 0] + num_resources + 1).astype(np.int32),
+                                    np.full(num_tasks, sink, dtype=np.int32)])
+        capacities = np.ones(len(start_nodes), dtype=np.int64)
+        costs = np.concatenate([np.zeros(num_resources, dtype=np.int64), task_data[:, 2], np.zeros(num_tasks, dtype=np.int64)])
+
+        supplies = np.zeros(sink + 1, dtype=np.int64)
+        supplies[0] = min(num_tasks, num_resources) - reduction
+        supplies[sink] = -min(num_tasks, num_resources) + reduction
 
         smcf = min_cost_flow.SimpleMinCostFlow()
-
-        # Add each arc.
-        for i in range(len(start_nodes)):
-            smcf.add_arc_with_capacity_and_unit_cost(
-                start_nodes[i], end_nodes[i], capacities[i], costs[i]
-            )
-        # Add node supplies.
-        for i in range(len(supplies)):
-            smcf.set_node_supply(i, supplies[i])
+        smcf.add_arcs_with_capacity_and_unit_cost(start_nodes, end_nodes, capacities, costs)
+        smcf.set_nodes_supplies(np.arange(sink + 1, dtype=np.int32), supplies)
 
         # Sometimes there exists no matching for all resources
         # e.g. because all tasks can only be conduced by one resource
@@ -76,6 +80,15 @@ class ParkPolicy(Policy):
 
     def allocate(self, unassigned_tasks, available_resources, resource_pool, trd,
                  occupations, fairness, task_costs, working_resources, current_time):
+        if self.decompose:
+            return self.allocate_components(self.allocate_component, unassigned_tasks, available_resources, resource_pool,
+                                            trd, occupations, fairness, task_costs, working_resources, current_time,
+                                            self.workers)
+        return self.allocate_component(unassigned_tasks, available_resources, resource_pool, trd,
+                                       occupations, fairness, task_costs, working_resources, current_time)
+
+    def allocate_component(self, unassigned_tasks, available_resources, resource_pool, trd,
+                 occupations, fairness, task_costs, working_resources, current_time):
         relevant_resources = set(available_resources) | set(working_resources.keys())
 
         next_tasks, previous_tasks, next_task_penalties, next_task_type_occurrences =\
@@ -128,12 +141,10 @@ class ParkPolicy(Policy):
 
         smcf, status = self.do_matching(relevant_task_data, num_tasks, num_resources)
 
-        selected = []
-        for arc in range(smcf.num_arcs()):
-            if smcf.tail(arc) != 0 and smcf.head(arc) != num_tasks+num_resources+1:
-                if smcf.flow(arc) > 0:
-                    selected.append((swaped_tasks_dict[smcf.head(arc) - num_resources - 1],
-                                        swaped_resources_dict[smcf.tail(arc) - 1]))
+        # the flows of the arcs of relevant_task_data, which follow the arcs of the resources
+        flows = smcf.flows(np.arange(num_resources, num_resources + len(relevant_task_data), dtype=np.int32))
+        selected = [(swaped_tasks_dict[task_ix], swaped_resources_dict[resource_ix])
+                    for (task_ix, resource_ix, d), flow in zip(relevant_task_data, flows.tolist()) if flow > 0]
 
 
         selected_size = len(selected)
@@ -22,7 +22,9 @@ class Planner:
                  activity_names,
                  predict_multiple = False,
                  hour_timeout = math.inf,
-                 debug = False):
+                 debug = False,
+                 online_trainer = None,
+                 corpus = None):
         self.activity_names = activity_names
         self.debug = debug
         self.stop = False # Tell simulator to stop
@@ -30,7 +32,9 @@ class Planner:
         self.prediction_model = prediction_model
         self.task_started = dict()
         self.task_type_occurrences = dict()
-        self.task_resource_duration = dict()
+        self.observations = task_execution_time.ObservationBuffer(activity_names)
+        self.online_trainer = online_trainer
+        self.corpus = corpus # a PlanningCorpus to which the inputs of the allocations are captured, if any
         self.current_time, self.warm_up_time = 0, warm_up_time
         self.is_warm_up = True
         self.warm_up_policy, self.policy = warm_up_policy, policy
@@ -66,6 +70,21 @@ class Planner:
             assignments = self.warm_up_policy.allocate(unassigned_tasks,
                                                available_resources,
                                                resource_pool)
+        elif not self.policy.uses_predictions:
+            occupations = self.get_resource_occupations()
+            if self.corpus is not None:
+                self.corpus.record(unassigned_tasks, available_resources, resource_pool, dict(), occupations, dict(),
+                                   dict(), self.working_resources, self.current_time, self.task_type_occurrences)
+            assignments = self.policy.allocate(unassigned_tasks,
+                                               available_resources,
+                                               resource_pool,
+                                               dict(),
+                                               occupations,
+                                               dict(),
+                                               dict(),
+                                               self.working_resources,
+                                               self.current_time)
+            self.num_assignments += len(assignments)
         else:
             # Predict task x resource durations
             trds, task_costs = self.predictor.predict(unassigned_tasks,
@@ -79,6 +98,10 @@ class Planner:
             # Get resource fairnesses
             fairness = self.get_resource_fairness(occupations)
 
+            if self.corpus is not None:
+                self.corpus.record(unassigned_tasks, available_resources, resource_pool, trds, occupations, fairness,
+                                   task_costs, self.working_resources, self.current_time, self.task_type_occurrences)
+
             # Make allocation decision
             assignments = self.policy.allocate(unassigned_tasks,
                                                available_resources,
@@ -104,9 +127,12 @@ class Planner:
         self.current_time = event.timestamp
 
         if self.is_warm_up and self.current_time > self.warm_up_time:
-            self.predictor.train(self.resources, self.task_resource_duration, self.task_type_occurrences)
+            self.predictor.train_observations(self.resources, self.observations)
             self.is_warm_up = False
 
+        if self.online_trainer is not None and not self.is_warm_up:
+            self.online_trainer.update(self.current_time)
+
         if event.lifecycle_state == EventType.CASE_ARRIVAL:
             self.case_arival(event)
             self.task_type_occurrences[event.case_id] = dict.fromkeys(self.activity_names, 0)
@@ -118,7 +144,7 @@ class Planner:
 
         elif event.lifecycle_state == EventType.START_TASK:
             self.task_started[event.task] = event.timestamp
-            if self.is_warm_up:
+            if self.is_warm_up or not self.policy.uses_predictions:
                 predicted_duration = 0
             else:
                 predicted_duration = self.prediction_model.predict(event.task, event.resource, self.task_type_occurrences[event.case_id])
@@ -130,14 +156,16 @@ class Planner:
             duration = event.timestamp - self.task_started[event.task]
             self.task_started.pop(event.task)
             if self.is_warm_up:
-                self.task_resource_duration[(event.task, event.resource)] = duration
+                self.observations.append(self.task_type_occurrences[event.case_id], event.task, event.resource, duration)
+            elif self.online_trainer is not None:
+                self.online_trainer.observe(self.task_type_occurrences[event.case_id], event.task, event.resource, duration)
             del self.working_resources[event.resource]
             self.task_queue.pop(event.task)
 
         elif event.lifecycle_state == EventType.COMPLETE_CASE:
             self.complete_case(event)
-            if not self.is_warm_up:
-                self.task_type_occurrences.pop(event.case_id)
+            self.task_type_occurrences.pop(event.case_id)
+            if not self.is_warm_up and self.policy.uses_predictions:
                 self.prediction_model.delete_case_from_cache(event.case_id)
 
     def resource_update(self, available_resources, unassigned_tasks, resource_pool):
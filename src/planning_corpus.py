@@ -0,0 +1,117 @@
+import pickle
+import numpy as np
+
+from simulator.problems import Task
+
+
+class PlanningCorpus:
+    """
+    A corpus of planning instances on disk: the inputs of the allocation calls of a planner, which can be replayed through
+    the allocate function of any policy, without simulating. Every call is appended to the file as one pickled record, so
+    the corpus is written while the simulation runs and read back one call at a time. The records are compact: resources
+    and tasks are stored once, in the first record in which they occur, and referred to by their index after that,
+    and the durations, costs, occupations, and task type occurrences are stored as NumPy arrays.
+
+    :param path: the file of the corpus, to which records are appended.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.resources = dict()
+        self.tasks = dict()
+        self.nr_records = 0
+
+    def __resource_indices(self, resources, new_resources):
+        indices = []
+        for resource in resources:
+            if resource not in self.resources:
+                self.resources[resource] = len(self.resources)
+                new_resources.append(resource)
+            indices.append(self.resources[resource])
+        return np.array(indices, dtype=np.int32)
+
+    def __task_indices(self, tasks, new_tasks):
+        indices = []
+        for task in tasks:
+            if task not in self.tasks:
+                self.tasks[task] = len(self.tasks)
+                new_tasks.append((task.id, task.case_id, task.task_type, task.data))
+            indices.append(self.tasks[task])
+        return np.array(indices, dtype=np.int32)
+
+    def record(self, unassigned_tasks, available_resources, resource_pool, trd,
+               occupations, fairness, task_costs, working_resources, current_time, task_type_occurrences):
+        """
+        Appends the inputs of an allocation call to the corpus, with the task type occurrences of the cases of the
+        unassigned tasks, which policies that predict the next tasks of the cases need.
+        """
+        new_resources, new_tasks = [], []
+        record = {'current_time': current_time,
+                  'tasks': self.__task_indices(unassigned_tasks, new_tasks),
+                  'available_resources': self.__resource_indices(available_resources, new_resources),
+                  'trd': (self.__task_indices([task for task, resource in trd], new_tasks),
+                          self.__resource_indices([resource for task, resource in trd], new_resources),
+                          np.array(list(trd.values()), dtype=np.float64)),
+                  'task_costs': (self.__task_indices(task_costs.keys(), new_tasks),
+                                 np.array(list(task_costs.values()), dtype=np.float64)),
+                  'occupations': (self.__resource_indices(occupations.keys(), new_resources),
+                                  np.array(list(occupations.values()), dtype=np.float64)),
+                  'fairness': (self.__resource_indices(fairness.keys(), new_resources),
+                               np.array(list(fairness.values()), dtype=np.float64)),
+                  'working_resources': (self.__resource_indices(working_resources.keys(), new_resources),
+                                        np.array(list(working_resources.values()), dtype=np.float64).reshape(-1, 2))}
+        case_ids = list(dict.fromkeys(task.case_id for task in unassigned_tasks if task.case_id in task_type_occurrences))
+        activity_names = list(task_type_occurrences[case_ids[0]]) if case_ids else []
+        record['task_type_occurrences'] = (case_ids, activity_names,
+                                           np.array([[task_type_occurrences[case_id][activity_name] for activity_name in activity_names]
+                                                     for case_id in case_ids], dtype=np.int32).reshape(len(case_ids), len(activity_names)))
+        record['new_resources'], record['new_tasks'] = new_resources, new_tasks
+        if self.file is None:
+            self.file = open(self.path, 'ab')
+            record['resource_pool'] = resource_pool
+        pickle.dump(record, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.file.flush()
+        self.nr_records += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    @staticmethod
+    def read(path):
+        """
+        Reads the allocation calls of a corpus one at a time. Each call is a dict with the arguments of Policy.allocate
+        by name, and task_type_occurrences, a dict of case id to the occurrences of each task type, as the planner keeps
+        them. Every call returns new dicts, which a policy may change, but the same Task objects for the same tasks.
+        """
+        resources, tasks = [], []
+        resource_pool = None
+        with open(path, 'rb') as file:
+            while True:
+                try:
+                    record = pickle.load(file)
+                except EOFError:
+                    return
+                resource_pool = record.get('resource_pool', resource_pool)
+                resources.extend(record['new_resources'])
+                for task_id, case_id, task_type, data in record['new_tasks']:
+                    task = Task(task_id, case_id, task_type)
+                    task.data = data
+                    tasks.append(task)
+
+                decode = lambda items, indices, values: dict(zip([items[i] for i in indices.tolist()], values.tolist()))
+                trd_tasks, trd_resources, durations = record['trd']
+                case_ids, activity_names, occurrences = record['task_type_occurrences']
+                yield {'unassigned_tasks': [tasks[i] for i in record['tasks'].tolist()],
+                       'available_resources': {resources[i] for i in record['available_resources'].tolist()},
+                       'resource_pool': resource_pool,
+                       'trd': {(tasks[t], resources[r]): d
+                               for t, r, d in zip(trd_tasks.tolist(), trd_resources.tolist(), durations.tolist())},
+                       'occupations': decode(resources, *record['occupations']),
+                       'fairness': decode(resources, *record['fairness']),
+                       'task_costs': decode(tasks, *record['task_costs']),
+                       'working_resources': {resource: tuple(value) for resource, value in decode(resources, *record['working_resources']).items()},
+                       'current_time': record['current_time'],
+                       'task_type_occurrences': {case_id: dict(zip(activity_names, row))
+                                                 for case_id, row in zip(case_ids, occurrences.tolist())}}
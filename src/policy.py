@@ -3,8 +3,12 @@ import math
 import collections
 import random
 import itertools
+import concurrent.futures
 
 class Policy:
+    # whether the policy uses the predicted task durations and resource occupations, if not, the planner does not predict
+    uses_predictions = True
+
     def get_task_data_from_trd(self, trd, factor=3600):
         resources_dict, task_dict = dict(), dict()
         task_data = []
@@ -46,6 +50,89 @@ class Policy:
                 pruned_trd[(task, resource)] = trd[(task, resource)]
         return pruned_trd
 
+    def linked_task_types(self, resource_pool):
+        """
+        Returns the pairs of task types that the allocation of a policy couples, besides sharing resources,
+        so that allocate_components keeps them in the same component. By default there are none.
+        """
+        return []
+
+    def resource_pool_components(self, resource_pool):
+        """
+        Returns the connected components of the bipartite graph in which each task type is connected to the resources of
+        its resource pool, and to its linked task types, as a dict of task type to the index of its component and a dict of
+        resource to the index of its component.
+        """
+        neighbours = collections.defaultdict(set)
+        for task_type, pool in resource_pool.items():
+            neighbours[('task type', task_type)]
+            for resource in pool:
+                neighbours[('task type', task_type)].add(('resource', resource))
+                neighbours[('resource', resource)].add(('task type', task_type))
+        for task_type, linked_task_type in self.linked_task_types(resource_pool):
+            neighbours[('task type', task_type)].add(('task type', linked_task_type))
+            neighbours[('task type', linked_task_type)].add(('task type', task_type))
+
+        components = dict()
+        for node in neighbours:
+            if node in components:
+                continue
+            component = len(set(components.values()))
+            components[node] = component
+            stack = [node]
+            while stack:
+                for neighbour in neighbours[stack.pop()]:
+                    if neighbour not in components:
+                        components[neighbour] = component
+                        stack.append(neighbour)
+        task_type_components = {name: component for (kind, name), component in components.items() if kind == 'task type'}
+        resource_components = {name: component for (kind, name), component in components.items() if kind == 'resource'}
+        return task_type_components, resource_components
+
+    def allocate_components(self, allocate, unassigned_tasks, available_resources, resource_pool, trd,
+                            occupations, fairness, task_costs, working_resources, current_time, workers=1):
+        """
+        Allocates the tasks by solving each connected component of the graph of task types and resources of
+        resource_pool_components separately with allocate, a function with the arguments of Policy.allocate,
+        and merges the assignments in the order of their tasks in unassigned_tasks. A task can only be assigned to a resource of its own component, so the components
+        are independent allocation problems, of which the size is a fraction of the size of the whole problem.
+        Components without available resources, or without predicted durations, are skipped, because none of their tasks
+        can be assigned.
+
+        :param workers: the number of threads that solve the components, 1 solves them one by one. With more workers,
+            allocate must be thread safe. The CP-SAT solver releases the GIL while it solves.
+        :return: the assignments of all components.
+        """
+        task_type_components, resource_components = self.resource_pool_components(resource_pool)
+        components = collections.defaultdict(lambda: ([], set(), dict(), dict(), dict()))
+        for task in unassigned_tasks:
+            components[task_type_components[task.task_type]][0].append(task)
+        for resource in available_resources:
+            if resource in resource_components:
+                components[resource_components[resource]][1].add(resource)
+        for resource, working in working_resources.items():
+            if resource in resource_components:
+                components[resource_components[resource]][2][resource] = working
+        for (task, resource), duration in trd.items():
+            component = task_type_components[task.task_type]
+            if resource_components.get(resource) == component:
+                components[component][3][(task, resource)] = duration
+        for task, cost in task_costs.items():
+            components[task_type_components[task.task_type]][4][task] = cost
+
+        arguments = [(component_tasks, component_available_resources, resource_pool, component_trd,
+                      occupations, fairness, component_task_costs, component_working_resources, current_time)
+                     for component_tasks, component_available_resources, component_working_resources, component_trd, component_task_costs
+                     in components.values()
+                     if component_tasks and component_available_resources and component_trd]
+        if workers > 1 and len(arguments) > 1:
+            with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+                results = list(executor.map(lambda a: allocate(*a), arguments))
+        else:
+            results = [allocate(*a) for a in arguments]
+        order = {task: i for i, task in enumerate(unassigned_tasks)}
+        return sorted([assignment for result in results for assignment in result], key=lambda a: order[a[0]])
+
 class FastestTaskFirst(Policy):
     def allocate(self, unassigned_tasks, available_resources, resource_pool, trd,
                  occupations, fairness, task_costs, working_resources, current_time):
@@ -103,7 +190,7 @@ class GreedyParallelMachinesSchedulingPolicy(Policy):
         resource_times = machines_start.copy()
         schedule = collections.defaultdict(list)
 
-        for task in range(max_task+1):
+        for i in range(max_task+1):
             min_max_time = math.inf
             selected_resource = None
             
@@ -112,11 +199,11 @@ class GreedyParallelMachinesSchedulingPolicy(Policy):
             for j, feasible_resource in enumerate(feasible_resources):
                 rt = resource_times[feasible_resource[1]] + feasible_resource[2]
                 if rt < min_resource_time:
-                    #pre allocate task to resource
                     min_resource_time, min_resource = rt, feasible_resource[1]
-                    schedule[min_resource] += [(resource_times[min_resource], feasible_resource[0])]
 
             #print(i, min_resource, min_resource_time)
+            # allocate the task to the resource that finishes it first, after the tasks allocated to it before
+            schedule[min_resource] += [(resource_times[min_resource], i)]
             resource_times[min_resource] = min_resource_time
 
         greedy_resource_time = max(resource_times.values())
@@ -142,7 +229,7 @@ class GreedyParallelMachinesSchedulingPolicy(Policy):
 
         selected = []
         for resource, tasks in schedule.items():
-            task = swaped_tasks_dict[tasks[0][0]]
+            task = swaped_tasks_dict[tasks[0][1]]
             resource = swaped_resources_dict[resource]
             selected.append([task, resource])
 
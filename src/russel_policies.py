@@ -5,6 +5,8 @@ import random
 from policy import Policy
 
 class RoundRobinPolicy(Policy):
+    uses_predictions = False
+
     def __init__(self):
         self.num_allocated = 0
         self.num_postponed = 0
@@ -69,6 +71,8 @@ class RoundRobinPolicy(Policy):
 
 
 class RandomPolicy(Policy):
+    uses_predictions = False
+
     def __init__(self):
         self.num_allocated = 0
         self.num_postponed = 0
@@ -93,6 +97,8 @@ class RandomPolicy(Policy):
     
 
 class ShortestQueuePolicy(Policy):
+    uses_predictions = False
+
     def __init__(self):
         self.num_allocated = 0
         self.num_postponed = 0
@@ -3,6 +3,7 @@ import random
 import scipy
 import numpy as np
 from enum import Enum, auto
+from abc import ABC, abstractmethod
 from sklearn.preprocessing import StandardScaler, MinMaxScaler, OneHotEncoder
 from sklearn.neural_network import MLPRegressor
 
@@ -40,18 +41,164 @@ class DistributionType(Enum):
     :meta hide-value:"""
 
 
+def seed_sequence(seed):
+    """Returns the seed as a numpy.random.SeedSequence, from which child seeds can be spawned."""
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+
+class BufferedDistribution(ABC):
+    """
+    Abstract base class for distributions that serve their samples from a buffer of random variates.
+    Drawing a single variate from scipy.stats costs tens of microseconds, so the buffer is filled with
+    buffer_size variates at a time by a subclass's :meth:`_draw`, using the distribution's own
+    numpy.random.Generator. The buffer is refilled when it is empty or when the parameters of the distribution
+    changed since it was filled.
+
+    Each distribution can be seeded with :meth:`seed`. A distribution that is not seeded gets a seed from
+    the global numpy.random state when it is first sampled, so numpy.random.seed still makes runs reproducible.
+    The generator and the buffer are not saved when the distribution is pickled.
+    """
+    buffer_size = 1024
+
+    def seed(self, seed=None):
+        """
+        Seeds the generator of the distribution and empties its buffer.
+
+        :param seed: a seed that numpy.random.default_rng accepts, e.g. an int or a numpy.random.SeedSequence.
+        """
+        self._generator = np.random.default_rng(seed)
+        self._buffer = []
+
+    @abstractmethod
+    def _parameters(self):
+        """Returns the parameters of the distribution as a tuple, to detect that the buffer is stale."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _draw(self, generator, size):
+        """Returns a NumPy array of size variates, drawn with the generator."""
+        raise NotImplementedError
+
+    def generator(self):
+        """Returns the numpy.random.Generator of the distribution, seeding it from numpy.random if it is not seeded."""
+        if getattr(self, '_generator', None) is None:  # distributions that were saved before buffering existed
+            self.seed(np.random.randint(2**31))
+        return self._generator
+
+    def sample(self):
+        buffer = getattr(self, '_buffer', None)
+        parameters = self._parameters()
+        if not buffer or parameters != self._buffer_parameters:
+            # reversed, so that variates are popped from the end of the list in the order in which they were drawn
+            buffer = self._buffer = self._draw(self.generator(), self.buffer_size)[::-1].tolist()
+            self._buffer_parameters = parameters
+        return buffer.pop()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for attribute in ('_generator', '_buffer', '_buffer_parameters'):
+            state.pop(attribute, None)
+        return state
+
+
+class AliasTable(BufferedDistribution):
+    """
+    A discrete distribution over a list of values, compiled with Vose's alias method,
+    so that a sample takes O(1) time regardless of the number of values.
+    The weights are validated when the table is compiled.
+
+    :param values: the values that can be sampled.
+    :param weights: a non-negative weight for each value, which need not be normalized.
+    :param tolerance: if not None, the weights are probabilities, which must add up to 1.0 within the tolerance.
+    """
+
+    def __init__(self, values, weights, tolerance=None):
+        weights = np.asarray(weights, dtype=float)
+        if len(values) == 0 or len(values) != len(weights):
+            raise ValueError("An alias table needs one weight for each of at least one value.")
+        if not np.all(np.isfinite(weights)) or np.any(weights < 0):
+            raise ValueError("The weights of an alias table must be finite and non-negative, not " + str(list(weights)) + ".")
+        total = weights.sum()
+        if total <= 0:
+            raise ValueError("The weights of an alias table must not all be zero.")
+        if tolerance is not None and abs(total - 1.0) > tolerance:
+            raise ValueError("The probabilities of " + str(list(values)) + " add up to " + str(total) + " instead of 1.0.")
+
+        n = len(weights)
+        scaled = weights * n / total
+        probability = np.ones(n)
+        alias = np.arange(n)
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probability[less] = scaled[less]
+            alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # what remains in small or large has probability 1.0, up to rounding errors
+
+        self._values = list(values)
+        self._probability = probability
+        self._alias = alias
+        self._buffer = []
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._buffer = []
+
+    def _parameters(self):
+        return ()
+
+    def _draw(self, generator, size):
+        columns = generator.integers(0, len(self._values), size)
+        return np.where(generator.random(size) < self._probability[columns], columns, self._alias[columns])
+
+    def sample(self):
+        # the parameters of the table never change, so the buffer holds the values themselves
+        buffer = self._buffer
+        if not buffer:
+            values = self._values
+            buffer = self._buffer = [values[i] for i in self._draw(self.generator(), self.buffer_size)[::-1]]
+        return buffer.pop()
+
+    def sample_many(self, size):
+        """
+        Draws a batch of samples at once.
+
+        :param size: the number of samples.
+        :return: a list of values.
+        """
+        values = self._values
+        return [values[i] for i in self._draw(self.generator(), size)]
+
+
 class CategoricalDistribution:
+    categorical = True
 
     def __init__(self):
         self._values = []
         self._weights = []
+        self._table = None
 
     def learn(self, values, counts):
         self._values = values
         self._weights = counts
+        self._table = AliasTable(values, counts)
+
+    def _alias_table(self):
+        if getattr(self, '_table', None) is None:  # distributions that were saved before alias tables existed
+            self._table = AliasTable(self._values, self._weights)
+        return self._table
+
+    def seed(self, seed=None):
+        self._alias_table().seed(seed)
 
     def sample(self):
-        return random.choices(self._values, weights=self._weights)[0]
+        return self._alias_table().sample()
+
+    def sample_many(self, size):
+        return self._alias_table().sample_many(size)
 
 
 class UniformDistribution:
@@ -68,7 +215,7 @@ class UniformDistribution:
         return random.uniform(self.minimum, self.maximum)
 
 
-class GammaDistribution:
+class GammaDistribution(BufferedDistribution):
 
     def __init__(self):
         self._alpha = 0
@@ -81,11 +228,14 @@ class GammaDistribution:
         self._loc = fit_loc
         self._scale = fit_scale
 
-    def sample(self):
-        return scipy.stats.gamma.rvs(self._alpha, loc=self._loc, scale=self._scale)
+    def _parameters(self):
+        return self._alpha, self._loc, self._scale
+
+    def _draw(self, generator, size):
+        return scipy.stats.gamma.rvs(self._alpha, loc=self._loc, scale=self._scale, size=size, random_state=generator)
 
 
-class ErlangDistribution:
+class ErlangDistribution(BufferedDistribution):
 
     def __init__(self):
         self._shape = 0
@@ -100,8 +250,11 @@ class ErlangDistribution:
         self._shape = shape
         self._rate = scale
 
-    def sample(self):
-        return scipy.stats.erlang.rvs(self._shape, scale=self._rate)
+    def _parameters(self):
+        return self._shape, self._rate
+
+    def _draw(self, generator, size):
+        return scipy.stats.erlang.rvs(self._shape, scale=self._rate, size=size, random_state=generator)
 
     def mean(self):
         return scipy.stats.erlang.mean(self._shape, scale=self._rate)
@@ -113,7 +266,7 @@ class ErlangDistribution:
         return scipy.stats.erlang.var(self._shape, scale=self._rate)
 
 
-class NormalDistribution:
+class NormalDistribution(BufferedDistribution):
 
     def __init__(self, mu = 0, std = 0):
         self.mu = mu
@@ -124,11 +277,14 @@ class NormalDistribution:
         self.mu = fit_mu
         self.std = fit_std
 
-    def sample(self):
-        return scipy.stats.norm.rvs(self.mu, self.std)
+    def _parameters(self):
+        return self.mu, self.std
 
+    def _draw(self, generator, size):
+        return scipy.stats.norm.rvs(self.mu, self.std, size=size, random_state=generator)
 
-class BetaDistribution:
+
+class BetaDistribution(BufferedDistribution):
 
     def __init__(self):
         self._a = 0
@@ -143,8 +299,11 @@ class BetaDistribution:
         self._loc = fit_loc
         self._scale = fit_scale
 
-    def sample(self):
-        return scipy.stats.beta.rvs(self._a, self._b, self._loc, self._scale)
+    def _parameters(self):
+        return self._a, self._b, self._loc, self._scale
+
+    def _draw(self, generator, size):
+        return scipy.stats.beta.rvs(self._a, self._b, self._loc, self._scale, size=size, random_state=generator)
 
 
 class StratifiedNumericDistribution:
@@ -226,8 +385,40 @@ class StratifiedNumericDistribution:
                 if self._stratified_errors[pv].std > pv_max_error_std:
                     self._stratified_errors[pv] = NormalDistribution(0, pv_max_error_std)
 
-    # features is a dictionary that maps feature labels to lists of values
+    def __getstate__(self):
+        # the compiled sampler is rebuilt on demand and is not saved with the distribution
+        state = self.__dict__.copy()
+        state.pop('_sampler', None)
+        return state
+
+    def compile(self):
+        """
+        Compiles the learned distribution into a :class:`.CompiledStratifiedSampler`, which is used by :meth:`sample`.
+
+        :return: the compiled sampler.
+        """
+        self._sampler = CompiledStratifiedSampler(self)
+        return self._sampler
+
+    def seed(self, seed=None):
+        """
+        Seeds the error distributions, each with its own child seed of the specified seed.
+
+        :param seed: an int, a numpy.random.SeedSequence, or None for a fresh seed.
+        """
+        errors = list({id(error): error for error in self._stratified_errors.values()}.values())
+        for error, child_seed in zip(errors, seed_sequence(seed).spawn(len(errors))):
+            error.seed(child_seed)
+
+    # features is a dictionary that maps feature labels to values
     def sample(self, features):
+        sampler = getattr(self, '_sampler', None)  # distributions that were saved before compilation existed
+        if sampler is None:
+            sampler = self.compile()
+        return sampler.sample(features)
+
+    # samples through the sklearn transformers and regressor, which is slow, but is the reference for the compiled sampler
+    def sample_with_sklearn(self, features):
         data = pandas.DataFrame(features, index=[1])
 
         if self._standardization_columns:
@@ -256,15 +447,186 @@ class StratifiedNumericDistribution:
             return processing_time
 
 
+class CompiledStratifiedSampler:
+    """
+    A fast sampler for a learned :class:`.StratifiedNumericDistribution`, which draws from the same distribution
+    as :meth:`.StratifiedNumericDistribution.sample_with_sklearn`, but without pandas and sklearn in the loop:
+
+    * the standardizer, normalizer and one-hot encoder are compiled into arrays and a category -> column index map;
+    * the weights of the MLP regressor are extracted, so a prediction is a few NumPy matrix multiplications;
+    * the predicted mean is memoized per feature vector, i.e. per (activity, resource, history, data);
+    * the normally distributed errors are drawn from the buffered :class:`.NormalDistribution` of the stratum.
+
+    :param distribution: the learned :class:`.StratifiedNumericDistribution`.
+    :param max_memo_size: the maximum number of memoized predictions, after which the memo is cleared.
+    """
+    ACTIVATIONS = {
+        'identity': lambda x: x,
+        'relu': lambda x: np.maximum(x, 0),
+        'tanh': np.tanh,
+        'logistic': lambda x: 1 / (1 + np.exp(-x)),
+    }
+
+    def __init__(self, distribution, max_memo_size=100000):
+        self._stratifier = distribution._stratifier
+        self._overall_mean = distribution._overall_mean
+        self._max_memo_size = max_memo_size
+
+        # the features are encoded in the order standardized, normalized, onehot, which is also the order of the memo keys
+        self._standardization_columns = list(distribution._standardization_columns)
+        self._rest_columns = list(distribution._rest_columns)
+        self._onehot_columns = list(distribution._onehot_columns)
+        self._columns = self._standardization_columns + self._rest_columns + self._onehot_columns
+        self._nr_numeric = len(self._standardization_columns) + len(self._rest_columns)
+
+        standardizer = distribution._standardizer
+        if self._standardization_columns:
+            self._standard_mean = standardizer.mean_ if standardizer.with_mean else np.zeros(len(self._standardization_columns))
+            self._standard_scale = standardizer.scale_ if standardizer.with_std else np.ones(len(self._standardization_columns))
+        normalizer = distribution._normalizer
+        self._minmax_scale = normalizer.scale_
+        self._minmax_min = normalizer.min_
+        self._minmax_clip = getattr(normalizer, 'clip', False)
+        self._minmax_range = normalizer.feature_range
+
+        encoder = distribution._encoder
+        if getattr(encoder, 'drop_idx_', None) is not None:
+            raise ValueError("Cannot compile a one-hot encoder that drops categories.")
+        self._category_index = []
+        offset = self._nr_numeric
+        for categories in encoder.categories_:
+            self._category_index.append({category: offset + i for i, category in enumerate(categories)})
+            offset += len(categories)
+        self._width = offset
+
+        regressor = distribution._regressor
+        self._coefs = [np.asarray(coef) for coef in regressor.coefs_]
+        self._intercepts = [np.asarray(intercept) for intercept in regressor.intercepts_]
+        self._hidden_activation = self.ACTIVATIONS[regressor.activation]
+        self._output_activation = self.ACTIVATIONS[regressor.out_activation_]
+
+        self._errors = distribution._stratified_errors
+        self._memo = dict()
+
+    def encode(self, values):
+        """
+        Encodes feature values in the same way as the sklearn transformers of the distribution.
+
+        :param values: the feature values in the order of the compiled columns.
+        :return: a 1 x width NumPy array.
+        """
+        x = np.zeros((1, self._width))
+        nr_standardized = len(self._standardization_columns)
+        if nr_standardized:
+            x[0, :nr_standardized] = (np.array(values[:nr_standardized], dtype=float) - self._standard_mean) / self._standard_scale
+        normalized = np.array(values[nr_standardized:self._nr_numeric], dtype=float) * self._minmax_scale + self._minmax_min
+        if self._minmax_clip:
+            normalized = np.clip(normalized, self._minmax_range[0], self._minmax_range[1])
+        x[0, nr_standardized:self._nr_numeric] = normalized
+        for category_index, column, value in zip(self._category_index, self._onehot_columns, values[self._nr_numeric:]):
+            if value not in category_index:
+                raise ValueError("Found unknown category " + str(value) + " in column " + column + ".")
+            x[0, category_index[value]] = 1
+        return x
+
+    def predict(self, values):
+        """
+        Predicts the mean for feature values, with the same forward pass as the MLP regressor.
+
+        :param values: the feature values in the order of the compiled columns.
+        :return: the predicted mean.
+        """
+        activation = self.encode(values)
+        last_layer = len(self._coefs) - 1
+        for i, (coef, intercept) in enumerate(zip(self._coefs, self._intercepts)):
+            activation = activation @ coef + intercept
+            activation = self._output_activation(activation) if i == last_layer else self._hidden_activation(activation)
+        return float(activation[0, 0])
+
+    def mean(self, features):
+        """
+        Returns the memoized predicted mean for the features.
+
+        :param features: a dictionary that maps feature labels to values.
+        :return: the predicted mean, or the overall mean if the prediction is not positive.
+        """
+        key = tuple([features[column] for column in self._columns])
+        mean = self._memo.get(key)
+        if mean is None:
+            mean = self.predict(key)
+            if mean <= 0:
+                mean = self._overall_mean
+            if len(self._memo) >= self._max_memo_size:
+                self._memo.clear()
+            self._memo[key] = mean
+        return mean
+
+    def error(self, stratum):
+        """
+        Draws a normally distributed error term for the stratum.
+
+        :param stratum: the value of the stratifier feature.
+        :return: the error term.
+        """
+        return self._errors[stratum].sample()
+
+    def sample(self, features):
+        """
+        Samples a value for the features: the predicted mean plus a stratified error,
+        redrawing the error up to 10 times when the sum is not positive.
+
+        :param features: a dictionary that maps feature labels to values.
+        :return: the sampled value.
+        """
+        processing_time = self.mean(features)
+        stratum = features[self._stratifier]
+        error = self.error(stratum)
+        max_retries = 10
+        retry = 0
+        while retry < max_retries and processing_time + error <= 0:
+            error = self.error(stratum)
+            retry += 1
+        if processing_time + error > 0:
+            return processing_time + error
+        else:
+            return processing_time
+
+
+class TruncatedNormalDistribution(BufferedDistribution):
+    """A normal distribution with the specified mean and standard deviation, truncated to non-negative values."""
+
+    def __init__(self, mean=0, std=1):
+        self.mean = mean
+        self.std = std
+
+    def _parameters(self):
+        return self.mean, self.std
+
+    def _draw(self, generator, size):
+        return scipy.stats.truncnorm.rvs(-self.mean / self.std, np.inf, scale=self.std, loc=self.mean, size=size, random_state=generator)
+
+
 class POTaskDurationDistribution:
     def __init__(self):
-        pass
+        self._durations = None
+
+    def _truncated_normals(self):
+        if getattr(self, '_durations', None) is None:  # distributions that were saved before buffering existed
+            self._durations = {(mean, std_dev): TruncatedNormalDistribution(mean, std_dev)
+                               for mean, std_dev in [(0.5, 0.05), (1, 0.1), (2, 0.3), (4, 0.3), (6, 0.6)]}
+        return self._durations
+
+    def seed(self, seed=None):
+        durations = self._truncated_normals()
+        for duration, child_seed in zip(durations.values(), seed_sequence(seed).spawn(len(durations))):
+            duration.seed(child_seed)
 
     def sample(self, features):
         activity = features['Activity']
         resource = features['Resource']
 
-        trunc_normal_sample = lambda mean, std_dev : scipy.stats.truncnorm(-mean / std_dev, np.inf, scale=std_dev, loc=mean).rvs()
+        durations = self._truncated_normals()
+        trunc_normal_sample = lambda mean, std_dev : durations[(mean, std_dev)].sample()
         norm_30_min = lambda : trunc_normal_sample(0.5, 0.05)
         norm_1_hour = lambda : trunc_normal_sample(1, 0.1)
         norm_2_hours = lambda : trunc_normal_sample(2, 0.3)
@@ -209,5 +209,6 @@ def mine_problem(log,
     result.resource_pools = resource_pools  # The resource pool per task type
     result.data_types = data_types
     result.processing_times = processing_times  # The processing time distributions
+    result.compile()  # The alias tables for the initial and next task types
 
     return result
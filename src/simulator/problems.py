@@ -1,7 +1,12 @@
 import random
 import pickle
 from math import factorial
+from numpy.random import SeedSequence
 from abc import ABC, abstractmethod
+try:
+    from .distributions import AliasTable
+except ImportError:  # loaded as a top-level module, like when a pickled problem is loaded
+    from distributions import AliasTable
 
 
 class Task:
@@ -12,6 +17,7 @@ class Task:
     :param case_id: the identifier of the case to which the task belongs.
     :param task_type: the type of the task, i.e. one of the :attr:`.Problem.task_types`.
     """
+    __slots__ = ('id', 'case_id', 'task_type', 'data')
 
     def __init__(self, task_id, case_id, task_type):
         self.id = task_id
@@ -394,15 +400,47 @@ class MinedProblem(Problem):
         self.processing_times = dict()
         self.__number_task_type_occurrences = dict()
 
+    def seed(self, seed=None):
+        """
+        Seeds the distributions of the problem (initial and next task types, interarrival time, data,
+        and processing time), each with its own child seed of the specified seed,
+        so that each distribution draws a reproducible stream.
+
+        :param seed: an int, a numpy.random.SeedSequence, or None for a fresh seed.
+        """
+        seed = seed if isinstance(seed, SeedSequence) else SeedSequence(seed)
+        distributions = [self._initial_task_table] + list(self._next_task_tables.values()) + \
+            [self.interarrival_time] + list(self.data_types.values()) + [self.processing_times]
+        for distribution, child_seed in zip(distributions, seed.spawn(len(distributions))):
+            if hasattr(distribution, 'seed'):
+                distribution.seed(child_seed)
+
+    def compile(self):
+        """
+        Compiles the initial and next task type distributions into :class:`.AliasTable` objects,
+        from which a task type is sampled in O(1) time. Must be called again when those distributions change.
+        Raises a ValueError if the probabilities of a distribution do not add up to 1.0.
+        """
+        self._initial_task_table = self._alias_table(self.initial_task_distribution)
+        self._next_task_tables = {tt: self._alias_table(distribution) for tt, distribution in self.next_task_distribution.items()}
+
+    @staticmethod
+    def _alias_table(distribution):
+        return AliasTable([tt for (p, tt) in distribution], [p for (p, tt) in distribution], tolerance=1e-6)
+
+    def __getstate__(self):
+        # the alias tables are compiled again when the problem is loaded
+        state = self.__dict__.copy()
+        state.pop('_initial_task_table', None)
+        state.pop('_next_task_tables', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.compile()
+
     def sample_initial_task_type(self):
-        rd = random.random()
-        rs = 0
-        for (p, tt) in self.initial_task_distribution:
-            rs += p
-            if rd < rs:
-                return tt
-        print("WARNING: the probabilities of initial tasks do not add up to 1.0")
-        return self.initial_task_distribution[0]
+        return self._initial_task_table.sample()
 
     def resource_pool(self, task_type):
         return self.resource_pools[task_type]
@@ -411,20 +449,11 @@ class MinedProblem(Problem):
         return self.interarrival_time.sample()
 
     def next_task_types_sample(self, task):
-        rd = random.random()
-        rs = 0
-        for (p, tt) in self.next_task_distribution[task.task_type]:
-            rs += p
-            if rd < rs:
-                if tt is None:
-                    return []
-                else:
-                    return [tt]
-        print("WARNING: the probabilities of next tasks do not add up to 1.0")
-        if self.next_task_distribution[0][1] is None:
+        tt = self._next_task_tables[task.task_type].sample()
+        if tt is None:
             return []
         else:
-            return [self.next_task_distribution[0][1]]
+            return [tt]
 
     def processing_time_sample(self, resource, task):
         features = {**self.__number_task_type_occurrences[task.case_id], 'Activity': task.task_type, 'Resource': resource, **task.data}
@@ -3,7 +3,13 @@ from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
 from statistics import mean
 import scipy.stats as st
+import numpy as np
+from numpy.random import SeedSequence
+import multiprocessing
+import itertools
+import heapq
 import random
+import copy
 import os
 
 
@@ -82,6 +88,8 @@ class TimeUnit(Enum):
 class Event:
     """
     A simulation event.
+    Events are created in the simulator's hot path, so they are slotted and only store what is needed.
+    The same event instance is passed to every listener (planner and reporter), so listeners must not modify it.
 
     :param event_type: the :class:`.EventType`.
     :param moment: the moment in simulation time at which the event happens.
@@ -89,18 +97,35 @@ class Event:
     :param resource: the resource that performs the task, or None for event_type not in [START_TASK, COMPLETE_TASK]
     :param nr_tasks: the number of tasks that must be planned, or 0 for event_type != PLAN_TASKS
     :param nr_resources: the number of resources that is available, or 0 for event_type != PLAN_TASKS
+
+    The simulator sets nr_tasks and nr_resources of a planning event when the event happens, because planning requests
+    may have been folded into it since it was generated.
     """
+    __slots__ = ('event_type', 'moment', 'task', 'resource', 'nr_tasks', 'nr_resources')
+
     def __init__(self, event_type, moment, task, resource=None, nr_tasks=0, nr_resources=0):
         self.event_type = event_type
-        self.lifecycle_state = event_type
         self.moment = moment
-        self.timestamp = moment
-        self.case_id = task.case_id if task else None
         self.task = task
         self.resource = resource
         self.nr_tasks = nr_tasks
         self.nr_resources = nr_resources
 
+    @property
+    def lifecycle_state(self):
+        """The :class:`.EventType` of the event, by the name that the planner uses."""
+        return self.event_type
+
+    @property
+    def timestamp(self):
+        """The moment in simulation time at which the event happens, by the name that the planner uses."""
+        return self.moment
+
+    @property
+    def case_id(self):
+        """The identifier of the case of the task that triggered the event, or None if there is no such task."""
+        return self.task.case_id if self.task else None
+
     def __lt__(self, other):
         return self.moment < other.moment
 
@@ -108,6 +133,52 @@ class Event:
         return str(self.event_type) + "\t(" + str(round(self.moment, 2)) + ")\t" + str(self.task) + "," + str(self.resource)
 
 
+class EventQueue:
+    """
+    The queue of pending simulation events, ordered by the moment at which they happen.
+    The queue is a binary heap, so pushing and popping an event takes O(log n) time.
+    Events that happen at the same moment are popped in the order in which they were pushed.
+    To that end, each event is stored with a sequence number that breaks ties between equal moments,
+    which also ensures that two events are never compared to each other.
+    """
+    def __init__(self):
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def push(self, event):
+        """
+        Adds an event to the queue.
+
+        :param event: the :class:`.Event` to add, which happens at event.moment.
+        """
+        heapq.heappush(self._heap, (event.moment, next(self._sequence), event))
+
+    def pop(self):
+        """
+        Removes the first event from the queue and returns it.
+
+        :return: the :class:`.Event` with the earliest moment, or the earliest pushed of those if there are multiple.
+        """
+        return heapq.heappop(self._heap)[2]
+
+    def peek(self):
+        """
+        Returns the first event from the queue without removing it.
+
+        :return: the :class:`.Event` that :meth:`.EventQueue.pop` would return.
+        """
+        return self._heap[0][2]
+
+    def clear(self):
+        """
+        Removes all events from the queue.
+        """
+        self._heap.clear()
+
+    def __len__(self):
+        return len(self._heap)
+
+
 class ReporterElement(ABC):
     """
     Abstract class that must be implemented by each concrete reporter element.
@@ -440,11 +511,40 @@ class Simulator:
 
     * :meth:`.simulate`, which simulates the (single) problem instance passed with the constructor; and
     * :meth:`.replicate`, which simulates a collection of problem instances passed via the replicate method itself.
+
+    Planning requests are folded into planning epochs: while a planning event is pending, further requests
+    to plan are not scheduled as separate planning events, because the pending event will already see the
+    tasks and resources that triggered them. A planning event is scheduled planning_window simulation time
+    after the request that opened the epoch, so all requests inside that window lead to one planner invocation.
+
+    :param problem: the :class:`.Problem` to simulate.
+    :param reporter: the :class:`.Reporter` that reports on the simulation.
+    :param planner: the planner that assigns tasks to resources.
+    :param planning_window: the amount of simulation time during which planning requests are folded into one
+                            planning event. Use 0 to fold only requests that happen at the same moment, or None to
+                            schedule a planning event for each request.
+    :param debug: whether to print the number of planner invocations that were saved by folding at the end of a run.
     """
-    def __init__(self, problem, reporter, planner):
-        self.events = []
+    def __init__(self, problem, reporter, planner, planning_window=0, debug=False):
+        self.events = EventQueue()
+        """
+        The pending simulation events, an instance of :class:`.EventQueue`.
+        """
         self.events_completed = 0
 
+        self.planning_window = planning_window
+        self.debug = debug
+        self.pending_planning = None
+        """
+        The planning event that is currently in the events and not yet handled, or None if there is no such event.
+        """
+        self.planning_requests = 0
+        self.planning_requests_folded = 0
+        """
+        The number of times planning was requested, and the number of those requests that were folded into
+        an already pending planning event, i.e. the number of planner invocations that were saved.
+        """
+
         self.unassigned_tasks = dict()
         """
         The tasks that are currently not assigned. A dict task.id -> task, where task is an instance of :class:`.Task`.
@@ -518,14 +618,14 @@ class Simulator:
             self.reporter.report(Event(EventType.RESOURCE_JOINING, self.now, None, resource=r))
 
         # generate resource scheduling event to start the schedule
-        self.events.append((0, Event(EventType.SCHEDULE_RESOURCES, 0, None)))
+        self.events.push(Event(EventType.SCHEDULE_RESOURCES, 0, None))
 
         # reset the problem
         self.problem.restart()
 
         # generate arrival event for the first task of the first case
         (t, task) = self.problem.next_case()
-        self.events.append((t, Event(EventType.CASE_ARRIVAL, t, task)))
+        self.events.push(Event(EventType.CASE_ARRIVAL, t, task))
 
     def desired_nr_resources(self):
         """
@@ -543,6 +643,21 @@ class Simulator:
         """
         return len(self.available_resources) + len(self.busy_resources) + len(self.reserved_resources)
 
+    def request_planning(self):
+        """
+        Requests that the unassigned tasks are planned on the available resources.
+        Generates a planning event, unless a planning event is already pending, in which case the request is
+        folded into that event.
+        """
+        self.planning_requests += 1
+        if self.pending_planning is not None and self.planning_window is not None:
+            self.planning_requests_folded += 1
+            return
+        moment = self.now + (self.planning_window or 0)
+        event = Event(EventType.PLAN_TASKS, moment, None, nr_tasks=len(self.unassigned_tasks), nr_resources=len(self.available_resources))
+        self.events.push(event)
+        self.pending_planning = event
+
     def simulate(self, running_time):
         """
         Runs the simulation for the instance that was passed in the constructor.
@@ -561,10 +676,12 @@ class Simulator:
         # repeat until the end of the simulation time:
         while self.now <= running_time:
             # get the first event e from the events
-            event = self.events.pop(0)
+            event = self.events.pop()
             # t = time of e
-            self.now = event[0]
-            event = event[1]
+            self.now = event.moment
+            if event is self.pending_planning:
+                # requests may have been folded into the event since it was generated, so it plans what there is now
+                event.nr_tasks, event.nr_resources = len(self.unassigned_tasks), len(self.available_resources)
             self.reporter.report(event)
 
             # if e is an arrival event:
@@ -572,25 +689,23 @@ class Simulator:
                 # add new task
                 self.unassigned_tasks[event.task.id] = event.task
                 self.case_start_times[event.task.case_id] = self.now
-                self.planner.report(Event(EventType.CASE_ARRIVAL, self.now, event.task))
-                self.planner.report(Event(EventType.TASK_ACTIVATE, self.now, event.task))
-                self.reporter.report(Event(EventType.CASE_ARRIVAL, self.now, event.task))
-                self.reporter.report(Event(EventType.TASK_ACTIVATE, self.now, event.task))
+                self.planner.report(event)
+                activate_event = Event(EventType.TASK_ACTIVATE, self.now, event.task)
+                self.planner.report(activate_event)
+                self.reporter.report(activate_event)
                 self.casearrivals += 1
                 self.busy_cases[event.task.case_id] = [event.task.id]
-                self.events.append((self.now, Event(EventType.PLAN_TASKS, self.now, None, nr_tasks=len(self.unassigned_tasks), nr_resources=len(self.available_resources))))
+                self.request_planning()
                 # generate a new arrival event for the first task of the next case
                 (t, task) = self.problem.next_case()
-                self.events.append((t, Event(EventType.CASE_ARRIVAL, t, task)))
-                self.events.sort()
+                self.events.push(Event(EventType.CASE_ARRIVAL, t, task))
 
             # if e is a start event:
             elif event.event_type == EventType.START_TASK:
-                self.planner.report(Event(EventType.START_TASK, self.now, event.task, event.resource))
+                self.planner.report(event)
                 # create a complete event for task
                 t = self.now + self.problem.processing_time_sample(event.resource, event.task)
-                self.events.append((t, Event(EventType.COMPLETE_TASK, t, event.task, event.resource)))
-                self.events.sort()
+                self.events.push(Event(EventType.COMPLETE_TASK, t, event.task, event.resource))
                 if not self.problem.is_event(event.task.task_type):  # for actual tasks (not events)
                     # set resource to busy
                     del self.reserved_resources[event.resource]
@@ -599,7 +714,7 @@ class Simulator:
             # if e is a complete event:
             elif event.event_type == EventType.COMPLETE_TASK:
                 self.events_completed += 1
-                self.planner.report(Event(EventType.COMPLETE_TASK, self.now, event.task, event.resource))
+                self.planner.report(event)
                 if not self.problem.is_event(event.task.task_type):  # for actual tasks (not events)
                     # set resource to available, if it is still desired, otherwise set it to away
                     del self.busy_resources[event.resource]
@@ -617,15 +732,16 @@ class Simulator:
                 # generate unassigned tasks for each next task
                 for next_task in next_tasks:
                     self.unassigned_tasks[next_task.id] = next_task
-                    self.planner.report(Event(EventType.TASK_ACTIVATE, self.now, next_task))
-                    self.reporter.report(Event(EventType.TASK_ACTIVATE, self.now, next_task))
+                    activate_event = Event(EventType.TASK_ACTIVATE, self.now, next_task)
+                    self.planner.report(activate_event)
+                    self.reporter.report(activate_event)
                     self.busy_cases[event.task.case_id].append(next_task.id)
                 if len(self.busy_cases[event.task.case_id]) == 0:
-                    self.planner.report(Event(EventType.COMPLETE_CASE, self.now, event.task))
-                    self.events.append((self.now, Event(EventType.COMPLETE_CASE, self.now, event.task)))
-                # generate a new planning event to start planning now for the newly available resource and next tasks
-                self.events.append((self.now, Event(EventType.PLAN_TASKS, self.now, None, nr_tasks=len(self.unassigned_tasks), nr_resources=len(self.available_resources))))
-                self.events.sort()
+                    complete_case_event = Event(EventType.COMPLETE_CASE, self.now, event.task)
+                    self.planner.report(complete_case_event)
+                    self.events.push(complete_case_event)
+                # request planning to start planning now for the newly available resource and next tasks
+                self.request_planning()
 
             # if e is a schedule resources event: move resources between available/away,
             # depending to how many resources should be available according to the schedule.
@@ -648,9 +764,8 @@ class Simulator:
                         del self.away_resources_weights[away_resource_i]
                         self.available_resources.add(random_resource)
                         self.reporter.report(Event(EventType.RESOURCE_JOINING, self.now, None, resource=random_resource))
-                    # generate a new planning event to put them to work
-                    self.events.append((self.now, Event(EventType.PLAN_TASKS, self.now, None, nr_tasks=len(self.unassigned_tasks), nr_resources=len(self.available_resources))))
-                    self.events.sort()
+                    # request planning to put them to work
+                    self.request_planning()
                 elif required_resources < 0:
                     # if there are too many resources working
                     # remove as many as possible, i.e. min(available_resources, -required_resources)
@@ -664,11 +779,12 @@ class Simulator:
                         self.away_resources_weights.append(self.problem.resource_weights[self.problem.resources.index(r)])
                         self.reporter.report(Event(EventType.RESOURCE_LEAVING, self.now, None, resource=r))
                 # plan the next resource schedule event
-                self.events.append((self.now+1, Event(EventType.SCHEDULE_RESOURCES, self.now+1, None)))
-                self.events.sort()
+                self.events.push(Event(EventType.SCHEDULE_RESOURCES, self.now+1, None))
 
             # if e is a planning event: do assignment
             elif event.event_type == EventType.PLAN_TASKS:
+                if event is self.pending_planning:
+                    self.pending_planning = None
                 if len(self.unassigned_tasks) > 0 and len(self.available_resources) > 0:
                     assignments = self.planner.plan(set(self.available_resources),
                                                     list(self.unassigned_tasks.values()),
@@ -681,13 +797,12 @@ class Simulator:
                             return None, "ERROR: trying to assign a resource that is not in available_resources."
                         if resource not in self.problem.resource_pools[task.task_type]:
                             return None, "ERROR: trying to assign a resource to a task that is not in its resource pool."
-                        self.events.append((moment, Event(EventType.START_TASK, moment, task, resource)))
+                        self.events.push(Event(EventType.START_TASK, moment, task, resource))
                         del self.unassigned_tasks[task.id]
                         self.assigned_tasks[task.id] = (task, resource, moment)
                         if not self.problem.is_event(task.task_type):
                             self.available_resources.remove(resource)
                             self.reserved_resources[resource] = (event.task, moment)
-                self.events.sort()
 
             elif event.event_type == EventType.COMPLETE_CASE:
                 self.total_cycle_time += self.now - self.case_start_times[event.task.case_id]
@@ -708,34 +823,108 @@ class Simulator:
                             #self.finalized_cases += 1
                             #unfinished_cases += 1
         print(f"Events completed: {self.events_completed}")
+        if self.debug:
+            print(f"Planner invocations saved: {self.planning_requests_folded} of {self.planning_requests} planning requests")
         return "avg cycle time:" + str(self.total_cycle_time/self.finalized_cases) , "COMPLETED: you completed " + str(running_time) + " hours of simulated customer cases. " + str(self.casearrivals) + " cases started. " + str(self.finalized_cases) + " cases run to completion. "
 
     @staticmethod
-    def replicate(problem, planner, reporter, simulation_time, replications):
+    def replicate(problem, planner, reporter, simulation_time, replications, processes=1, seed=None, target_half_widths=None, max_replications=None):
         """
-        Creates a simulator for each of the problem_instances, using the specified planner and reporter.
-        Simulates each problem instance by calling the :meth:`.simulate` method on it using the
-        specified simulation time. Returns the list of summaries generated by the reporter, one summary for
-        each simulated problem_instance.
+        Simulates the problem the specified number of times, using the specified planner and reporter.
+        Simulates each replication by calling the :meth:`.simulate` method using the specified simulation time.
+        Returns the summaries generated by the reporter, merged into one dict that maps each label of a summary
+        to the list of values of that label, one for each replication that reported it, in the order of the
+        replications. This is the format that :meth:`.Reporter.aggregate` takes.
+
+        Each replication simulates its own copy of the problem, planner, and reporter, so no state, e.g. of a policy
+        or a prediction cache, carries over from one replication to the next. With more than one process,
+        the replications run in parallel on a process pool, which copies them by pickling, so they must be picklable.
+        With one process, they are deep-copied. Each replication gets its own child seed of the specified seed,
+        which seeds random, numpy.random, and, if it has a seed method, the problem. Consequently, a seeded
+        replicate returns the same summaries regardless of the number of processes.
+
+        If target_half_widths is specified, replications are added, as many as there are processes at a time,
+        until the half-width of the 95% confidence interval of each of the specified labels, as computed by
+        :meth:`.Reporter.aggregate`, is at most its target, or until max_replications replications are done.
 
         :param problem: an instance of :class:`.Problem` to simulate.
         :param planner: a :class:`.Planner`.
         :param reporter: a :class:`.Reporter`.
         :param simulation_time: the amount of simulation time for which each problem instance should be simulated.
-        :param replications: the number of replications to do.
-        :return: a list of summaries, generated by the reporter, one for each element of problem_instances.
-        """
-        summaries = None
-        for i in range(replications):
-            reporter.restart()
-            problem.restart()
-            simulator = Simulator(problem, reporter, planner)
-            simulator.simulate(simulation_time)
-            summary = reporter.summarize()
-            if summaries is None:
-                summaries = summary.copy()
-                for key in summaries:
-                    summaries[key] = []
-            for key in summary:
-                summaries[key].append(summary[key])
+        :param replications: the number of replications to do, or, with target_half_widths, to do at least.
+        :param processes: the number of processes that simulate replications in parallel.
+        :param seed: an int or a numpy.random.SeedSequence from which the seeds of the replications are spawned.
+                     None leaves a single process unseeded, as before, and seeds multiple processes with fresh entropy.
+        :param target_half_widths: None, or a dict that maps summary labels to target confidence interval half-widths.
+        :param max_replications: the maximum number of replications in case the targets are not met, None for no maximum.
+        :return: a dict that maps each summary label to the list of its values over the replications.
+        """
+        if seed is not None or processes > 1:
+            seed = seed if isinstance(seed, SeedSequence) else SeedSequence(seed)
+        pool = multiprocessing.Pool(processes) if processes > 1 else None
+        summaries = dict()
+        nr_replications = 0
+        try:
+            target = replications
+            while nr_replications < target:
+                seeds = seed.spawn(target - nr_replications) if seed is not None else [None] * (target - nr_replications)
+                arguments = [(problem, planner, reporter, simulation_time, replication_seed) for replication_seed in seeds]
+                if pool is not None:
+                    results = pool.starmap(replicate_once, arguments)
+                else:
+                    results = [replicate_once(*copy.deepcopy(replication_arguments)) for replication_arguments in arguments]
+                for summary in results:
+                    for key in summary:
+                        summaries.setdefault(key, []).append(summary[key])
+                nr_replications = target
+                if target_half_widths is not None and not Simulator.converged(summaries, target_half_widths):
+                    target = nr_replications + processes
+                    if max_replications is not None:
+                        target = min(target, max_replications)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
         return summaries
+
+    @staticmethod
+    def converged(summaries, target_half_widths):
+        """
+        Returns True if, for each of the specified labels, the half-width of the 95% confidence interval of the
+        values in the summaries, as computed by :meth:`.Reporter.aggregate`, is at most the target for that label.
+
+        :param summaries: a dict that maps each summary label to a list of values, as returned by :meth:`.replicate`.
+        :param target_half_widths: a dict that maps summary labels to target confidence interval half-widths.
+        :return: True or False.
+        """
+        for key, target in target_half_widths.items():
+            if len(summaries.get(key, [])) < 2:
+                return False
+            half_width = Reporter.aggregate({key: summaries[key]})[key][1]
+            if not half_width <= target:  # also when the half-width is nan
+                return False
+        return True
+
+
+def replicate_once(problem, planner, reporter, simulation_time, seed=None):
+    """
+    Simulates one replication of the problem for :meth:`.Simulator.replicate`, which may run in a pool process.
+
+    :param problem: an instance of :class:`.Problem` to simulate.
+    :param planner: a :class:`.Planner`.
+    :param reporter: a :class:`.Reporter`.
+    :param simulation_time: the amount of simulation time for which the problem should be simulated.
+    :param seed: None, or a numpy.random.SeedSequence that seeds random, numpy.random, and the problem.
+    :return: the summary generated by the reporter.
+    """
+    if seed is not None:
+        random_seed, numpy_seed = seed.generate_state(2)
+        random.seed(int(random_seed))
+        np.random.seed(numpy_seed)
+        if hasattr(problem, 'seed'):
+            problem.seed(seed)
+    reporter.restart()
+    problem.restart()
+    simulator = Simulator(problem, reporter, planner)
+    simulator.simulate(simulation_time)
+    return reporter.summarize()
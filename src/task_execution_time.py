@@ -1,81 +1,521 @@
-from keras.models import Sequential
-from keras.layers import Dense
-from sklearn.preprocessing import StandardScaler, Normalizer, OneHotEncoder
-from keras.callbacks import Callback
-from sklearn.model_selection import train_test_split
 import pandas as pd
 import numpy as np
 import itertools
 import collections
+import numbers
+import time
+import concurrent.futures
+import multiprocessing
+
+# Keras (and with it TensorFlow) and the sklearn transformers are imported where a model is trained or evaluated,
+# so that simulations that do not predict, or that load a trained model, do not pay for importing them.
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0, out=x),
+    'sigmoid': lambda x: 1 / (1 + np.exp(-x)),
+    'tanh': np.tanh
+}
+"""
+The activation functions of dense layers, by their Keras names, for the NumPy inference backend.
+"""
+
+
+def _keras_model(layers, weights):
+    # builds a Keras network of dense layers, with the units and activation of each layer, and sets its weights
+    from keras.models import Sequential
+    from keras.layers import Dense
+    model = Sequential()
+    input_dim = weights[0].shape[0]
+    for i, (units, activation) in enumerate(layers):
+        if i == 0:
+            model.add(Dense(units, input_dim=input_dim, activation=activation))
+        else:
+            model.add(Dense(units, activation=activation))
+    model.set_weights(weights)
+    return model
+
+
+_fine_tuning_networks = dict()
+"""
+The compiled Keras networks that were fine-tuned in this process, by their input dimension and layers. A network is
+reused for each fine-tuning, so its training function is traced only once.
+"""
+
+
+def _fine_tune(layers, weights, x, y, epochs):
+    # is invoked in the fine-tuning worker of an OnlineTrainer, so it only takes and returns arrays
+    key = (weights[0].shape[0], tuple(tuple(layer) for layer in layers))
+    network = _fine_tuning_networks.get(key)
+    if network is None:
+        network = _fine_tuning_networks[key] = _keras_model(layers, weights)
+        network.compile(optimizer='adam', loss='mean_squared_error')
+    else:
+        network.set_weights(weights)
+    network.fit(x, y, epochs=epochs, batch_size=256, verbose=0)
+    return network.get_weights()
+
+
+class PredictionCache:
+    """
+    A bounded cache of predicted durations. An entry is keyed on a tuple of the exact features from which
+    the duration was predicted, so equal features never share an entry by accident,
+    and tasks of different cases with equal features share one entry.
+    When the cache is full, the least recently used entry is evicted.
+
+    :param max_size: the maximum number of entries.
+    """
+
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Returns the duration cached for the key, or None if there is none.
+        """
+        duration = self._entries.get(key)
+        if duration is None:
+            self.misses += 1
+        else:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return duration
+
+    def put(self, key, duration):
+        self._entries[key] = duration
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Removes all entries, for example because the model changed. Keeps the counters.
+        """
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        Returns the size of the cache and the number of hits, misses, and evictions so far.
+        """
+        lookups = self.hits + self.misses
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit rate': self.hits / lookups if lookups else 0}
+
+
+class FeatureEncoder:
+    """
+    Encodes the features of predictions into the input matrix of the network of an :class:`.ExecutionTimeModel`,
+    with the same result as the fitted sklearn transformers of the model, but without building DataFrames.
+    The encoder is compiled once from the transformers: the parameters of the normalizer and the standardizer
+    are copied, and each category of each one-hot column is mapped to the index of its column in the matrix.
+    The columns are: the normalized task type occurrences, the standardized columns, and the one-hot encoded columns.
+
+    :param model: an :class:`.ExecutionTimeModel` with fitted transformers.
+    """
+
+    def __init__(self, model):
+        self._rest_columns = list(model._rest_columns)
+        self._standardization_columns = list(model._standardization_columns)
+        self._onehot_columns = list(model._onehot_columns)
+
+        self._norm = model._normalizer.norm
+        if self._standardization_columns:
+            self._mean = model._standarizer.mean_
+            self._scale = model._standarizer.scale_
+
+        offset = len(self._rest_columns) + len(self._standardization_columns)
+        self._indexes = []
+        for categories in model._encoder.categories_:
+            self._indexes.append({category: offset + i for i, category in enumerate(categories.tolist())})
+            offset += len(categories)
+        self.width = offset
+
+    def _normalize(self, x):
+        # like sklearn.preprocessing.normalize, rows with norm 0 are left as they are
+        if self._norm == 'l2':
+            norms = np.sqrt(np.einsum('ij,ij->i', x, x))
+        elif self._norm == 'l1':
+            norms = np.abs(x).sum(axis=1)
+        else:
+            norms = np.max(np.abs(x), axis=1)
+        norms[norms == 0.0] = 1.0
+        x /= norms[:, np.newaxis]
+        return x
+
+    def encode(self, rows):
+        """
+        Encodes rows of features.
+
+        :param rows: a list of tuples (task, resource, number_task_type_occurrences).
+        :return: a float32 matrix with a row for each of the rows.
+        """
+        x = np.zeros((len(rows), self.width), dtype=np.float32)
+        rest_columns = self._rest_columns
+        occurrences = np.array([[o[column] for column in rest_columns] for (_, _, o) in rows], dtype=np.float64)
+        x[:, :len(rest_columns)] = self._normalize(occurrences.reshape(len(rows), len(rest_columns)))
+        if self._standardization_columns:
+            values = np.array([[task.data[column] for column in self._standardization_columns] for (task, _, _) in rows], dtype=np.float64)
+            values -= self._mean
+            values /= self._scale
+            x[:, len(rest_columns):len(rest_columns) + len(self._standardization_columns)] = values
+        for i, (task, resource, _) in enumerate(rows):
+            for column, indexes in zip(self._onehot_columns, self._indexes):
+                if column == 'Activity':
+                    index = indexes.get(task.task_type)
+                elif column == 'Resource':
+                    index = indexes.get(resource)
+                else:
+                    index = indexes.get(task.data[column])
+                if index is not None:  # like handle_unknown='ignore', an unknown category is encoded as all zeros
+                    x[i, index] = 1.0
+        return x
+
+
+class ObservationBuffer:
+    """
+    A columnar, append-only buffer of observed task durations from which an :class:`.ExecutionTimeModel` is trained.
+    Each observation is stored as a row of preallocated NumPy arrays: the number of occurrences of each task type in
+    the case when the task completed, the codes of the task type and the resource, the case data, and the duration.
+    Categorical case data are stored as codes and numeric case data as floats. The arrays double in size when they are
+    full, so appending takes amortized constant time and no Python object is kept per observation.
+    A buffer with a maximum size is a replay buffer: once it is full, each observation replaces the oldest one.
+
+    :param activity_names: the task types of which the occurrences are counted, in the order of the keys of the
+        occurrence dicts that are appended.
+    :param capacity: the initial number of rows.
+    :param max_size: the maximum number of observations, or None for no maximum.
+    """
+
+    def __init__(self, activity_names, capacity=1024, max_size=None):
+        self.activity_names = list(activity_names)
+        self.max_size = max_size
+        if max_size is not None:
+            capacity = min(capacity, max_size)
+        self.size = 0
+        self.appended = 0
+        self._counts = np.zeros((capacity, len(self.activity_names)), dtype=np.int32)
+        self._activities = np.zeros(capacity, dtype=np.int32)
+        self._resources = np.zeros(capacity, dtype=np.int32)
+        self._durations = np.zeros(capacity, dtype=np.float64)
+        self._activity_codes = dict()
+        self._resource_codes = dict()
+        self._data = dict()  # data type -> (values, codes), where codes is None for numeric data
+
+    def __len__(self):
+        return self.size
+
+    def __getstate__(self):
+        # only the rows that hold observations are saved
+        state = self.__dict__.copy()
+        n = self.size
+        for name in ['_counts', '_activities', '_resources', '_durations']:
+            state[name] = state[name][:n].copy()
+        state['_data'] = {dt: (values[:n].copy(), codes) for dt, (values, codes) in self._data.items()}
+        if self.size < self.appended:  # the rows of a full replay buffer are saved from the oldest
+            start = self.appended % n
+            for name in ['_counts', '_activities', '_resources', '_durations']:
+                state[name] = np.roll(state[name], -start, axis=0)
+            state['_data'] = {dt: (np.roll(values, -start), codes) for dt, (values, codes) in state['_data'].items()}
+            state['appended'] = n
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if len(self._durations) == 0:
+            self.__init__(self.activity_names, max_size=self.max_size)
+
+    def _grow(self, capacity=None):
+        capacity = capacity or 2 * len(self._durations)
+        if self.max_size is not None:
+            capacity = min(capacity, self.max_size)
+        self._counts = np.resize(self._counts, (capacity, len(self.activity_names)))
+        self._activities = np.resize(self._activities, capacity)
+        self._resources = np.resize(self._resources, capacity)
+        self._durations = np.resize(self._durations, capacity)
+        self._data = {dt: (np.resize(values, capacity), codes) for dt, (values, codes) in self._data.items()}
+
+    def append(self, number_task_type_occurrences, task, resource, duration):
+        """
+        Appends the observation that a task took the duration when it was executed by the resource.
+
+        :param number_task_type_occurrences: the number of occurrences of each task type in the case of the task.
+        :param task: the task.
+        :param resource: the resource.
+        :param duration: the duration.
+        """
+        if self.size == len(self._durations) and (self.max_size is None or self.size < self.max_size):
+            self._grow()
+        i = self.appended % len(self._durations)
+        self._counts[i] = tuple(number_task_type_occurrences.values())
+        self._activities[i] = self._activity_codes.setdefault(task.task_type, len(self._activity_codes))
+        self._resources[i] = self._resource_codes.setdefault(resource, len(self._resource_codes))
+        for dt, value in task.data.items():
+            if dt not in self._data:
+                numeric = isinstance(value, numbers.Number)
+                self._data[dt] = (np.zeros(len(self._durations), dtype=np.float64 if numeric else np.int32),
+                                  None if numeric else dict())
+            values, codes = self._data[dt]
+            values[i] = value if codes is None else codes.setdefault(value, len(codes))
+        self._durations[i] = duration
+        self.appended += 1
+        self.size = min(self.appended, len(self._durations))
+
+    def extend(self, other):
+        """
+        Appends the observations of another buffer, which counts the occurrences of the same task types,
+        for example to merge the observations that were generated in parallel.
+
+        :param other: an :class:`.ObservationBuffer`.
+        """
+        if self.max_size is not None:
+            raise ValueError("Cannot extend a replay buffer.")
+        if other.activity_names != self.activity_names:
+            raise ValueError("Cannot extend a buffer with observations of other task types.")
+        start, n = self.size, other.size
+        if start + n > len(self._durations):
+            self._grow(max(start + n, 2 * len(self._durations)))
+        rows = slice(start, start + n)
+        self._counts[rows] = other._counts[:n]
+        self._activities[rows] = self._recode(self._activity_codes, other._activity_codes)[other._activities[:n]]
+        self._resources[rows] = self._recode(self._resource_codes, other._resource_codes)[other._resources[:n]]
+        for dt, (values, codes) in other._data.items():
+            if dt not in self._data:
+                self._data[dt] = (np.zeros(len(self._durations), dtype=values.dtype), None if codes is None else dict())
+            own_values, own_codes = self._data[dt]
+            own_values[rows] = values[:n] if codes is None else self._recode(own_codes, codes)[values[:n]]
+        self._durations[rows] = other._durations[:n]
+        self.appended += n
+        self.size += n
+
+    @staticmethod
+    def _recode(codes, other_codes):
+        # maps the codes of another buffer to the codes of this buffer, adding the values that this buffer lacks
+        return np.array([codes.setdefault(value, len(codes)) for value in other_codes], dtype=np.int32)
+
+    @staticmethod
+    def _decode(codes, values):
+        categories = np.empty(len(codes), dtype=object)
+        categories[:] = list(codes)
+        return categories[values]
+
+    def frame(self):
+        """
+        Returns the observations as a DataFrame with a column for the occurrences of each task type, 'Activity',
+        'Resource', a column for each case data type, and the duration in 'y', as :meth:`.ExecutionTimeModel.train`
+        generates from dicts. The DataFrame is built column by column, without Python work per observation.
+        """
+        n = self.size
+        columns = dict(zip(self.activity_names, self._counts[:n].T))
+        columns['Activity'] = self._decode(self._activity_codes, self._activities[:n])
+        columns['Resource'] = self._decode(self._resource_codes, self._resources[:n])
+        for dt, (values, codes) in self._data.items():
+            columns[dt] = values[:n] if codes is None else self._decode(codes, values[:n])
+        columns['y'] = self._durations[:n]
+        return pd.DataFrame(columns)
 
-class TrainingLogger(Callback):
-    pass
 
 class ExecutionTimeModel:
-    def __init__(self):
+    """
+    A model that predicts the processing time of a task by a resource with a neural network of dense layers.
+    The network is trained with Keras and evaluated with one of two inference backends:
+
+    * 'keras', which calls the Keras model; and
+    * 'numpy', which freezes the weights of the Keras model into NumPy arrays and computes the forward pass with
+      matrix multiplications, avoiding the overhead of calling Keras for the small batches that the planner predicts.
+
+    The features of a prediction are described by a schema of columns: the number of occurrences of each task type in
+    the case so far, which are normalized, the numeric case data, which are standardized, and the task type,
+    the resource, and the categorical case data, which are one-hot encoded. Use :meth:`.from_problem` to derive the
+    schema from a mined problem.
+
+    :param rest_columns: the task types of which the occurrences are features.
+    :param onehot_columns: the one-hot encoded columns, 'Activity' for the task type, 'Resource' for the resource,
+        and the names of categorical case data.
+    :param standardization_columns: the names of numeric case data.
+    """
+    backend = 'keras'
+
+    def __init__(self, rest_columns=None, onehot_columns=None, standardization_columns=None):
+        self._rest_columns = list(rest_columns or [])
+        self._onehot_columns = list(onehot_columns or ['Activity', 'Resource'])
+        self._standardization_columns = list(standardization_columns or [])
         self._model = None
+        self._layers = None
+        self._weights = None
+        self._network = None
+        self._feature_encoder = None
+        self._loaded_state = None  # the state of the model as it was loaded or trained, which reset restores
         self.trained = False
-        self.predict_cache = collections.defaultdict(dict)
-
-    def __generate_train_df(self, task_resource_durations, task_type_occurrences):
-        raise NotImplementedError()
-    
-    def train(self, resources, task_resource_durations, task_type_occurrences):
-        raise NotImplementedError()
-
-    def train_x_y(self, x, y):
-        # Split the data into train and validation sets
-        x_train, x_val, y_train, y_val = train_test_split(x, y, test_size=0.2, random_state=42)
-
-        # Build the Keras model
-        self._model = Sequential()
-        self._model.add(Dense(150, input_dim=x_train.shape[1], activation='relu'))
-        self._model.add(Dense(100, activation='relu'))
-        self._model.add(Dense(25, activation='relu'))
-        self._model.add(Dense(1))  # Assuming you have a single output in regression problems
-
-        # Compile the model
-        self._model.compile(optimizer='adam', loss='mean_squared_error')
-
-        # Train the model
-        self._model.fit(x_train, y_train, epochs=300, batch_size=256, validation_data=(x_val, y_val),
-                        verbose=1)
-        self.trained = True
+        self.predict_cache = PredictionCache()
+        self.inference_stats = {'batches': 0, 'rows': 0, 'seconds': 0.0}
+
+    @classmethod
+    def from_problem(cls, problem):
+        """
+        Returns an untrained model with the schema of a mined problem: the occurrences of each of its task types,
+        and each of its case data types, one-hot encoded if the data type is categorical and standardized otherwise.
+
+        :param problem: a :class:`.MinedProblem`.
+        :return: an :class:`.ExecutionTimeModel`.
+        """
+        categorical = [dt for dt, distribution in problem.data_types.items() if getattr(distribution, 'categorical', False)]
+        numeric = [dt for dt in problem.data_types if dt not in categorical]
+        return cls(problem.task_types, ['Activity', 'Resource'] + categorical, numeric)
+
+    def __getstate__(self):
+        # the Keras model is saved in its inference form, the units and activation of each of its dense layers
+        # and its weights as NumPy arrays, so that loading the model does not import Keras
+        state = self.__dict__.copy()
+        state.pop('_network', None)
+        state.pop('_feature_encoder', None)
+        state.pop('_loaded_state', None)
+        if state.get('_model') is not None:
+            state['_layers'] = self.layers()
+            state['_weights'] = self.get_weights()
+            state['_model'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if not isinstance(self.predict_cache, PredictionCache):  # models that were saved with a cache per case
+            self.predict_cache = PredictionCache()
+        self.__dict__.setdefault('_standardization_columns', [])
+        self.__dict__.setdefault('inference_stats', {'batches': 0, 'rows': 0, 'seconds': 0.0})
+        self._keep_loaded_state()
+
+    def _keep_loaded_state(self):
+        # the state that is pickled, without the cache and the statistics of a run, and without the backend,
+        # which is a setting instead of state
+        state = self.__getstate__()
+        for key in ('predict_cache', 'inference_stats', 'backend'):
+            state.pop(key, None)
+        self._loaded_state = state
+
+    def use_backend(self, backend):
+        """
+        Selects the inference backend of the model.
+
+        :param backend: 'keras' or 'numpy'.
+        """
+        if backend not in ('keras', 'numpy'):
+            raise ValueError("Unknown inference backend " + str(backend) + ", use 'keras' or 'numpy'.")
+        self.backend = backend
+
+    def keras_model(self):
+        """
+        Returns the Keras model. A model that was loaded in its inference form is rebuilt the first time it is needed.
+        """
+        if self._model is None and getattr(self, '_weights', None) is not None:
+            self._model = _keras_model(self._layers, self._weights)
+        return self._model
+
+    def layers(self):
+        """
+        Returns the units and the activation of each of the dense layers of the network.
+        """
+        if self._model is not None:
+            return [(layer.units, layer.get_config()['activation']) for layer in self._model.layers]
+        return self._layers
+
+    def get_weights(self):
+        """
+        Returns the weights of the network, as a list of NumPy arrays like Keras uses.
+        """
+        if self._model is not None:
+            return self._model.get_weights()
+        return self._weights
+
+    def set_weights(self, weights):
+        """
+        Replaces the weights of the network, for example by weights that :meth:`.fine_tune` returned,
+        and clears the predictions that were cached with the old weights.
+
+        :param weights: a list of NumPy arrays like :meth:`.get_weights` returns.
+        """
+        if self._model is not None:
+            self._model.set_weights(weights)
+        else:
+            self._weights = weights
+        self._network = None
         self.predict_cache.clear()
 
-    def predict(self, task, resource, number_task_type_occurrences):
-        hashed_data = self._hash_data(task, resource, number_task_type_occurrences)
-        if hashed_data in self.predict_cache[task.case_id]:
-            return self.predict_cache[task.case_id][hashed_data]
-
-        features = {**number_task_type_occurrences, 'Activity': task.task_type, 'Resource': resource, **task.data}
-        data = pd.DataFrame(features, index=[1])
-
-        x = np.concatenate(self._transform_data(data), axis=1)
-        pred = self._model(x, training=False)
-        res = max(0, pred)
-        res = float(res)
-
-        self.predict_cache[task.case_id][hashed_data] = res
-        return res
-    
-    def _hash_data(self, task, resource, number_task_type_occurrences):
-        return hash(task.task_type) + hash(frozenset(task.data.items())) \
-            + hash(resource) + hash(frozenset(number_task_type_occurrences.items()))
-
+    def numpy_network(self):
+        """
+        Returns the network frozen for the NumPy backend, as a list of (weights, bias, activation) for each layer,
+        where weights and bias are float32 arrays, like Keras uses, and activation is a function from ACTIVATIONS.
+        """
+        if getattr(self, '_network', None) is None:
+            layers, weights = self.layers(), self.get_weights()
+            self._network = [(np.ascontiguousarray(weights[2 * i], dtype=np.float32),
+                              np.asarray(weights[2 * i + 1], dtype=np.float32),
+                              ACTIVATIONS[activation])
+                             for i, (units, activation) in enumerate(layers)]
+        return self._network
+
+    def _forward(self, x):
+        start = time.perf_counter()
+        if self.backend == 'numpy':
+            y = np.asarray(x, dtype=np.float32)
+            for weights, bias, activation in self.numpy_network():
+                y = y @ weights
+                y += bias
+                y = activation(y)
+        else:
+            y = self.keras_model()(x, training=False).numpy()
+        self.inference_stats['batches'] += 1
+        self.inference_stats['rows'] += len(x)
+        self.inference_stats['seconds'] += time.perf_counter() - start
+        return y
+
+    def reset(self):
+        """
+        Restores the complete state of the model as it was loaded, or as it was last trained with :meth:`.train`,
+        so that the model can be reused for another run without loading it again, and no state of a previous run is
+        left in it. This replaces the weights that an :class:`.OnlineTrainer` swapped in, drops the network that was
+        frozen for the NumPy backend, the compiled :class:`.FeatureEncoder`, and the Keras model that was rebuilt from
+        the weights, and starts a new prediction cache and new inference statistics. The backend is kept.
+        """
+        if getattr(self, '_loaded_state', None) is not None:
+            self.__dict__.update(self._loaded_state)
+        self._network, self._feature_encoder = None, None
+        self.predict_cache = PredictionCache(self.predict_cache.max_size)
+        self.inference_stats = {'batches': 0, 'rows': 0, 'seconds': 0.0}
+
+    def stats(self):
+        """
+        Returns the statistics of the prediction cache and of inference: the number of batches that were passed
+        through the network, the number of rows in them, and the seconds that took.
+        """
+        return {'cache': self.predict_cache.stats(), 'inference': dict(self.inference_stats)}
 
-class ExecutionTimeModelPO(ExecutionTimeModel):
-    def __init__(self):
-        super().__init__()
-        self._onehot_columns = ['Activity', 'Resource']
-        self._rest_columns = ['Create Purchase Requisition', 'Create Request for Quotation', 'Analyze Request for Quotation', 'Send Request for Quotation to Supplier', 'Create Quotation comparison Map', 'Analyze Quotation Comparison Map', 'Choose best option', 'Settle Conditions With Supplier', 'Create Purchase Order', 'Confirm Purchase Order', 'Deliver Goods Services', 'Release Purchase Order', 'Approve Purchase Order for payment', 'Send Invoice', "Release Supplier's Invoice", "Authorize Supplier's Invoice payment", 'Pay Invoice', 'Amend Request for Quotation', 'Settle Dispute With Supplier', 'Analyze Purchase Requisition', 'Amend Purchase Requisition']
+    def delete_case_from_cache(self, case_id):
+        """
+        Is invoked when a case completes. Cache entries are shared by cases and evicted when the cache is full,
+        so nothing is deleted.
+        """
+        pass
 
     def train(self, resources, task_resource_durations, task_type_occurrences):
-        train_df = self.__generate_train_df(task_resource_durations, task_type_occurrences)
+        train_df = self._generate_train_df(task_resource_durations, task_type_occurrences)
         x, y = self._encode_df(resources, train_df)
         self.train_x_y(x, y)
 
-    def __generate_train_df(self, task_resource_durations, task_type_occurrences):
+    def train_observations(self, resources, observations):
+        """
+        Trains the model on the observations in an :class:`.ObservationBuffer`.
+        """
+        x, y = self._encode_df(resources, observations.frame())
+        self.train_x_y(x, y)
+
+    def _generate_train_df(self, task_resource_durations, task_type_occurrences):
         feature_list = []
         for task_resource, value in task_resource_durations.items():
             task, resource = task_resource
@@ -83,228 +523,227 @@ class ExecutionTimeModelPO(ExecutionTimeModel):
             features = {**number_task_type_occurrences,
                         'Activity': task.task_type,
                         'Resource': resource,
-                        'y' : value}
+                        **task.data,
+                        'y': value}
             feature_list.append(features)
 
         return pd.DataFrame(feature_list)
 
     def _transform_data(self, df):
-        # Transform the data
         normalized_data = self._normalizer.transform(df[self._rest_columns])
         onehot_data = self._encoder.transform(df[self._onehot_columns])
-        return (normalized_data, onehot_data)
-    
+        if not self._standardization_columns:
+            return (normalized_data, onehot_data)
+        standardized_data = self._standarizer.transform(df[self._standardization_columns])
+        return (normalized_data, standardized_data, onehot_data)
+
     def _encode_df(self, resources, df):
+        from sklearn.preprocessing import StandardScaler, Normalizer, OneHotEncoder
         self._encoder = OneHotEncoder(sparse=False, handle_unknown='ignore')
         self._encoder.fit(df[self._onehot_columns])
 
-        # Normalizer
         self._normalizer = Normalizer()
         self._normalizer.fit(df[self._rest_columns])
 
-        # Combine the features
-        x = np.concatenate(self._transform_data(df), axis=1)
-        y = df["y"].to_numpy()
-
-        return x,y
-
-    def _hash_data(self, task, resource, number_task_type_occurrences):
-        return hash(task.task_type) + hash(frozenset(task.data.items())) \
-            + hash(resource) + hash(frozenset(number_task_type_occurrences.items()))
-
-    def __predict_multiple_from_df(self, to_predict, to_normalize_data, to_standardize_data,
-                                   to_onehot_data, task_type_occurrences,
-                                   results = dict()):
-        normalize_data_df = pd.DataFrame(to_normalize_data, columns=self._rest_columns)
-        normalized_data = self._normalizer.transform(normalize_data_df)
-        onehot_data_df = pd.DataFrame(to_onehot_data, columns=self._onehot_columns)
-        onehot_data = self._encoder.transform(onehot_data_df)
-        x = np.concatenate((normalized_data, onehot_data), axis=1)
-        y = self._model(x, training=False)
-
-        for i, idx in enumerate(to_predict):
-            res = max(0.0, float(y[i][0]))
-            results[idx] = res
-            case_id = idx[0].case_id
-            hash_value = self._hash_data(idx[0], idx[1], task_type_occurrences[case_id])
-            self.predict_cache[case_id][hash_value] = res
-        return results
+        if self._standardization_columns:
+            self._standarizer = StandardScaler()
+            self._standarizer.fit(df[self._standardization_columns])
 
+        return self._x_y(df)
 
-    def predict_multiple_filtered(self, unassigned_tasks, resources, resource_pool, task_type_occurrences):
-        to_predict = []
-        to_normalize_data = []
-        to_standardize_data = []
-        to_onehot_data = []
-        results = dict()
-        for task in unassigned_tasks:
-            for resource in resources:
-                if resource in resource_pool[task.task_type]:
-                    hashed_data = self._hash_data(task, resource, task_type_occurrences[task.case_id])
-                    if hashed_data in self.predict_cache[task.case_id]:
-                        results[(task, resource)] = self.predict_cache[task.case_id][hashed_data]
-                    else:
-                        to_normalize_data.append(list(task_type_occurrences[task.case_id].values()))
-                        to_onehot_data.append([task.task_type, resource])
-                        to_predict.append((task, resource))
-        if to_predict:
-            results = self.__predict_multiple_from_df(to_predict, to_normalize_data, to_standardize_data,
-                                            to_onehot_data, task_type_occurrences, results)
-
-        return results
-    
-    def predict_multiple(self, unassigned_tasks, resource_pool, task_type_occurrences):
-        to_predict = []
-        to_normalize_data = []
-        to_standardize_data = []
-        to_onehot_data = []
-        results = dict()
-        for task in unassigned_tasks:
-            for resource in resource_pool[task.task_type]:
-                hashed_data = self._hash_data(task, resource, task_type_occurrences[task.case_id])
-                if hashed_data in self.predict_cache[task.case_id]:
-                    results[(task, resource)] = self.predict_cache[task.case_id][hashed_data]
-                else:
-                    #to_normalize_data.append(list(task_type_occurrences[task.case_id].values()))
-                    to_normalize_data.append(list(task_type_occurrences[task.case_id].values()))
-                    to_onehot_data.append([task.task_type, resource])
-                    to_predict.append((task, resource))
-
-        if to_predict:
-            results = self.__predict_multiple_from_df(to_predict, to_normalize_data, to_standardize_data,
-                                            to_onehot_data, task_type_occurrences,
-                                            results)
-
-        return results
-    
-    def delete_case_from_cache(self, case_id):
-        self.predict_cache.pop(case_id)
-
-
-class ExecutionTimeModelBPIC(ExecutionTimeModel):
-    def __init__(self):
-        super().__init__()
-        self._onehot_columns = ['Activity', 'Resource', 'ApplicationType', 'LoanGoal']
-        self._rest_columns = ['W_Complete application', 'W_Call after offers', 'W_Validate application', 'W_Call incomplete files', 'W_Handle leads', 'W_Assess potential fraud', 'W_Shortened completion']
-        self._standardization_columns = ['RequestedAmount']
+    def _x_y(self, df):
+        x = np.concatenate(self._transform_data(df), axis=1)
+        y = df["y"].to_numpy()
+        return x, y
 
-    def train(self, resources, task_resource_durations, task_type_occurrences):
-        train_df = self.__generate_train_df(task_resource_durations, task_type_occurrences)
-        x,y = self._encode_df(resources, train_df)
-        self.train_x_y(x, y)
+    def train_x_y(self, x, y):
+        from keras.models import Sequential
+        from keras.layers import Dense
+        from sklearn.model_selection import train_test_split
 
-    def __generate_train_df(self, task_resource_durations, task_type_occurrences):
-        feature_list = []
-        for task_resource, value in task_resource_durations.items():
-            task, resource = task_resource
-            number_task_type_occurrences = task_type_occurrences[task.case_id]
-            features = {**number_task_type_occurrences,
-                        'Activity': task.task_type,
-                        'Resource': resource,
-                        **task.data,
-                        'y' : value}
-            feature_list.append(features)
+        # Split the data into train and validation sets
+        x_train, x_val, y_train, y_val = train_test_split(x, y, test_size=0.2, random_state=42)
 
-        return pd.DataFrame(feature_list)
+        # Build the Keras model
+        self._model = Sequential()
+        self._model.add(Dense(150, input_dim=x_train.shape[1], activation='relu'))
+        self._model.add(Dense(100, activation='relu'))
+        self._model.add(Dense(25, activation='relu'))
+        self._model.add(Dense(1))  # Assuming you have a single output in regression problems
 
-    def _transform_data(self, df):
-        # Transform the data
-        normalized_data = self._normalizer.transform(df[self._rest_columns])
-        standardized_data = self._standarizer .transform(df[self._standardization_columns])
-        onehot_data = self._encoder.transform(df[self._onehot_columns])
-        return (normalized_data, standardized_data, onehot_data)
-    
-    def _encode_df(self, resources, df):
-        self._encoder = OneHotEncoder(sparse=False, handle_unknown='ignore')
-        self._encoder.fit(df[self._onehot_columns])
+        # Compile the model
+        self._model.compile(optimizer='adam', loss='mean_squared_error')
 
-        # Normalizer
-        self._normalizer = Normalizer()
-        self._normalizer.fit(df[self._rest_columns])
+        # Train the model
+        self._model.fit(x_train, y_train, epochs=300, batch_size=256, validation_data=(x_val, y_val),
+                        verbose=1)
+        self._layers, self._weights, self._network, self._feature_encoder = None, None, None, None
+        self.trained = True
+        self.predict_cache.clear()
+        self._keep_loaded_state()
+
+    def fine_tune(self, df, weights, epochs=10):
+        """
+        Trains a copy of the network, starting from the weights, on the observations in a DataFrame like
+        :meth:`.ObservationBuffer.frame` returns, and returns the weights of the copy. The transformers are not refitted,
+        such that the input of the network keeps its columns. The model itself is not changed.
+
+        :param df: the observations.
+        :param weights: the weights to start from, as :meth:`.get_weights` returns them.
+        :param epochs: the number of epochs.
+        :return: the fine-tuned weights.
+        """
+        x, y = self._x_y(df)
+        return _fine_tune(self.layers(), weights, x, y, epochs)
+
+    def feature_encoder(self):
+        """
+        Returns the :class:`.FeatureEncoder` of the model, which is compiled the first time it is needed after the
+        transformers of the model are fitted or loaded.
+        """
+        if getattr(self, '_feature_encoder', None) is None:
+            self._feature_encoder = FeatureEncoder(self)
+        return self._feature_encoder
 
-        # StandardScaler
-        self._standarizer  = StandardScaler()
-        self._standarizer.fit(df[self._standardization_columns])
+    def predict(self, task, resource, number_task_type_occurrences):
+        key = self._cache_key(task, resource, number_task_type_occurrences)
+        cached = self.predict_cache.get(key)
+        if cached is not None:
+            return cached
 
-        # Combine the features
-        x = np.concatenate(self._transform_data(df), axis=1)
-        y = df["y"].to_numpy()
+        x = self.feature_encoder().encode([(task, resource, number_task_type_occurrences)])
+        res = max(0.0, float(self._forward(x)[0][0]))
 
-        return x,y
-    
-
-    def __predict_multiple_from_df(self, to_predict, to_normalize_data, to_standardize_data,
-                                   to_onehot_data, task_type_occurrences,
-                                   results = dict()):
-        normalize_data_df = pd.DataFrame(to_normalize_data, columns=self._rest_columns)
-        normalized_data = self._normalizer.transform(normalize_data_df)
-        standardized_data_df = pd.DataFrame(to_standardize_data, columns=self._standardization_columns)
-        standardized_data = self._standarizer.transform(standardized_data_df)
-        onehot_data_df = pd.DataFrame(to_onehot_data, columns=self._onehot_columns)
-        onehot_data = self._encoder.transform(onehot_data_df)
-        x = np.concatenate((normalized_data, standardized_data, onehot_data), axis=1)
-        y = self._model(x, training=False)
-
-        for i, idx in enumerate(to_predict):
-            res = max(0.0, float(y[i][0]))
-            results[idx] = res
-            case_id = idx[0].case_id
-            hash_value = self._hash_data(idx[0], idx[1], task_type_occurrences[case_id])
-            self.predict_cache[case_id][hash_value] = res
-        return results
+        self.predict_cache.put(key, res)
+        return res
 
+    def predict_multiple(self, unassigned_tasks, resource_pool, task_type_occurrences):
+        pairs = [(task, resource) for task in unassigned_tasks for resource in resource_pool[task.task_type]]
+        return self._predict_pairs(pairs, task_type_occurrences)
 
     def predict_multiple_filtered(self, unassigned_tasks, resources, resource_pool, task_type_occurrences):
-        to_predict = []
-        to_normalize_data = []
-        to_standardize_data = []
-        to_onehot_data = []
-        results = dict()
-        for task in unassigned_tasks:
-            for resource in resources:
-                if resource in resource_pool[task.task_type]:
-                    hashed_data = self._hash_data(task, resource, task_type_occurrences[task.case_id])
-                    if hashed_data in self.predict_cache[task.case_id]:
-                        results[(task, resource)] = self.predict_cache[task.case_id][hashed_data]
-                    else:
-                        to_normalize_data.append(list(task_type_occurrences[task.case_id].values()))
-                        to_standardize_data.append([task.data['RequestedAmount']])
-                        to_onehot_data.append([task.task_type, resource, task.data['ApplicationType'], task.data['LoanGoal']])
-                        to_predict.append((task, resource))
-        if to_predict:
-            results = self.__predict_multiple_from_df(to_predict, to_normalize_data, to_standardize_data,
-                                            to_onehot_data, task_type_occurrences, results)
+        pairs = [(task, resource) for task in unassigned_tasks for resource in resources
+                 if resource in resource_pool[task.task_type]]
+        return self._predict_pairs(pairs, task_type_occurrences)
 
-        return results
-    
-    def predict_multiple(self, unassigned_tasks, resource_pool, task_type_occurrences):
-        to_predict = []
-        to_normalize_data = []
-        to_standardize_data = []
-        to_onehot_data = []
+    def _predict_pairs(self, pairs, task_type_occurrences):
+        # predicts the duration of each (task, resource) pair, in one batch for the pairs that are not cached,
+        # in which pairs with equal features share a row
         results = dict()
-        for task in unassigned_tasks:
-            for resource in resource_pool[task.task_type]:
-                hashed_data = self._hash_data(task, resource, task_type_occurrences[task.case_id])
-                if hashed_data in self.predict_cache[task.case_id]:
-                    results[(task, resource)] = self.predict_cache[task.case_id][hashed_data]
-                else:
-                    #to_normalize_data.append(list(task_type_occurrences[task.case_id].values()))
-                    to_normalize_data.append(list(task_type_occurrences[task.case_id].values()))
-                    to_standardize_data.append([task.data['RequestedAmount']])
-                    to_onehot_data.append([task.task_type, resource, task.data['ApplicationType'], task.data['LoanGoal']])
-                    to_predict.append((task, resource))
-
-        if to_predict:
-            results = self.__predict_multiple_from_df(to_predict, to_normalize_data, to_standardize_data,
-                                            to_onehot_data, task_type_occurrences,
-                                            results)
-
+        missed = []
+        rows = dict()
+        for task, resource in pairs:
+            number_task_type_occurrences = task_type_occurrences[task.case_id]
+            key = self._cache_key(task, resource, number_task_type_occurrences)
+            cached = self.predict_cache.get(key)
+            if cached is not None:
+                results[(task, resource)] = cached
+            else:
+                missed.append(((task, resource), key))
+                if key not in rows:
+                    rows[key] = (task, resource, number_task_type_occurrences)
+
+        if rows:
+            y = self._forward(self.feature_encoder().encode(list(rows.values())))
+            durations = dict()
+            for i, key in enumerate(rows):
+                durations[key] = max(0.0, float(y[i][0]))
+                self.predict_cache.put(key, durations[key])
+            for pair, key in missed:
+                results[pair] = durations[key]
         return results
-    
-    def delete_case_from_cache(self, case_id):
-        self.predict_cache.pop(case_id)
 
+    def _cache_key(self, task, resource, number_task_type_occurrences):
+        # the planner creates all occurrence dicts with the same keys in the same order, and the problem all data dicts
+        return (task.task_type, resource, tuple(number_task_type_occurrences.values()), tuple(task.data.values()))
+
+
+class OnlineTrainer:
+    """
+    Keeps training an :class:`.ExecutionTimeModel` while a simulation runs, after the planner trained it at the end of
+    the warm-up. The observations of the tasks that complete are collected in a replay buffer, which keeps the most
+    recent ones. Every interval of simulated time, a copy of the network is fine-tuned on the replay buffer by a
+    background worker, while the simulation continues with the current weights. The planner invokes :meth:`.update`
+    for each event, which swaps the fine-tuned weights into the model at once when fine-tuning is done, and clears
+    the prediction cache, so a planning decision never mixes predictions of old and new weights.
+
+    The worker is a process, because in a thread, Keras gets hardly any time next to a busy simulation: it releases the
+    interpreter lock for each TensorFlow operation, and has to wait to get it back every time. The process is spawned,
+    so the main module of the simulation must be guarded by ``if __name__ == "__main__":``. In daemonic processes, like
+    the workers of a sweep, which cannot start processes, the worker is a thread.
+    When the weights are swapped depends on how long fine-tuning takes in wall-clock time, so simulations with online
+    training are not reproducible by seed.
+
+    :param model: the model.
+    :param activity_names: the task types of which the occurrences are counted, see :class:`.ObservationBuffer`.
+    :param replay_size: the maximum number of observations in the replay buffer.
+    :param interval: the simulated time between the starts of two fine-tunings.
+    :param epochs: the number of epochs of a fine-tuning.
+    """
+
+    def __init__(self, model, activity_names, replay_size=50000, interval=24 * 7, epochs=10):
+        self.model = model
+        self.observations = ObservationBuffer(activity_names, max_size=replay_size)
+        self.interval = interval
+        self.epochs = epochs
+        self.fine_tunings = 0
+        self.fine_tuning_seconds = 0.0
+        self._last_start = None
+        self._started = None
+        self._executor = None
+        self._future = None
+
+    def observe(self, number_task_type_occurrences, task, resource, duration):
+        """
+        Adds the observation that a task took the duration when it was executed by the resource to the replay buffer.
+        """
+        self.observations.append(number_task_type_occurrences, task, resource, duration)
+
+    def update(self, current_time):
+        """
+        Swaps the fine-tuned weights into the model if a fine-tuning is done, and starts a fine-tuning if the interval
+        passed since the previous one started and none is running.
+
+        :param current_time: the current simulation time.
+        """
+        if self._future is not None and self._future.done():
+            self.model.set_weights(self._future.result())
+            self._future = None
+            self.fine_tunings += 1
+            self.fine_tuning_seconds += time.perf_counter() - self._started
+        if self._last_start is None:
+            self._last_start = current_time
+        if self._future is None and current_time - self._last_start >= self.interval and len(self.observations) > 0:
+            self._last_start = current_time
+            self._started = time.perf_counter()
+            x, y = self.model._x_y(self.observations.frame())
+            self._future = self._worker().submit(_fine_tune, self.model.layers(), self.model.get_weights(),
+                                                 x.astype(np.float32), y, self.epochs)
+
+    def _worker(self):
+        if self._executor is None:
+            if multiprocessing.current_process().daemon:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            else:
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def close(self):
+        """
+        Stops the worker, discarding a fine-tuning that is running.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor, self._future = None, None
+
+    def stats(self):
+        """
+        Returns the number of fine-tunings that were swapped into the model, the wall-clock seconds from starting them
+        to swapping them in, and the number of observations in the replay buffer.
+        """
+        return {'fine-tunings': self.fine_tunings, 'seconds': self.fine_tuning_seconds,
+                'observations': len(self.observations)}
 
 class TaskExecutionPrediction:
     def __init__(self, model, predict_multiple_enabled = False) -> None:
@@ -314,6 +753,9 @@ class TaskExecutionPrediction:
     def train(self, resources, task_resource_durations, task_type_occurrences):
         self.model.train(resources, task_resource_durations, task_type_occurrences)
 
+    def train_observations(self, resources, observations):
+        self.model.train_observations(resources, observations)
+
     def predict(self, unassigned_tasks, resource_pool, task_type_occurrences):
         trds = dict()
         mean_task_durations = dict()
@@ -333,127 +775,44 @@ class TaskExecutionPrediction:
                     durations.append(duration)
                 mean_task_durations[task] = np.mean(durations)
         return trds, mean_task_durations
-    
-class ExecutionTimeModelHelpdesk(ExecutionTimeModel):
-    def __init__(self):
-        super().__init__()
-        self._onehot_columns = ['Activity', 'Resource']
-        self._rest_columns = ['Assign seriousness', 'Take in charge ticket', 'Resolve ticket',
-            'Closed', 'Insert ticket', 'Wait', 'Create SW anomaly', 
-            'Require upgrade', 'Resolve SW anomaly', 'RESOLVED', 'INVALID', 
-            'VERIFIED', 'DUPLICATE', 'Schedule intervention']  
-        self._standardization_columns = []  
-
-    def train(self, resources, task_resource_durations, task_type_occurrences):
-        train_df = self.__generate_train_df(task_resource_durations, task_type_occurrences)
-        x, y = self._encode_df(resources, train_df)
-        self.train_x_y(x, y)
-
-    def __generate_train_df(self, task_resource_durations, task_type_occurrences):
-        feature_list = []
-        for task_resource, value in task_resource_durations.items():
-            task, resource = task_resource
-            number_task_type_occurrences = task_type_occurrences[task.case_id]
-            features = {**number_task_type_occurrences,
-                        'Activity': task.task_type,
-                        'Resource': resource,
-                        'y': value}
-            feature_list.append(features)
-
-        return pd.DataFrame(feature_list)
-
-    def _transform_data(self, df):
-        normalized_data = self._normalizer.transform(df[self._rest_columns])
-        onehot_data = self._encoder.transform(df[self._onehot_columns])
-        return (normalized_data, onehot_data)
-    
-    def _encode_df(self, resources, df):
-        self._encoder = OneHotEncoder(sparse=False, handle_unknown='ignore')
-        self._encoder.fit(df[self._onehot_columns])
-
-        self._normalizer = Normalizer()
-        self._normalizer.fit(df[self._rest_columns])
 
-        x = np.concatenate(self._transform_data(df), axis=1)
-        y = df["y"].to_numpy()
 
-        return x, y
+class ExecutionTimeModelPO(ExecutionTimeModel):
+    """
+    The schema of the purchase order log. Prefer :meth:`.ExecutionTimeModel.from_problem` for new models;
+    the class is kept such that the prediction models that were trained with it can be loaded.
+    """
+    def __init__(self):
+        super().__init__(['Create Purchase Requisition', 'Create Request for Quotation', 'Analyze Request for Quotation', 'Send Request for Quotation to Supplier', 'Create Quotation comparison Map', 'Analyze Quotation Comparison Map', 'Choose best option', 'Settle Conditions With Supplier', 'Create Purchase Order', 'Confirm Purchase Order', 'Deliver Goods Services', 'Release Purchase Order', 'Approve Purchase Order for payment', 'Send Invoice', "Release Supplier's Invoice", "Authorize Supplier's Invoice payment", 'Pay Invoice', 'Amend Request for Quotation', 'Settle Dispute With Supplier', 'Analyze Purchase Requisition', 'Amend Purchase Requisition'])
 
-    def _hash_data(self, task, resource, number_task_type_occurrences):
-        return hash(task.task_type) + hash(frozenset(task.data.items())) \
-            + hash(resource) + hash(frozenset(number_task_type_occurrences.items()))
-
-    def __predict_multiple_from_df(self, to_predict, to_normalize_data, to_standardize_data,
-                                   to_onehot_data, task_type_occurrences,
-                                   results=dict()):
-        normalize_data_df = pd.DataFrame(to_normalize_data, columns=self._rest_columns)
-        normalized_data = self._normalizer.transform(normalize_data_df)
-        onehot_data_df = pd.DataFrame(to_onehot_data, columns=self._onehot_columns)
-        onehot_data = self._encoder.transform(onehot_data_df)
-        x = np.concatenate((normalized_data, onehot_data), axis=1)
-        y = self._model(x, training=False)
-
-        for i, idx in enumerate(to_predict):
-            res = max(0.0, float(y[i][0]))
-            results[idx] = res
-            case_id = idx[0].case_id
-            hash_value = self._hash_data(idx[0], idx[1], task_type_occurrences[case_id])
-            self.predict_cache[case_id][hash_value] = res
-        return results
 
-    def predict_multiple_filtered(self, unassigned_tasks, resources, resource_pool, task_type_occurrences):
-        to_predict = []
-        to_normalize_data = []
-        to_standardize_data = []
-        to_onehot_data = []
-        results = dict()
-        for task in unassigned_tasks:
-            for resource in resources:
-                if resource in resource_pool[task.task_type]:
-                    hashed_data = self._hash_data(task, resource, task_type_occurrences[task.case_id])
-                    if hashed_data in self.predict_cache[task.case_id]:
-                        results[(task, resource)] = self.predict_cache[task.case_id][hashed_data]
-                    else:
-                        to_normalize_data.append(list(task_type_occurrences[task.case_id].values()))
-                        to_onehot_data.append([task.task_type, resource])
-                        to_predict.append((task, resource))
-        if to_predict:
-            results = self.__predict_multiple_from_df(to_predict, to_normalize_data, to_standardize_data,
-                                            to_onehot_data, task_type_occurrences, results)
+class ExecutionTimeModelBPIC(ExecutionTimeModel):
+    """
+    The schema of the BPI Challenge 2017 log, see :class:`.ExecutionTimeModelPO`.
+    """
+    def __init__(self):
+        super().__init__(['W_Complete application', 'W_Call after offers', 'W_Validate application', 'W_Call incomplete files', 'W_Handle leads', 'W_Assess potential fraud', 'W_Shortened completion'],
+                         ['Activity', 'Resource', 'ApplicationType', 'LoanGoal'],
+                         ['RequestedAmount'])
 
-        return results
-    
-    def predict_multiple(self, unassigned_tasks, resource_pool, task_type_occurrences):
-        to_predict = []
-        to_normalize_data = []
-        to_standardize_data = []
-        to_onehot_data = []
-        results = dict()
-        for task in unassigned_tasks:
-            for resource in resource_pool[task.task_type]:
-                hashed_data = self._hash_data(task, resource, task_type_occurrences[task.case_id])
-                if hashed_data in self.predict_cache[task.case_id]:
-                    results[(task, resource)] = self.predict_cache[task.case_id][hashed_data]
-                else:
-                    to_normalize_data.append(list(task_type_occurrences[task.case_id].values()))
-                    to_onehot_data.append([task.task_type, resource])
-                    to_predict.append((task, resource))
 
-        if to_predict:
-            results = self.__predict_multiple_from_df(to_predict, to_normalize_data, to_standardize_data,
-                                            to_onehot_data, task_type_occurrences,
-                                            results)
+class ExecutionTimeModelHelpdesk(ExecutionTimeModel):
+    """
+    The schema of the Helpdesk log, see :class:`.ExecutionTimeModelPO`.
+    """
+    def __init__(self):
+        super().__init__(['Assign seriousness', 'Take in charge ticket', 'Resolve ticket',
+            'Closed', 'Insert ticket', 'Wait', 'Create SW anomaly',
+            'Require upgrade', 'Resolve SW anomaly', 'RESOLVED', 'INVALID',
+            'VERIFIED', 'DUPLICATE', 'Schedule intervention'])
 
-        return results
-    
-    def delete_case_from_cache(self, case_id):
-        self.predict_cache.pop(case_id)
 
 class ExecutionTimeModelACR(ExecutionTimeModel):
+    """
+    The schema of the ACR log, see :class:`.ExecutionTimeModelPO`.
+    """
     def __init__(self):
-        super().__init__()
-        self._onehot_columns = ['Activity', 'Resource']
-        self._rest_columns = [
+        super().__init__([
             'Traer informacion estudiante - banner',
             'Radicar Solicitud Homologacion',
             'Validar solicitud',
@@ -470,110 +829,4 @@ class ExecutionTimeModelACR(ExecutionTimeModel):
             'Cancelar curso',
             'Avanzar recepcion documentos',
             'Validar solicitud / pre-homologacion'
-        ]
-        self._standardization_columns = []  
-    def train(self, resources, task_resource_durations, task_type_occurrences):
-        train_df = self.__generate_train_df(task_resource_durations, task_type_occurrences)
-        x, y = self._encode_df(resources, train_df)
-        self.train_x_y(x, y)
-
-    def __generate_train_df(self, task_resource_durations, task_type_occurrences):
-        feature_list = []
-        for task_resource, value in task_resource_durations.items():
-            task, resource = task_resource
-            number_task_type_occurrences = task_type_occurrences[task.case_id]
-            features = {**number_task_type_occurrences,
-                        'Activity': task.task_type,
-                        'Resource': resource,
-                        'y': value}
-            feature_list.append(features)
-
-        return pd.DataFrame(feature_list)
-
-    def _transform_data(self, df):
-        normalized_data = self._normalizer.transform(df[self._rest_columns])
-        onehot_data = self._encoder.transform(df[self._onehot_columns])
-        return (normalized_data, onehot_data)
-    
-    def _encode_df(self, resources, df):
-        self._encoder = OneHotEncoder(sparse=False, handle_unknown='ignore')
-        self._encoder.fit(df[self._onehot_columns])
-
-        self._normalizer = Normalizer()
-        self._normalizer.fit(df[self._rest_columns])
-
-        x = np.concatenate(self._transform_data(df), axis=1)
-        y = df["y"].to_numpy()
-
-        return x, y
-
-    def _hash_data(self, task, resource, number_task_type_occurrences):
-        return hash(task.task_type) + hash(frozenset(task.data.items())) \
-            + hash(resource) + hash(frozenset(number_task_type_occurrences.items()))
-
-    def __predict_multiple_from_df(self, to_predict, to_normalize_data, to_standardize_data,
-                                   to_onehot_data, task_type_occurrences,
-                                   results=dict()):
-        normalize_data_df = pd.DataFrame(to_normalize_data, columns=self._rest_columns)
-        normalized_data = self._normalizer.transform(normalize_data_df)
-        onehot_data_df = pd.DataFrame(to_onehot_data, columns=self._onehot_columns)
-        onehot_data = self._encoder.transform(onehot_data_df)
-        x = np.concatenate((normalized_data, onehot_data), axis=1)
-        y = self._model(x, training=False)
-
-        for i, idx in enumerate(to_predict):
-            res = max(0.0, float(y[i][0]))
-            results[idx] = res
-            case_id = idx[0].case_id
-            hash_value = self._hash_data(idx[0], idx[1], task_type_occurrences[case_id])
-            self.predict_cache[case_id][hash_value] = res
-        return results
-
-    def predict_multiple_filtered(self, unassigned_tasks, resources, resource_pool, task_type_occurrences):
-        to_predict = []
-        to_normalize_data = []
-        to_standardize_data = []
-        to_onehot_data = []
-        results = dict()
-        for task in unassigned_tasks:
-            for resource in resources:
-                if resource in resource_pool[task.task_type]:
-                    hashed_data = self._hash_data(task, resource, task_type_occurrences[task.case_id])
-                    if hashed_data in self.predict_cache[task.case_id]:
-                        results[(task, resource)] = self.predict_cache[task.case_id][hashed_data]
-                    else:
-                        to_normalize_data.append(list(task_type_occurrences[task.case_id].values()))
-                        to_onehot_data.append([task.task_type, resource])
-                        to_predict.append((task, resource))
-        if to_predict:
-            results = self.__predict_multiple_from_df(to_predict, to_normalize_data, to_standardize_data,
-                                            to_onehot_data, task_type_occurrences, results)
-
-        return results
-    
-    def predict_multiple(self, unassigned_tasks, resource_pool, task_type_occurrences):
-        to_predict = []
-        to_normalize_data = []
-        to_standardize_data = []
-        to_onehot_data = []
-        results = dict()
-        for task in unassigned_tasks:
-            for resource in resource_pool[task.task_type]:
-                hashed_data = self._hash_data(task, resource, task_type_occurrences[task.case_id])
-                if hashed_data in self.predict_cache[task.case_id]:
-                    results[(task, resource)] = self.predict_cache[task.case_id][hashed_data]
-                else:
-                    to_normalize_data.append(list(task_type_occurrences[task.case_id].values()))
-                    to_onehot_data.append([task.task_type, resource])
-                    to_predict.append((task, resource))
-
-        if to_predict:
-            results = self.__predict_multiple_from_df(to_predict, to_normalize_data, to_standardize_data,
-                                            to_onehot_data, task_type_occurrences,
-                                            results)
-
-        return results
-    
-    def delete_case_from_cache(self, case_id):
-        self.predict_cache.pop(case_id)
-
+        ])
@@ -10,11 +10,16 @@ from ilp_policy_2_batch import UnrelatedParallelMachinesSchedulingBatchPolicy2
 from least_loaded_qualified_person_policy import LeastLoadedQualifiedPersonPolicy
 from russel_policies import *
 from park_policy import *
-from task_execution_time import ExecutionTimeModel
+from task_execution_time import ExecutionTimeModel, OnlineTrainer
 from hungarian_policy import HungarianMultiObjectivePolicy
+from planning_corpus import PlanningCorpus
+from cp_sat_session import AdaptiveTimeBudget
 
 import numpy as np
 import multiprocessing
+import itertools
+import traceback
+import random
 import time
 from datetime import datetime
 import csv
@@ -29,33 +34,115 @@ Configure the file names of your mined simulation model and prediction model. Yo
 to collect your simulation statistics. These statistics will be stored in the csv that is specified in this file (in lines 155-170)
 """
 
-def run_simulator(problem, days, objective, delta, result_queue, selection_strategy=None):
-    real_start_time = time.time()
-    start_time = time.process_time()
-    prediction_model = ExecutionTimeModel()
-
-    if problem == 'BPIC':
-        with open('prediction_model_bpic.pkl', 'rb') as file:
-            prediction_model = pickle.load(file)
-    elif problem == 'PO':
-        with open('prediction_model_po.pkl', 'rb') as file:
-            prediction_model = pickle.load(file)
-    elif problem == 'Helpdesk':
-        #with open('prediction_model_HELPDESK_1hour.pkl', 'rb') as file:
-        with open('prediction_model_HELPDESK_TESTIN2.pkl', 'rb') as file:
-            prediction_model = pickle.load(file)
-    elif problem == 'ACR':
-        with open('prediction_model_ACR_TESTIN.pkl', 'rb') as file:
-            prediction_model = pickle.load(file)
-    
+PREDICTION_BACKEND = 'numpy'
+"""
+The inference backend of the prediction models, 'numpy' or 'keras', see ExecutionTimeModel.
+"""
 
-    warm_up_policy = RandomPolicy()
-    warm_up_time =  0
-    simulation_time = 24*days
+CORPUS_FILE = None
+"""
+The file to which the planner captures the inputs of its allocation calls, see PlanningCorpus, or None to not capture them.
+It is formatted with the problem, objective, delta, and seed of the run, e.g. 'corpus_{problem}_{objective}_{delta}_{seed}.pkl'.
+"""
+
+ONLINE_TRAINING = False
+"""
+Whether the prediction model keeps being fine-tuned on the tasks that complete while a run simulates, see OnlineTrainer.
+The fine-tuned weights are reset to the loaded weights before the next run. Runs with online training are not reproducible by seed.
+"""
+
+TIME_BUDGET = None
+"""
+The seconds that the CP-SAT solves of the MILP and Scheduling policies may take together per simulated hour, or None for their
+fixed time limits per solve. With a budget, each solve gets an adaptive time limit, see AdaptiveTimeBudget, and when the
+budget of an hour is spent, the policy falls back to its backup policy. Keep it below the hour_timeout of the planner.
+"""
+
+_prediction_models = dict()
+_problems = dict()
+"""
+The prediction model and mined problem per problem name, loaded at most once per process by load_artifacts.
+"""
+
+
+def load_artifacts(problem, with_prediction_model=True):
+    """
+    Returns the prediction model and the mined problem of the problem with the specified name.
+    They are loaded from disk the first time they are needed in a process and reused after that.
+    Each time they are returned, they are reset, such that no state of a previous run is left in them: the prediction model
+    to its complete state as it was loaded, see ExecutionTimeModel.reset, and the mined problem, see MinedProblem.restart.
+    Without prediction model, an untrained ExecutionTimeModel is returned instead of loading the prediction model,
+    which is what policies that do not use predictions need.
+    """
+    if with_prediction_model and problem not in _prediction_models:
+        prediction_model = ExecutionTimeModel()
+
+        if problem == 'BPIC':
+            with open('prediction_model_bpic.pkl', 'rb') as file:
+                prediction_model = pickle.load(file)
+        elif problem == 'PO':
+            with open('prediction_model_po.pkl', 'rb') as file:
+                prediction_model = pickle.load(file)
+        elif problem == 'Helpdesk':
+            #with open('prediction_model_HELPDESK_1hour.pkl', 'rb') as file:
+            with open('prediction_model_HELPDESK_TESTIN2.pkl', 'rb') as file:
+                prediction_model = pickle.load(file)
+        elif problem == 'ACR':
+            with open('prediction_model_ACR_TESTIN.pkl', 'rb') as file:
+                prediction_model = pickle.load(file)
+        prediction_model.use_backend(PREDICTION_BACKEND)
+        _prediction_models[problem] = prediction_model
+
+    if problem not in _problems:
+        #to get  directory 
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        #going to the bpo-project/bpo directory
+        bpo_path = os.path.abspath(os.path.join(script_dir, "..", "bpo-project", "bpo"))
+
+        if problem == 'BPIC':
+            instance_file = 'src/simulator/data/BPI Challenge 2017 - instance.pickle'
+        elif problem == 'PO':
+            instance_file = 'src/simulator/data/po_problem.pickle'
+        elif problem == 'Helpdesk':
+            instance_file = os.path.join(bpo_path, 'HELPDESK_Problem_TESTIN2.pickle')  # updated path to use bpo_path
+        elif problem == 'ACR':
+            instance_file = os.path.join(bpo_path, 'ACR_problem_TESTIN.pickle')
+
+        sys.path.append('src/simulator')
+        _problems[problem] = MinedProblem.from_file(instance_file)
+
+    prediction_model = _prediction_models[problem] if with_prediction_model else ExecutionTimeModel()
+    prediction_model.reset()
+    mined_problem = _problems[problem]
+    mined_problem.restart()
+    return prediction_model, mined_problem
+
+
+def init_worker(problems, with_prediction_models):
+    """
+    Initializes a sweep worker process by loading the artifacts of each of the problems once.
+    """
+    for problem in problems:
+        load_artifacts(problem, with_prediction_models)
+
+
+def create_time_budget():
+    """
+    Returns a new AdaptiveTimeBudget of TIME_BUDGET seconds per simulated hour, or None if TIME_BUDGET is None.
+    """
+    return None if TIME_BUDGET is None else AdaptiveTimeBudget(hour_budget=TIME_BUDGET)
+
+
+def create_policy(objective, delta, selection_strategy):
+    """
+    Returns the policy for the objective. Returns None for Park, because the Park policy is created from the planner.
+    """
     if objective == "Hungarian":
         policy = HungarianMultiObjectivePolicy(1, 0, 0, delta)
     elif objective == "MILP":
-        policy = UnrelatedParallelMachinesSchedulingNonAssignPolicy2(1, 0, 0, delta, selection_strategy)
+        policy = UnrelatedParallelMachinesSchedulingNonAssignPolicy2(1, 0, 0, delta, selection_strategy, budget=create_time_budget())
+    elif objective == "Scheduling":
+        policy = UnrelatedParallelMachinesSchedulingPolicy(budget=create_time_budget())
     elif objective == "KBatch":
         # use delta for batch size k
         policy = UnrelatedParallelMachinesSchedulingBatchPolicy2(1, 0, 0, 0, selection_strategy, delta)
@@ -69,33 +156,45 @@ def run_simulator(problem, days, objective, delta, result_queue, selection_strat
         policy = ShortestQueuePolicy()
     elif objective == "Random":
         policy = RandomPolicy()
+    return policy
 
 
-        #to get  directory 
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-        #going to the bpo-project/bpo directory
-    bpo_path = os.path.abspath(os.path.join(script_dir, "..", "bpo-project", "bpo"))
-
-    if problem == 'BPIC':
-        instance_file = 'src/simulator/data/BPI Challenge 2017 - instance.pickle'
-    elif problem == 'PO':
-        instance_file = 'src/simulator/data/po_problem.pickle'
-    elif problem == 'Helpdesk':
-        instance_file = os.path.join(bpo_path, 'HELPDESK_Problem_TESTIN2.pickle')  # updated path to use bpo_path
-    elif problem == 'ACR':
-        instance_file = os.path.join(bpo_path, 'ACR_problem_TESTIN.pickle')
+def uses_predictions(objective):
+    """
+    Returns whether the policy for the objective uses predictions, and consequently needs the prediction model.
+    """
+    policy = create_policy(objective, 0, None)
+    return policy is None or policy.uses_predictions
 
-    
 
-    sys.path.append('src/simulator')
-    problem = MinedProblem.from_file(instance_file)
+def run_simulator(problem, days, objective, delta, selection_strategy=None, seed=None):
+    problem_name = problem
+    real_start_time = time.time()
+    start_time = time.process_time()
+    warm_up_policy = RandomPolicy()
+    warm_up_time =  0
+    simulation_time = 24*days
+    policy = create_policy(objective, delta, selection_strategy)
+    prediction_model, problem = load_artifacts(problem, uses_predictions(objective))
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+        problem.seed(seed)
 
     activity_names = list(problem.resource_pools.keys())
+    corpus = None
+    if CORPUS_FILE is not None:
+        corpus = PlanningCorpus(CORPUS_FILE.format(problem=problem_name, objective=objective, delta=delta, seed=seed))
+    online_trainer = None
+    if ONLINE_TRAINING and uses_predictions(objective):
+        online_trainer = OnlineTrainer(prediction_model, activity_names)
     my_planner = Planner(prediction_model, warm_up_policy, warm_up_time, policy,
                         activity_names,
                         predict_multiple=True,
                         hour_timeout=3600,
-                        debug=True)
+                        debug=True,
+                        online_trainer=online_trainer,
+                        corpus=corpus)
 
     reporter = EventLogReporter('./test.csv', [])
     simulator = Simulator(problem, reporter, my_planner)
@@ -111,6 +210,14 @@ def run_simulator(problem, days, objective, delta, result_queue, selection_strat
         my_planner.policy = policy
 
     simulator_result = simulator.simulate(simulation_time)
+    if corpus is not None:
+        corpus.close()
+    if online_trainer is not None:
+        online_trainer.close()
+        print('Online training:', online_trainer.stats())
+    print('Prediction model:', prediction_model.stats())
+    if hasattr(my_planner.policy, 'stats'):
+        print('Policy:', my_planner.policy.stats())
     times = (datetime.fromtimestamp(real_start_time).strftime("%Y-%m-%d %H:%M:%S"),
              datetime.fromtimestamp(time.time()).strftime("%Y-%m-%d %H:%M:%S"),
              str(time.time() - real_start_time),
@@ -126,45 +233,69 @@ def run_simulator(problem, days, objective, delta, result_queue, selection_strat
         res += [str(policy.optimal), str(policy.feasible), str(policy.no_solution), selection_strategy]
     else:
         res += ['', '', '', '']
-    result_queue.put(res)
-
-def get_alive_proceses(all_procesess):
-    result = []
-    for p in all_procesess:
-        if p.is_alive():
-            result.append(p)
-    return result
-
-processes = []
-result_queue = multiprocessing.Queue()
-alive_processes = []
-
-MAX_PROCESSES = int(sys.argv[6])
-problem = sys.argv[8]
-for i in np.arange(float(sys.argv[1]), float(sys.argv[2]), float(sys.argv[3])):
-    alive_processes = get_alive_proceses(processes)
-    while len(alive_processes) >= MAX_PROCESSES:
-        time.sleep(0.5)
-        alive_processes = get_alive_proceses(processes)
-
-    selection_strategy = sys.argv[7]
-    p = multiprocessing.Process(target=run_simulator, args=(problem, int(sys.argv[5]), sys.argv[4], i, result_queue, selection_strategy))
-    p.start()
-    print(i, 'Started')
-    processes.append(p)
-
-    while not result_queue.empty():
-        res = result_queue.get()
-        print(res)
-        with open('resultsTemporary.csv', 'a') as f:
-            csv_writer = csv.writer(f)
-            csv_writer.writerow(res)
-
-for p in processes:
-    p.join()
-while not result_queue.empty():
-    res = result_queue.get()
-    print(res)
-    with open('resultsTemporary.csv', 'a') as f:
+    res += [problem_name, '' if seed is None else str(seed), selection_strategy or '']
+    return res
+
+
+def sweep_key(objective, delta, problem, seed, selection_strategy):
+    """
+    The key that identifies a sweep point, as it is written in the first, sixth, and last three columns of its result row.
+    """
+    return objective, str(delta), problem, '' if seed is None else str(seed), selection_strategy or ''
+
+
+def completed_sweep_keys(results_file):
+    """
+    Returns the keys of the sweep points of which the results file already has a row.
+    Rows that were written before the problem, seed, and selection strategy columns existed are not recognized.
+    """
+    if not os.path.exists(results_file):
+        return set()
+    with open(results_file, newline='') as f:
+        return {(row[0], row[5], *row[-3:]) for row in csv.reader(f) if len(row) >= 22}
+
+
+def run_sweep_point(point):
+    problem, days, objective, delta, selection_strategy, seed = point
+    try:
+        return run_simulator(problem, days, objective, delta, selection_strategy, seed)
+    except Exception:
+        # the point gets no row, so a restarted sweep runs it again
+        print(point, 'Failed')
+        traceback.print_exc()
+        return None
+
+
+def sweep(objectives, deltas, problems, seeds, days, selection_strategy, max_processes, results_file='resultsTemporary.csv'):
+    """
+    Runs the simulation for each combination of objective, delta, problem, and seed on a pool of at most
+    max_processes worker processes. Writes the result row of each combination to the results file as soon as
+    it finishes. Combinations of which the results file already has a row are skipped,
+    so a sweep that is interrupted can be resumed by running it again.
+    """
+    done = completed_sweep_keys(results_file)
+    points = [(problem, days, objective, delta, selection_strategy, seed)
+              for objective, delta, problem, seed in itertools.product(objectives, deltas, problems, seeds)
+              if sweep_key(objective, delta, problem, seed, selection_strategy) not in done]
+    print(len(points), 'sweep points to run,', len(done), 'already in', results_file)
+    with multiprocessing.Pool(max_processes, initializer=init_worker,
+                              initargs=(problems, any(uses_predictions(objective) for objective in objectives))) as pool, open(results_file, 'a', newline='') as f:
         csv_writer = csv.writer(f)
-        csv_writer.writerow(res)
+        for res in pool.imap_unordered(run_sweep_point, points):
+            if res is not None:
+                print(res)
+                csv_writer.writerow(res)
+                f.flush()
+
+
+if __name__ == "__main__":
+    # arguments: start end stepsize policies days processes selection_strategy problems [seeds [results_file]],
+    # where policies, problems, and seeds can be comma-separated lists
+    sweep(objectives=sys.argv[4].split(','),
+          deltas=list(np.arange(float(sys.argv[1]), float(sys.argv[2]), float(sys.argv[3]))),
+          problems=sys.argv[8].split(','),
+          seeds=[int(seed) for seed in sys.argv[9].split(',')] if len(sys.argv) > 9 else [None],
+          days=int(sys.argv[5]),
+          selection_strategy=sys.argv[7],
+          max_processes=int(sys.argv[6]),
+          results_file=sys.argv[10] if len(sys.argv) > 10 else 'resultsTemporary.csv')
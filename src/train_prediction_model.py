@@ -3,54 +3,170 @@ import sys
 import pickle
 import multiprocessing
 import time
+import numpy as np
+from numpy.random import SeedSequence
 from simulator.simulator import Simulator, Reporter
 from planner import Planner
-from task_execution_time import ExecutionTimeModelHelpdesk
-from task_execution_time import ExecutionTimeModelACR
+from task_execution_time import ExecutionTimeModel, ObservationBuffer
 from russel_policies import RandomPolicy
-from simulator.problems import MinedProblem
+from simulator.problems import MinedProblem, Task
 
 """
 This file is responsible for training the prediction model that estimates processing times of individual resources. Use your mined simulation model here by saving it
 to problem_file. Configure the simulation parameters and run this file to train the prediction model, which will result in a pickle file that contains the trained model.
+
+The training data can be collected in two modes:
+    python src/train_prediction_model.py generate [processes] [seed]
+samples the cases that arrive during the warm-up directly from the mined problem, in parallel, and saves them to dataset_file,
+from which they are loaded instead when the file exists. This is the default.
+    python src/train_prediction_model.py simulate
+simulates the warm-up with a random policy and trains the model when the warm-up ends.
 """
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 bpo_path = os.path.abspath(os.path.join(script_dir, "..", "bpo-project", "bpo"))
-sys.path.append(bpo_path)
+# the mined problems are pickled with the modules of the simulator at the top level, which must resolve to src/simulator,
+# like in test.py, instead of to the modules of the same names in bpo_path, which lack e.g. MinedProblem.seed
+sys.path.append(os.path.join(script_dir, "simulator"))
+parent_dir = os.path.dirname(script_dir)
 
 # path to the mined Helpdesk simulation model
 problem_file = os.path.join(bpo_path, "HELPDESK_Problem_TESTIN2.pickle")
-problem = MinedProblem.from_file(problem_file)
+dataset_file = os.path.join(parent_dir, "prediction_dataset_HELPDESK_TESTIN2.pkl")
+model_output_path = os.path.join(parent_dir, "prediction_model_HELPDESK_TESTIN2.pkl")
 
-# adjust interarrival time (if needed)
-# problem.interarrival_time._alpha *= 1.8
+warm_up_time = 24 * 2 * 365  # warm-up time in hours
 
-prediction_model = ExecutionTimeModelHelpdesk()
-#prediction_model = ExecutionTimeModelACR()
 
-warm_up_policy = RandomPolicy()
-warm_up_time = 24 * 2 * 365  # warm-up time in hours
-simulation_time = warm_up_time
-activity_names = list(problem.resource_pools.keys())
+def nr_arriving_cases(problem, duration):
+    """
+    Returns the number of cases that arrive in the duration, sampled from the interarrival time of the problem.
+    """
+    nr_cases, arrival_time = 0, problem.interarrival_time_sample()
+    while arrival_time < duration:
+        nr_cases += 1
+        arrival_time += problem.interarrival_time_sample()
+    return nr_cases
 
-my_planner = Planner(prediction_model,
-                     warm_up_policy, warm_up_time,
-                     warm_up_policy,
-                     activity_names,
-                     predict_multiple=True,
-                     hour_timeout=120,
-                     debug=True)
 
-simulator = Simulator(problem, Reporter(), my_planner)
-simulator_result = simulator.simulate(24*5*365)
+def generate_observations(problem, activity_names, nr_cases, seed=None):
+    """
+    Generates the observations of the tasks of cases, as the planner records them during a warm-up, by sampling the cases
+    directly from the problem instead of simulating them. The cases of a mined problem are sequential, so each case is
+    a chain of task types sampled from the initial and next task type distributions. Each task is executed by a resource
+    that is drawn uniformly from its resource pool, like the random warm-up policy does, and its duration is sampled
+    from the processing times of the problem for the history of the case so far. Queues, resource availability,
+    and the events of the simulator do not influence these durations, so they are skipped.
 
-parent_dir = os.path.dirname(script_dir)
-model_output_path = os.path.join(parent_dir, "prediction_model_HELPDESK_TESTIN2.pkl")
+    :param problem: a :class:`.MinedProblem`.
+    :param activity_names: the task types of which the occurrences are counted, like the planner counts them.
+    :param nr_cases: the number of cases.
+    :param seed: an int, a numpy.random.SeedSequence, or None for a fresh seed.
+    :return: an :class:`.ObservationBuffer` with the observations.
+    """
+    seed = seed if isinstance(seed, SeedSequence) else SeedSequence(seed)
+    problem_seed, resource_seed = seed.spawn(2)
+    problem.seed(problem_seed)
+    rng = np.random.default_rng(resource_seed)
+
+    observations = ObservationBuffer(activity_names)
+    task_id = 0
+    for case_id in range(nr_cases):
+        data = {data_type: distribution.sample() for data_type, distribution in problem.data_types.items()}
+        history = dict.fromkeys(problem.task_types, 0)  # the completed tasks, on which the processing time depends
+        occurrences = dict.fromkeys(activity_names, 0)  # the activated tasks, which the planner counts
+        task_types = [problem.sample_initial_task_type()]
+        while task_types:
+            task = Task(task_id, case_id, task_types[0])
+            task.data = data
+            task_id += 1
+            occurrences[task.task_type] += 1
+            resource_pool = problem.resource_pools[task.task_type]
+            if resource_pool:
+                resource = resource_pool[rng.integers(len(resource_pool))]
+                duration = problem.processing_times.sample({**history, 'Activity': task.task_type, 'Resource': resource, **data})
+                observations.append(occurrences, task, resource, duration)
+            history[task.task_type] += 1
+            task_types = problem.next_task_types_sample(task)
+    return observations
+
+
+def generate_dataset(problem, activity_names, nr_cases, processes=1, seed=None):
+    """
+    Generates the observations of nr_cases cases with :func:`generate_observations`, split over processes that each
+    sample with an independent child seed of the seed.
+
+    :return: an :class:`.ObservationBuffer` with the observations of all processes.
+    """
+    seeds = SeedSequence(seed).spawn(processes)
+    nr_cases_per_process = [nr_cases // processes + (1 if i < nr_cases % processes else 0) for i in range(processes)]
+    arguments = [(problem, activity_names, n, s) for n, s in zip(nr_cases_per_process, seeds)]
+    if processes > 1:
+        with multiprocessing.Pool(processes) as pool:
+            parts = pool.starmap(generate_observations, arguments)
+    else:
+        parts = [generate_observations(*arguments[0])]
+    dataset = parts[0]
+    for part in parts[1:]:
+        dataset.extend(part)
+    return dataset
+
+
+def train_generated(problem, prediction_model, processes, seed):
+    activity_names = list(problem.resource_pools.keys())
+    if os.path.exists(dataset_file):
+        with open(dataset_file, 'rb') as file:
+            dataset = pickle.load(file)
+        print("Dataset loaded from:", dataset_file)
+    else:
+        start = time.time()
+        nr_cases = nr_arriving_cases(problem, warm_up_time)
+        dataset = generate_dataset(problem, activity_names, nr_cases, processes, seed)
+        with open(dataset_file, 'wb') as file:
+            pickle.dump(dataset, file)
+        print("Generated", len(dataset), "observations of", nr_cases, "cases in", time.time() - start, "seconds.")
+        print("Dataset saved to:", dataset_file)
+    prediction_model.train_observations(problem.resources, dataset)
+
+
+def train_simulated(problem, prediction_model):
+    warm_up_policy = RandomPolicy()
+    activity_names = list(problem.resource_pools.keys())
+
+    my_planner = Planner(prediction_model,
+                         warm_up_policy, warm_up_time,
+                         warm_up_policy,
+                         activity_names,
+                         predict_multiple=True,
+                         hour_timeout=120,
+                         debug=True)
+
+    simulator = Simulator(problem, Reporter(), my_planner)
+    simulator_result = simulator.simulate(24*5*365)
+    print("Simulation completed.")
+    print("Result:", simulator_result)
+
+
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else 'generate'
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else multiprocessing.cpu_count()
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    problem = MinedProblem.from_file(problem_file)
+
+    # adjust interarrival time (if needed)
+    # problem.interarrival_time._alpha *= 1.8
+
+    prediction_model = ExecutionTimeModel.from_problem(problem)
+
+    if mode == 'generate':
+        train_generated(problem, prediction_model, processes, seed)
+    elif mode == 'simulate':
+        train_simulated(problem, prediction_model)
+    else:
+        raise ValueError("Unknown mode " + mode + ", use 'generate' or 'simulate'.")
 
-with open(model_output_path, 'wb') as file:
-    pickle.dump(prediction_model, file)
+    with open(model_output_path, 'wb') as file:
+        pickle.dump(prediction_model, file)
 
-print("Simulation completed.")
-print("Result:", simulator_result)
-print("Trained model saved to:", model_output_path)
+    print("Trained model saved to:", model_output_path)
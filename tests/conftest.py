@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the modules of the repository are imported like the scripts in src import them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
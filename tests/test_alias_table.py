@@ -0,0 +1,52 @@
+import collections
+import math
+
+import pytest
+
+from simulator.distributions import AliasTable
+
+
+@pytest.mark.parametrize('values, weights', [
+    ([], []),
+    (['a', 'b'], [1.0]),
+    (['a', 'b'], [0.5, -0.5]),
+    (['a', 'b'], [0.5, math.nan]),
+    (['a', 'b'], [0.5, math.inf]),
+    (['a', 'b'], [0.0, 0.0]),
+])
+def test_rejects_invalid_weights(values, weights):
+    with pytest.raises(ValueError):
+        AliasTable(values, weights)
+
+
+def test_rejects_probabilities_that_do_not_add_up_to_one():
+    with pytest.raises(ValueError):
+        AliasTable(['a', 'b'], [0.5, 0.6], tolerance=1e-6)
+    AliasTable(['a', 'b'], [0.5, 0.5 + 1e-9], tolerance=1e-6)
+    AliasTable(['a', 'b'], [1, 3])
+
+
+def test_samples_are_reproducible_with_a_seed():
+    table = AliasTable(['a', 'b', 'c'], [0.2, 0.3, 0.5])
+    table.seed(42)
+    first = [table.sample() for _ in range(100)]
+    table.seed(42)
+    assert [table.sample() for _ in range(100)] == first
+
+
+def test_samples_follow_the_weights():
+    weights = {'a': 1, 'b': 0, 'c': 2, 'd': 7, None: 10}
+    table = AliasTable(list(weights), list(weights.values()))
+    table.seed(0)
+    nr_samples = 100000
+    counts = collections.Counter(table.sample() for _ in range(nr_samples))
+    counts_many = collections.Counter(table.sample_many(nr_samples))
+    assert counts['b'] == counts_many['b'] == 0
+    for value, weight in weights.items():
+        assert counts[value] / nr_samples == pytest.approx(weight / 20, abs=0.01)
+        assert counts_many[value] / nr_samples == pytest.approx(weight / 20, abs=0.01)
+
+
+def test_a_single_value_is_always_sampled():
+    table = AliasTable(['a'], [0.3])
+    assert set(table.sample_many(100)) == {'a'}
@@ -0,0 +1,44 @@
+import random
+
+from simulator.simulator import Event, EventQueue, EventType
+
+
+def test_pops_events_in_order_of_moment():
+    queue = EventQueue()
+    rng = random.Random(0)
+    moments = [rng.uniform(0, 100) for _ in range(50)]
+    for moment in moments:
+        queue.push(Event(EventType.CASE_ARRIVAL, moment, None))
+    assert len(queue) == len(moments)
+    assert [queue.pop().moment for _ in range(len(moments))] == sorted(moments)
+    assert len(queue) == 0
+
+
+def test_pops_events_at_equal_moments_in_order_of_pushing():
+    queue = EventQueue()
+    events = [Event(EventType.CASE_ARRIVAL, 1, None), Event(EventType.COMPLETE_TASK, 0, None),
+              Event(EventType.PLAN_TASKS, 1, None), Event(EventType.START_TASK, 1, None),
+              Event(EventType.COMPLETE_TASK, 0, None)]
+    for event in events:
+        queue.push(event)
+    popped = [queue.pop() for _ in range(len(events))]
+    assert popped == [events[1], events[4], events[0], events[2], events[3]]
+
+
+def test_peek_returns_the_next_event_without_removing_it():
+    queue = EventQueue()
+    first, second = Event(EventType.CASE_ARRIVAL, 2, None), Event(EventType.CASE_ARRIVAL, 2, None)
+    queue.push(first)
+    queue.push(second)
+    assert queue.peek() is first
+    assert len(queue) == 2
+    assert queue.pop() is first
+    assert queue.peek() is second
+
+
+def test_clear_removes_all_events():
+    queue = EventQueue()
+    for moment in range(5):
+        queue.push(Event(EventType.CASE_ARRIVAL, moment, None))
+    queue.clear()
+    assert len(queue) == 0
@@ -0,0 +1,42 @@
+import pickle
+
+import numpy as np
+
+from task_execution_time import ExecutionTimeModel
+
+
+def make_model():
+    # a network of two dense layers in its inference form, as a model is loaded, so that Keras is not needed
+    rng = np.random.default_rng(0)
+    model = ExecutionTimeModel(['A', 'B'])
+    model._layers = [(4, 'relu'), (1, 'linear')]
+    model._weights = [rng.normal(size=(3, 4)).astype(np.float32), rng.normal(size=4).astype(np.float32),
+                      rng.normal(size=(4, 1)).astype(np.float32), rng.normal(size=1).astype(np.float32)]
+    model.trained = True
+    model = pickle.loads(pickle.dumps(model))
+    model.use_backend('numpy')
+    return model
+
+
+def test_reset_restores_the_loaded_weights():
+    model = make_model()
+    x = np.ones((2, 3), dtype=np.float32)
+    loaded = model._forward(x)
+    model.predict_cache.put(('A',), 1.0)
+
+    model.set_weights([np.zeros_like(weights) for weights in model.get_weights()])
+    assert not np.allclose(model._forward(x), loaded)
+    model.predict_cache.put(('B',), 2.0)
+
+    model.reset()
+    assert np.allclose(model._forward(x), loaded)
+    assert model.backend == 'numpy'
+    assert len(model.predict_cache) == 0
+    assert model.inference_stats['batches'] == 1
+
+
+def test_reset_does_not_change_a_loaded_model():
+    model = make_model()
+    weights = [np.copy(w) for w in model.get_weights()]
+    model.reset()
+    assert all(np.array_equal(w, v) for w, v in zip(model.get_weights(), weights))
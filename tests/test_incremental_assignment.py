@@ -0,0 +1,75 @@
+import random
+
+import numpy as np
+import pytest
+from scipy.optimize import linear_sum_assignment
+
+from incremental_assignment import IncrementalAssignment
+
+
+def optimal_cost(edges, offsets):
+    rows, columns = list(edges), list(offsets)
+    matrix = np.full((len(rows), len(columns)), np.inf)
+    for i, row in enumerate(rows):
+        for j, column in enumerate(columns):
+            if column in edges[row]:
+                matrix[i, j] = edges[row][column] + offsets[column]
+    row_ind, column_ind = linear_sum_assignment(matrix)
+    return matrix[row_ind, column_ind].sum()
+
+
+def check(assignment, edges, offsets):
+    # every row has a column of its own, like the dummy column of a task, so that every row can be assigned
+    problem_edges = {row: {**row_edges, ('own', row): 10} for row, row_edges in edges.items()}
+    problem_offsets = {**offsets, **{('own', row): 0 for row in edges}}
+    solution = assignment.solve({row: dict(row_edges) for row, row_edges in problem_edges.items()}, problem_offsets)
+    assert sorted(solution) == sorted(problem_edges)
+    assert len(set(solution.values())) == len(solution)
+    assert all(column in problem_edges[row] for row, column in solution.items())
+    cost = sum(problem_edges[row][column] + problem_offsets[column] for row, column in solution.items())
+    assert cost == pytest.approx(optimal_cost(problem_edges, problem_offsets))
+
+
+def test_solves_a_single_problem():
+    edges = {'t1': {'r1': 4, 'r2': 1}, 't2': {'r1': 2, 'r2': 3}, 't3': {'r2': 0}}
+    check(IncrementalAssignment(), edges, {'r1': 0, 'r2': 0})
+
+
+@pytest.mark.parametrize('integer_costs', [False, True])
+def test_stays_optimal_after_random_edits(integer_costs):
+    rng = random.Random(1 if integer_costs else 0)
+    cost = (lambda: rng.randint(0, 4)) if integer_costs else (lambda: rng.uniform(0, 4))
+    for _ in range(50):
+        assignment = IncrementalAssignment()
+        offsets = {column: cost() for column in range(rng.randint(1, 6))}
+        edges = dict()
+        next_row, next_column = 0, len(offsets)
+        for _ in range(15):
+            edit = rng.randrange(6)
+            if edit == 0 or not edges:
+                edges[next_row] = {column: cost() for column in rng.sample(sorted(offsets), rng.randint(0, len(offsets)))}
+                next_row += 1
+            elif edit == 1:
+                del edges[rng.choice(sorted(edges))]
+            elif edit == 2:
+                row = rng.choice(sorted(edges))
+                edges[row] = {column: cost() for column in rng.sample(sorted(offsets), rng.randint(0, len(offsets)))}
+            elif edit == 3 and offsets:
+                offsets[rng.choice(sorted(offsets))] = cost()
+            elif edit == 4:
+                offsets[next_column] = cost()
+                next_column += 1
+            elif offsets:
+                column = rng.choice(sorted(offsets))
+                del offsets[column]
+                edges = {row: {c: d for c, d in row_edges.items() if c != column} for row, row_edges in edges.items()}
+            check(assignment, edges, offsets)
+
+
+def test_an_offset_changes_the_costs_of_all_edges_of_a_column():
+    assignment = IncrementalAssignment()
+    edges = {'t1': {'r1': 1, 'r2': 2}, 't2': {'r1': 1, 'r2': 2}}
+    check(assignment, edges, {'r1': 0, 'r2': 0})
+    check(assignment, edges, {'r1': 5, 'r2': 0})
+    check(assignment, edges, {'r1': 5, 'r2': 20})
+    check(assignment, edges, {'r1': 0, 'r2': 0})
@@ -0,0 +1,67 @@
+from planning_corpus import PlanningCorpus
+from simulator.problems import Task
+
+
+def make_task(task_id, case_id, task_type):
+    task = Task(task_id, case_id, task_type)
+    task.data = {'Priority': task_id % 2}
+    return task
+
+
+def allocation_call(tasks, resources, current_time):
+    return {'unassigned_tasks': list(tasks),
+            'available_resources': set(resources[:-1]),
+            'resource_pool': {'A': ['r1', 'r2'], 'B': ['r2', 'r3']},
+            'trd': {(task, resource): 1.5 + task.id + 10 * i for task in tasks for i, resource in enumerate(resources)},
+            'occupations': {resource: 0.25 * i for i, resource in enumerate(resources)},
+            'fairness': {resource: 0.5 for resource in resources},
+            'task_costs': {task: 2.0 + task.id for task in tasks},
+            'working_resources': {resources[-1]: (current_time - 1.0, 3.0)},
+            'current_time': current_time,
+            'task_type_occurrences': {task.case_id: {'A': 1, 'B': task.id} for task in tasks}}
+
+
+def plain(value):
+    # replaces the tasks in the arguments of an allocation call by their attributes, which can be compared
+    if isinstance(value, Task):
+        return value.id, value.case_id, value.task_type, tuple(sorted(value.data.items()))
+    if isinstance(value, dict):
+        return {plain(key): plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return type(value)(plain(item) for item in value)
+    return value
+
+
+def test_reads_back_the_recorded_calls(tmp_path):
+    path = tmp_path / 'calls.corpus'
+    tasks = [make_task(i, i // 2, 'AB'[i % 2]) for i in range(4)]
+    calls = [allocation_call(tasks[:2], ['r1', 'r2'], 0.0),
+             allocation_call(tasks[1:], ['r1', 'r2', 'r3'], 2.5),
+             allocation_call([], ['r3'], 4.0)]
+    corpus = PlanningCorpus(path)
+    for call in calls:
+        corpus.record(**call)
+    corpus.close()
+    assert corpus.nr_records == len(calls)
+
+    read_calls = list(PlanningCorpus.read(path))
+    assert len(read_calls) == len(calls)
+    for call, read_call in zip(calls, read_calls):
+        expected = plain(call)
+        expected['task_type_occurrences'] = {case_id: occurrences for case_id, occurrences
+                                             in expected['task_type_occurrences'].items()
+                                             if case_id in {task.case_id for task in call['unassigned_tasks']}}
+        assert plain(read_call) == expected
+
+
+def test_reads_the_same_task_objects_for_the_same_tasks(tmp_path):
+    path = tmp_path / 'calls.corpus'
+    tasks = [make_task(i, i, 'A') for i in range(3)]
+    corpus = PlanningCorpus(path)
+    corpus.record(**allocation_call(tasks[:2], ['r1'], 0.0))
+    corpus.record(**allocation_call(tasks[1:], ['r1'], 1.0))
+    corpus.close()
+
+    first, second = PlanningCorpus.read(path)
+    assert first['unassigned_tasks'][1] is second['unassigned_tasks'][0]
+    assert set(second['task_costs']) == set(second['unassigned_tasks'])
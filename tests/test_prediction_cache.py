@@ -0,0 +1,33 @@
+from task_execution_time import PredictionCache
+
+
+def test_evicts_the_least_recently_used_entry():
+    cache = PredictionCache(max_size=2)
+    cache.put(('a',), 1.0)
+    cache.put(('b',), 2.0)
+    assert cache.get(('a',)) == 1.0
+    cache.put(('c',), 3.0)
+    assert len(cache) == 2
+    assert cache.get(('b',)) is None
+    assert cache.get(('a',)) == 1.0
+    assert cache.get(('c',)) == 3.0
+    assert cache.evictions == 1
+
+
+def test_counts_hits_and_misses():
+    cache = PredictionCache()
+    assert cache.stats()['hit rate'] == 0
+    cache.put(('a', 1), 0.0)
+    assert cache.get(('a', 1)) == 0.0
+    assert cache.get(('a', 2)) is None
+    assert cache.stats() == {'size': 1, 'hits': 1, 'misses': 1, 'evictions': 0, 'hit rate': 0.5}
+
+
+def test_clear_keeps_the_counters():
+    cache = PredictionCache()
+    cache.put(('a',), 1.0)
+    cache.get(('a',))
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get(('a',)) is None
+    assert (cache.hits, cache.misses) == (1, 1)